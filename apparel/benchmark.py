@@ -0,0 +1,482 @@
+# apparel.benchmark
+# Benchmarks to catch performance regressions in the classifier
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 20:21:03 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: benchmark.py [] benjamin@bengfort.com $
+
+"""
+Benchmarks to catch performance regressions in the classifier. Results
+are dictionaries of measurements (JSON serializable) that can be saved as
+a baseline and compared against later runs with a regression threshold.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import sys
+import csv
+import json
+import time
+import random
+import platform
+import subprocess
+
+from apparel.reader import chunked
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+## Modules that are imported by every invocation of the command line tool
+CLI_IMPORTS = ('apparel', 'apparel.config', 'apparel.reader')
+
+## Modules additionally imported by each of the command line subcommands
+COMMAND_IMPORTS = {
+    'classify': ('apparel.classify',),
+    'classify-file': ('apparel.classify', 'apparel.parallel'),
+    'convert': ('apparel.build', 'apparel.features', 'apparel.utils', 'apparel.model'),
+    'memory': ('apparel.parallel',),
+    'serve': ('apparel.classify', 'apparel.instrument', 'apparel.server'),
+    'build': ('apparel.build',),
+    'update': ('apparel.build',),
+    'sweep': ('apparel.build', 'apparel.sweep'),
+    'cascade': ('apparel.benchmark', 'apparel.classify'),
+}
+
+## Benchmarks that can be run from the command line (startup is separate)
+SUITES = ('startup', 'featurize', 'load', 'latency', 'scoring', 'batch')
+
+## Words used to generate synthetic products for each category
+CATEGORIES = {
+    'outerwear': ('jacket', 'coat', 'parka', 'fleece', 'vest', 'windbreaker', 'hooded', 'insulated'),
+    'tops': ('shirt', 'tee', 'blouse', 'polo', 'tank', 'sweater', 'cardigan', 'sleeve'),
+    'accessories': ('handbag', 'satchel', 'wallet', 'scarf', 'belt', 'hat', 'sunglasses', 'tote'),
+    'activewear': ('running', 'yoga', 'training', 'compression', 'performance', 'moisture', 'sports', 'gym'),
+    'bottoms': ('jeans', 'pants', 'shorts', 'chinos', 'skirt', 'denim', 'leggings', 'waist'),
+    'dresses': ('dress', 'gown', 'maxi', 'sundress', 'cocktail', 'sheath', 'wrap', 'midi'),
+    'shoes': ('boot', 'sneaker', 'loafer', 'heel', 'sandal', 'pump', 'sole', 'oxford'),
+}
+
+BRANDS  = ('North Face', 'GUESS', 'Obey', 'Nike', 'Patagonia', 'Levi\'s', 'DAKINE', 'Columbia')
+COMMON  = ('black', 'navy', 'red', 'grey', 'small', 'large', 'x-large', 'classic',
+           'slim', 'cotton', 'leather', 'women\'s', 'men\'s', 'new', 'soft', 'with')
+
+## Direction of each measurement compared with a baseline: higher (1) or
+## lower (-1) values are better (others, e.g. the noisy max, aren't compared)
+DIRECTIONS = {
+    'rate': 1, 'speedup': 1,
+    'best': -1, 'median': -1, 'seconds': -1, 'rss': -1, 'peak': -1,
+    'p50': -1, 'p90': -1, 'p99': -1, 'mean': -1,
+}
+
+## Default fractional change of a measurement that counts as a regression
+THRESHOLD = 0.2
+
+## Heavy third party modules whose import should only happen when needed
+HEAVY_MODULES = ('nltk', 'numpy', 'yaml', 'confire')
+
+## Program run in a fresh interpreter to time the import of modules
+IMPORT_TIMER = """
+import sys, time, json
+start = time.time()
+for name in sys.argv[1:]:
+    __import__(name)
+elapsed = time.time() - start
+print(json.dumps({
+    'seconds': elapsed,
+    'heavy': [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+##########################################################################
+## Startup benchmark
+##########################################################################
+
+def time_imports(modules, repeat=5):
+    """
+    Imports the modules in a fresh interpreter repeat times, returning the
+    best (minimum) and median import times in seconds along with the list
+    of heavy modules that the imports pulled in.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env  = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        filter(None, [root, env.get('PYTHONPATH')])
+    )
+
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, '-c', IMPORT_TIMER] + list(modules), env=env
+        )
+        runs.append(json.loads(output.decode('utf-8')))
+
+    times = sorted(run['seconds'] for run in runs)
+    return {
+        'modules': list(modules),
+        'best': times[0],
+        'median': times[len(times) // 2],
+        'heavy': runs[0]['heavy'],
+    }
+
+def startup(commands=None, repeat=5):
+    """
+    Reports the time to import the modules needed by each subcommand of
+    the command line tool (including the modules every command imports)
+    so that startup regressions, e.g. an eager import of NLTK, show up.
+    """
+    commands = commands or sorted(COMMAND_IMPORTS)
+    results  = {'cli': time_imports(CLI_IMPORTS, repeat)}
+
+    for command in commands:
+        results[command] = time_imports(
+            CLI_IMPORTS + COMMAND_IMPORTS[command], repeat
+        )
+
+    return results
+
+##########################################################################
+## Synthetic corpus
+##########################################################################
+
+def synthetic_products(count, seed=None):
+    """
+    Generates count product records (dictionaries with a category, name,
+    description and keywords) drawn from category and common vocabulary,
+    with random style numbers so that, like real catalogs, some words are
+    unseen by the model. The same seed generates the same products.
+    """
+    rand   = random.Random(seed)
+    labels = sorted(CATEGORIES)
+
+    for idx in range(count):
+        label = rand.choice(labels)
+        words = CATEGORIES[label] + COMMON
+        style = "%s%i" % (rand.choice("ABCDEFGH"), rand.randint(100, 9999))
+
+        yield {
+            'category': label,
+            'name': "%s %s %s" % (
+                rand.choice(BRANDS), " ".join(rand.sample(words, 3)).title(), style
+            ),
+            'description': "The %s. %s, %s!" % (
+                " ".join(rand.sample(words, rand.randint(4, 10))),
+                rand.choice(COMMON).title(), " ".join(rand.sample(words, 3)),
+            ),
+            'keywords': ", ".join(rand.sample(words, 2)).title(),
+        }
+
+def write_corpus(path, count, seed=None):
+    """
+    Writes a CSV corpus of synthetic products (e.g. to benchmark builds).
+    """
+    fields = ('category', 'name', 'description', 'keywords')
+    with open(path, 'wb') as f:
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        for record in synthetic_products(count, seed):
+            writer.writerow([record[field] for field in fields])
+    return path
+
+##########################################################################
+## Classifier benchmarks
+##########################################################################
+
+def _load_classifier(model):
+    """
+    Loads a classifier, e.g. in a child process to measure its memory.
+    """
+    from apparel.classify import ApparelClassifier
+    return ApparelClassifier(model)
+
+def featurize(records, featurizer=None, repeat=5):
+    """
+    Measures the throughput (records per second) of featurizing the
+    records, with a cold token cache on every repetition.
+    """
+    from apparel.features import ProductFeatures
+
+    fields = ('name', 'description', 'keywords')
+    rows   = [[record.get(field) for field in fields] for record in records]
+    times  = []
+
+    for _ in range(repeat):
+        if featurizer is None:
+            instance = ProductFeatures()
+        else:
+            instance = featurizer
+            instance.cache.clear()
+
+        start = time.time()
+        for row in rows:
+            instance.featurize(*row)
+        times.append(time.time() - start)
+
+    return rate(len(rows), times)
+
+def load(model, repeat=5):
+    """
+    Measures the time taken to load a classifier and the memory it uses
+    (each repetition in a fresh child process), reporting the best time
+    and the median resident and peak memory growth in bytes.
+    """
+    from apparel.utils import profile
+
+    runs = [profile(_load_classifier, model) for _ in range(repeat)]
+    return {
+        'seconds': min(run['seconds'] for run in runs),
+        'rss': median([run['rss'] for run in runs]),
+        'peak': median([run['peak'] for run in runs]),
+    }
+
+def latency(classifier, records, repeat=5):
+    """
+    Measures the latency of classifying one record at a time, reporting
+    percentiles in milliseconds over every record and repetition.
+    """
+    fields    = ('name', 'description', 'keywords')
+    rows      = [[record.get(field) for field in fields] for record in records]
+    latencies = []
+
+    for _ in range(repeat):
+        for row in rows:
+            start = time.time()
+            classifier.classify(*row)
+            latencies.append((time.time() - start) * 1000.0)
+
+    return percentiles(latencies)
+
+def scoring(classifier, records, repeat=5):
+    """
+    Measures the throughput (featuresets per second) of scoring the
+    featuresets of the records one at a time with the compiled model and
+    with the NLTK classifier it compiles, and the speedup of the former.
+    """
+    model       = classifier._model
+    reference   = model.to_classifier()
+    featuresets = [classifier.featurize(record) for record in records]
+    results     = {}
+
+    for name, prob_classify in (('compiled', model.prob_classify), ('nltk', reference.prob_classify)):
+        times = []
+        for _ in range(repeat):
+            start = time.time()
+            for features in featuresets:
+                prob_classify(features)
+            times.append(time.time() - start)
+        results[name] = rate(len(featuresets), times)
+
+    compiled, nltk = results['compiled']['seconds'], results['nltk']['seconds']
+    results['speedup'] = nltk / compiled if compiled > 0 else None
+    return results
+
+def batch(classifier, records, batchsize=1000, repeat=5):
+    """
+    Measures the throughput (records per second) of classifying the
+    records in batches of the given size.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.time()
+        for chunk in chunked(records, batchsize):
+            classifier.classify_many(chunk)
+        times.append(time.time() - start)
+
+    result = rate(len(records), times)
+    result['batchsize'] = batchsize
+    return result
+
+def cascade(model, records, thresholds, featurizer=None, repeat=1):
+    """
+    Measures the tradeoff of cascade classification against labeled
+    records (with a category): for the full model alone (a threshold of
+    None) and then each threshold, the accuracy of the top label, the
+    fraction of records escalated to the full model and the latency
+    percentiles of classifying each record (with warm token caches).
+    """
+    from apparel.classify import ApparelClassifier
+
+    results = []
+    for threshold in [None] + sorted(thresholds):
+        classifier = ApparelClassifier(model, featurizer, cascade=threshold)
+        labels     = classifier.classify_many(records)
+        correct    = sum(
+            1 for record, dist in zip(records, labels)
+            if dist and dist[0][0] == record['category']
+        )
+        stats = classifier.cascade_stats()
+
+        result = latency(classifier, records, repeat)
+        result.update({
+            'threshold': threshold,
+            'accuracy': float(correct) / len(records),
+            'escalation': stats['rate'] if stats else 1.0,
+        })
+        results.append(result)
+
+    return results
+
+def run(suites=SUITES, model=None, count=5000, seed=42, repeat=5,
+        batchsize=1000, classifier=None):
+    """
+    Runs the named benchmark suites against the model (or an already
+    loaded classifier for all but the load and startup suites) on count
+    synthetic products, returning the results along with a description of
+    the environment they were measured in.
+    """
+    import numpy as np
+
+    records = list(synthetic_products(count, seed))
+    results = {
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            'records': count,
+            'seed': seed,
+            'repeat': repeat,
+        },
+    }
+
+    if 'startup' in suites:
+        results['startup'] = startup(repeat=repeat)
+
+    if 'load' in suites:
+        results['load'] = load(model, repeat)
+
+    if classifier is None and set(suites) & set(('featurize', 'latency', 'scoring', 'batch')):
+        classifier = _load_classifier(model)
+
+    if 'featurize' in suites:
+        results['featurize'] = featurize(records, classifier.featurizer, repeat)
+
+    if 'latency' in suites:
+        # Time a warmed up sample so the run takes as long as the others
+        sample = records[:max(1, count // 10)]
+        classifier.classify_many(sample)
+        results['latency'] = latency(classifier, sample, repeat)
+
+    if 'scoring' in suites:
+        sample = records[:max(1, count // 10)]
+        results['scoring'] = scoring(classifier, sample, repeat)
+
+    if 'batch' in suites:
+        results['batch'] = batch(classifier, records, batchsize, repeat)
+
+    return results
+
+##########################################################################
+## Baseline comparison
+##########################################################################
+
+def compare(results, baseline, thresholds=None):
+    """
+    Compares every measurement in the results with the baseline results,
+    returning a list of comparisons (sorted by metric name) of the form:
+
+        {'metric': 'batch.rate', 'baseline': 100.0, 'current': 70.0,
+         'change': -0.3, 'threshold': 0.2, 'regression': True}
+
+    The change is the fractional change in the measurement; it is a
+    regression if the measurement got worse (slower, larger) by more than
+    the threshold for the metric. Thresholds map metric names (or their
+    suite, e.g. "latency") to fractions; the "default" key (or THRESHOLD)
+    applies to any metric without one.
+    """
+    thresholds = thresholds or {}
+    default    = thresholds.get('default', THRESHOLD)
+    current    = flatten(results)
+    comparison = []
+
+    for metric, value in sorted(flatten(baseline).items()):
+        direction = DIRECTIONS.get(metric.rsplit('.', 1)[-1])
+        if direction is None or metric not in current or not value:
+            continue
+
+        threshold = thresholds.get(metric, thresholds.get(metric.split('.', 1)[0], default))
+        change    = (current[metric] - value) / float(value)
+        comparison.append({
+            'metric': metric,
+            'baseline': value,
+            'current': current[metric],
+            'change': change,
+            'threshold': threshold,
+            'regression': change * direction < -threshold,
+        })
+
+    return comparison
+
+def parse_thresholds(values):
+    """
+    Parses thresholds from the command line, either a fraction that is
+    the default for every metric or a metric=fraction pair.
+    """
+    thresholds = {}
+    for value in values or []:
+        if '=' in value:
+            metric, value = value.split('=', 1)
+            thresholds[metric.strip()] = float(value)
+        else:
+            thresholds['default'] = float(value)
+    return thresholds
+
+##########################################################################
+## Helper functions
+##########################################################################
+
+def flatten(results, prefix=''):
+    """
+    Flattens nested results into a dictionary of dotted metric names to
+    their numeric values (the environment description is not included).
+    """
+    metrics = {}
+    for key, value in results.items():
+        if key == 'environment' and not prefix:
+            continue
+
+        name = prefix + key
+        if isinstance(value, dict):
+            metrics.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, long, float)) and not isinstance(value, bool):
+            metrics[name] = value
+    return metrics
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+def rate(count, times):
+    """
+    Reports the best time to process count items and the resulting rate.
+    """
+    best = min(times)
+    return {
+        'records': count,
+        'seconds': best,
+        'median': median(times),
+        'rate': count / best if best > 0 else None,
+    }
+
+def percentiles(latencies):
+    """
+    Summarizes latencies (in milliseconds) by their percentiles.
+    """
+    import numpy as np
+
+    latencies = np.asarray(latencies)
+    return {
+        'count': len(latencies),
+        'p50': float(np.percentile(latencies, 50)),
+        'p90': float(np.percentile(latencies, 90)),
+        'p99': float(np.percentile(latencies, 99)),
+        'mean': float(latencies.mean()),
+        'max': float(latencies.max()),
+    }
@@ -19,23 +19,88 @@ Builds classifier models and saves them as pickles
 
 import os
 import time
+import itertools
 import json
 import pickle
 import random
 import apparel
-import unicodecsv as csv
+import numpy as np
 
+from functools import partial
 from datetime import datetime
+from collections import defaultdict
 from apparel.config import settings
+from apparel.cache import FeatureCache, MISSING
+from apparel.reader import CorpusReader, read_records
+from apparel.model import CompiledModel, load_model, artifact_path, cascade_path
+from apparel.maxent import MaxentTrainer, train_numpy
 from apparel.features import ProductFeatures
-from nltk.classify.util import accuracy
-from nltk.classify import MaxentClassifier
+from apparel.features import FIELDS, wordpunct_tokenize, hash_feature
+from apparel.matrix import FeatureMatrix
+from apparel.utils import peak_memory_usage
+from apparel.parallel import featurize_parallel, FoldValidation
 
 ##########################################################################
 ## Module Constants
 ##########################################################################
 
 DATE_FORMAT = "%a %b %d %H:%M:%S %Y"
+ALGORITHMS  = ('megam', 'numpy')
+
+##########################################################################
+## Helper functions
+##########################################################################
+
+def train_maxent(featureset, sigma=1):
+    """
+    Trains a maximum entropy classifier on the featureset with megam.
+    """
+    from nltk.classify import MaxentClassifier
+    return MaxentClassifier.train(featureset,
+                algorithm='megam', trace=1, gaussian_prior_sigma=sigma)
+
+def lemma_table(corpus, featurizer):
+    """
+    Reads the corpus and returns a table mapping every (lowercase) word in
+    the text fields of the corpus to its lemma according to the featurizer.
+    Stored with the model, this lets the classifier featurize without the
+    WordNet corpus for every word it could have learned a weight for.
+    """
+    words = set()
+    for row in read_records(corpus):
+        for field in FIELDS:
+            if row.get(field):
+                words.update(word.lower() for word in wordpunct_tokenize(row[field]))
+
+    return dict((word, featurizer.normalize(word)) for word in words)
+
+def kfolds(labels, k=10, stratified=False, seed=None):
+    """
+    Splits the indices of the labels into k folds for cross validation,
+    returning a list of k sorted lists of test indices. The indices are
+    shuffled using the seed; if stratified, each label is dealt evenly
+    across the folds so that every fold has the same class balance.
+    """
+    if not 1 < k <= len(labels):
+        raise ValueError(
+            "Cannot split %i instances into %i folds" % (len(labels), k)
+        )
+
+    rand = random.Random(seed)
+    if stratified:
+        groups = defaultdict(list)
+        for idx, label in enumerate(labels):
+            groups[label].append(idx)
+
+        order = []
+        for label in sorted(groups):
+            rand.shuffle(groups[label])
+            order.extend(groups[label])
+    else:
+        order = list(range(len(labels)))
+        rand.shuffle(order)
+
+    return [sorted(order[fold::k]) for fold in range(k)]
 
 ##########################################################################
 ## Model Builder
@@ -46,41 +111,150 @@ class ClassifierBuilder(object):
     Creates a classifier model using MaximumEntropy and saves it as a
     pickle to disk. This class also writes out extra information to disk
     to ensure that the model can be identified in the future.
+
+    If the path of a parent model is given, the builder instead updates
+    the parent with the (newly labeled) products of the corpus, warm
+    starting from its weights rather than retraining on every product, and
+    writes the result as a new revision that records its parent. Updates
+    are trained with the numpy algorithm (megam can't warm start) and hash
+    features into the buckets of the parent unless others are given.
+
+    If a number of buckets is given (or configured), features are hashed
+    into that many buckets, which bounds the size of the model. Builds can
+    also compare the accuracy of hashing with some numbers of buckets to
+    that of the exact vocabulary (see compare_hashing).
+
+    Features can be pruned before training: those in fewer than min_df
+    rows are dropped and, if top_n is given, so are those that are not
+    among the top_n features (by document frequency) of any label. Pruned
+    builds that are validated also validate the unpruned featureset on the
+    same folds to record the effect of pruning.
+
+    The fields of the products to featurize can be limited (the name is
+    always featurized), which the model records so that the classifier
+    ignores the others too. A featureset that was already extracted from
+    the corpus (e.g. by a sweep) can be passed in to build from.
+
+    If cascade is True, a name-only model is also built alongside the model
+    (see cascade_path) for the classifier to score names with first.
     """
 
     def __init__(self, corpus=None, **kwargs):
         self.corpus      = corpus or settings.corpus
         self.validate    = kwargs.pop('validate', True)    # Perform cross validation
+        self.folds       = kwargs.pop('folds', 10)         # Number of validation folds
+        self.stratified  = kwargs.pop('stratified', False) # Stratify folds by label
+        self.seed        = kwargs.pop('seed', None)        # Seed to shuffle folds with
         self.outpath     = kwargs.pop('outpath', '.')      # Where to write out the data
-
-        # Compute info and model paths
-        self.model_path, self.info_path = self.get_output_paths()
+        self.workers     = kwargs.pop('workers', 1)        # Processes to featurize with
+        self.chunksize   = kwargs.pop('chunksize', 1000)   # Rows per worker task
+        self.algorithm   = kwargs.pop('algorithm', MISSING) # Maxent training algorithm
+        self.sigma       = kwargs.pop('sigma', 1)           # Gaussian prior of the weights
+        self.parent      = kwargs.pop('parent', None)       # Path of the model to update
+        self.compare     = kwargs.pop('compare', None)      # Buckets to compare hashing with
+        self.cascade     = kwargs.pop('cascade', False)     # Also build a name-only model
+        self.min_df      = kwargs.pop('min_df', 1)          # Minimum rows a feature is in
+        self.top_n       = kwargs.pop('top_n', None)        # Features kept per label
+        self.fields      = tuple(kwargs.pop('fields', FIELDS)) # Product fields to featurize
+        self.extracted   = kwargs.pop('featureset', None)   # Featureset already extracted
+        self.lemmas      = kwargs.pop('lemmas', None)       # Lemma table of the corpus words
+
+        if 'name' not in self.fields or set(self.fields).difference(FIELDS):
+            raise ValueError(
+                "Fields must include the name and be some of %s" % ", ".join(FIELDS)
+            )
+
+        # Updates warm start from the parent, which only the numpy trainer does
+        if self.parent is not None:
+            if self.algorithm not in (MISSING, 'numpy'):
+                raise ValueError(
+                    "Updates are trained with the numpy algorithm, not '%s'" % self.algorithm
+                )
+            self.algorithm = 'numpy'
+        elif self.algorithm is MISSING:
+            self.algorithm = 'megam'
+
+        if self.algorithm not in ALGORITHMS:
+            raise ValueError(
+                "Unknown training algorithm '%s', use one of %s"
+                % (self.algorithm, ", ".join(ALGORITHMS))
+            )
+
+        # Cache extracted features on disk if a cache directory is given
+        # (only reading the settings if the cache isn't passed in at all)
+        cache = kwargs.pop('cache', MISSING)
+        if cache is MISSING:
+            cache = settings.cache
+        self.cache       = FeatureCache(cache) if cache else None
+        self.cached      = False # Whether the features were read from cache
+
+        # Compute info, model and compact artifact paths
+        self.model_path, self.artifact_path, self.info_path = self.get_output_paths()
 
         # Other required properties
         self.accuracy    = None  # Accuracy of the model
+        self.validation  = None  # Results of each cross validation fold
         self.started     = None  # Start timestamp of the build
         self.finished    = None  # Finish timestamp of the build
         self.buildtime   = None  # Time (seconds) of complete build
         self.feattime    = None  # Time (seconds) to get features
         self.traintime   = None  # Time (seconds) to train the model
         self.validtime   = None  # Time (seconds) to run the validation
-
-        # Create a featurizer
-        self.featurizer  = ProductFeatures()
+        self.lemmatime   = None  # Time (seconds) to build the lemma table
+        self.history     = None  # Loss and time of each training iteration
+        self.hashing     = None  # Comparison of hashing with the exact vocabulary
+        self.features    = None  # Number of features of the model
+        self.pruning     = None  # Vocabulary and effect of pruning features
+        self.cascaded    = None  # Path, size and training time of the name model
+        self.reader      = None  # Reader of the corpus the features were extracted from
 
         # Cache the features on the model
         self._featureset = None
+        self._unpruned   = None
+        self._folds      = None
+        self._parent     = None
+
+        # Create a featurizer (unless one is passed in) that hashes features
+        # into the buckets of the model being updated, or those configured.
+        buckets = kwargs.pop('buckets', MISSING)
+        if buckets is MISSING:
+            if self.parent is not None:
+                buckets = self.parent_model().buckets
+            else:
+                buckets = settings.buckets
+        self.featurizer  = kwargs.pop('featurizer', None) or ProductFeatures(buckets=buckets)
+
+        if self.cascade and (self.parent is not None or self.fields != FIELDS):
+            raise ValueError(
+                "Cascades are built from every field of the corpus, not updated"
+            )
+
+        if self.compare and self.featurizer.buckets:
+            raise ValueError(
+                "Hashing can only be compared with a build of the exact vocabulary"
+            )
+
+        if self.parent is not None and self.parent_model().buckets != self.featurizer.buckets:
+            raise ValueError(
+                "Can't update a model with %s buckets using %s buckets"
+                % (self.parent_model().buckets, self.featurizer.buckets)
+            )
 
     def featureset(self):
         """
         Opens the corpus path, reads the data and constructs features to
-        pass to the classifier. (A simple improvement is to cache this).
+        pass to the classifier. The features are cached on the builder and,
+        if a cache directory is configured, on disk keyed by the contents
+        of the corpus, the featurizer configuration and the fields, so
+        that rebuilding from an unchanged corpus skips extraction entirely.
 
-        Returns a dictionary of features and the label as follows:
+        Returns a FeatureMatrix of the features and label of every row, a
+        compact encoding of the featureset:
 
             [(feats, label) for row in corpus]
 
-        This is the expected format for the MaxentClassifier.
+        which is the expected format for the MaxentClassifier (iterating
+        over the matrix yields these pairs).
         """
 
         if self._featureset is None:
@@ -88,19 +262,111 @@ class ClassifierBuilder(object):
             # Time how long it takes to extract features
             start = time.time()
 
-            self._featureset = []
-            with open(self.corpus, 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    label = row.pop('category')
-                    feats = self.featurizer.featurize(**row)
-                    self._featureset.append((feats, label))
+            # Use the features passed in if they've already been extracted
+            self._featureset = self.extracted
+
+            # Read the features (and lemma table) from the cache if they've been extracted
+            if self._featureset is None and self.cache is not None:
+                key = self.cache.key(self.corpus, self.featurizer, self.fields)
+                entry = self.cache.get(self.corpus, key, self.fields)
+                if entry is not None:
+                    self._featureset, self.lemmas = entry
+                    self.cached = True
+
+            if self._featureset is None:
+                self._featureset = self.extract()
+                if self.cache is not None:
+                    self.cache.put(self.corpus, key, (self._featureset, self.lemmas), self.fields)
+
+            # Prune the features (the cache holds the unpruned features)
+            if self.min_df > 1 or self.top_n:
+                self._featureset = self.prune(self._featureset)
 
             # Record feature extraction time
             self.feattime = time.time() - start
 
         return self._featureset
 
+    def extract(self, fields=None):
+        """
+        Reads the corpus and extracts the featureset from every row (of
+        the given fields, by default those of the builder). If
+        the builder has more than one worker, rows are featurized in
+        chunks across a process pool and merged back in corpus order. The
+        features of each row are encoded into the FeatureMatrix as they are
+        extracted, so the featureset is never held in memory as dicts.
+
+        The corpus is streamed by a CorpusReader (so it can be compressed
+        or sharded into many files), which reads ahead in the background.
+        The lemma table of the words of the featureset is recorded as it is
+        extracted, so that the corpus need not be read again to build it.
+        """
+        reader = CorpusReader(self.corpus, chunksize=self.chunksize)
+        pairs  = ((row, row.pop('category')) for row in reader)
+
+        # Report the throughput of reading the corpus for the featureset
+        if fields is None:
+            self.reader = reader
+            self.lemmas = self.featurizer.record()
+
+        # Only featurize the selected fields of each row
+        fields = tuple(fields or self.fields)
+        if fields != FIELDS:
+            pairs = (
+                (dict((field, row.get(field)) for field in fields), label)
+                for row, label in pairs
+            )
+
+        # Shard featurization across processes if requested
+        if self.workers > 1:
+            featureset = featurize_parallel(
+                pairs, self.featurizer, self.workers, self.chunksize
+            )
+        else:
+            featureset = (
+                (self.featurizer.featurize(**row), label)
+                for row, label in pairs
+            )
+
+        try:
+            return FeatureMatrix.from_featureset(featureset)
+        finally:
+            self.featurizer.lemmatized = None
+
+    def prune(self, featureset):
+        """
+        Selects the features in at least min_df rows that are among the
+        top_n of a label from the counts of the featureset, and returns the
+        featureset with only those features. The unpruned featureset is
+        kept if the build is validated, to measure the effect of pruning.
+        """
+        pruned = featureset.prune(featureset.select(self.min_df, self.top_n))
+        self.pruning = {
+            'min_df': self.min_df,
+            'top_n': self.top_n,
+            'before': len(featureset.vocabulary),
+            'after': len(pruned.vocabulary),
+        }
+
+        if self.validate:
+            self._unpruned = featureset
+        return pruned
+
+    def lemma_table(self):
+        """
+        Returns the table of every word in the corpus to its lemma, which
+        is recorded when the featureset is extracted (and cached with it);
+        the corpus is only read again if the featureset was passed in
+        without its lemma table.
+        """
+        if self.lemmas is not None:
+            return self.lemmas
+
+        start = time.time()
+        self.lemmas = lemma_table(self.corpus, self.featurizer)
+        self.lemmatime = time.time() - start
+        return self.lemmas
+
     def train(self, featureset=None):
         """
         Trains the maximum entropy classifier and returns it. If a
@@ -110,23 +376,86 @@ class ClassifierBuilder(object):
         Pass in a featureset during cross validation.
         Returns the training time and the classifier.
         """
-        featureset = featureset or self.featureset()
+        if featureset is None:
+            featureset = self.featureset()
 
         # Time how long it takes to train
         start = time.time()
 
-        classifier = MaxentClassifier.train(featureset,
-                        algorithm='megam', trace=1, gaussian_prior_sigma=1)
+        if self.algorithm == 'numpy':
+            trainer = MaxentTrainer(self.sigma, workers=self.workers, trace=1)
+            model   = trainer.train(featureset, self.parent_model())
+            classifier = model.to_classifier()
+            self.history = trainer.history
+        else:
+            classifier = train_maxent(featureset, self.sigma)
 
         delta = time.time() - start
         return classifier, delta
 
+    def trainer(self):
+        """
+        Returns the function used to train a model on each validation fold,
+        which need only classify the held out featuresets.
+        """
+        if self.algorithm == 'numpy':
+            return partial(train_numpy, sigma=self.sigma, parent=self.parent_model())
+        return partial(train_maxent, sigma=self.sigma)
+
+    def parent_model(self):
+        """
+        Loads the compiled model being updated, or returns None for builds.
+        """
+        if self.parent is not None and self._parent is None:
+            self._parent = load_model(self.parent)
+        return self._parent
+
+    def compare_hashing(self, buckets):
+        """
+        Cross validates models trained on the features hashed into each of
+        the given numbers of buckets on the same folds as the exact
+        vocabulary, returning the accuracy, number of features and size of
+        the weights of every mode (the exact vocabulary first, with None
+        buckets). Hashed featuresets are derived from the exact featureset
+        rather than extracted again from the corpus.
+        """
+        exact  = self.featureset()
+        folds  = kfolds(exact.targets.tolist(), self.folds, self.stratified, self.seed)
+        report = []
+
+        for size in [None] + sorted(buckets):
+            if size is None:
+                featureset = exact
+            else:
+                template   = self.featurizer.BUCKET
+                featureset = FeatureMatrix.from_featureset(
+                    (dict((template % hash_feature(fname, size), True) for fname in feats), label)
+                    for feats, label in exact
+                )
+
+            results  = FoldValidation(featureset, self.trainer(), folds, self.workers).get()
+            accuracy = float(np.mean([fold['accuracy'] for fold in results]))
+            features = len(featureset.vocabulary)
+
+            report.append({
+                'buckets': size,
+                'features': features,
+                'collisions': len(exact.vocabulary) - features,
+                'accuracy': accuracy,
+                'change': accuracy - report[0]['accuracy'] if report else 0.0,
+                'weights': features * len(featureset.labels) * np.dtype(float).itemsize,
+                'training': float(np.mean([fold['training'] for fold in results])),
+            })
+
+        return report
+
     def build(self):
         """
         Builds the model and writes to the outpath (which should be a
-        directory). Two files are written:
+        directory). Three things are written:
 
             - the pickle of the model
+            - the compact artifact of the model (a directory)
             - a yaml file of associated data
 
         Note, if a file already exists at the outpath, this will raise an
@@ -137,6 +466,11 @@ class ClassifierBuilder(object):
         self.started  = datetime.now()
         start = time.time()
 
+        # Begin accuracy validation; with workers the folds are trained in
+        # a process pool concurrently with the training of the model.
+        if self.validate:
+            validation = self.start_validation()
+
         # Extract the features and train the model
         classifier, self.traintime = self.train()
 
@@ -144,9 +478,28 @@ class ClassifierBuilder(object):
         with open(self.model_path, 'w') as f:
             pickle.dump(classifier, f, pickle.HIGHEST_PROTOCOL)
 
-        # Begin accuracy validation
+        # Write the compact artifact (with the lemma table) for fast loading;
+        # an update keeps the lemmas of the corpora its parent was built from.
+        model = CompiledModel.from_classifier(classifier)
+        model.lemmas  = self.lemma_table()
+        model.buckets = self.featurizer.buckets
+        model.fields  = self.fields if self.fields != FIELDS else None
+        if self.parent is not None and self.parent_model().lemmas:
+            model.lemmas = dict(self.parent_model().lemmas, **model.lemmas)
+        model.save(self.artifact_path)
+        self.features = len(model)
+
+        # Build the name-only model for cascade classification
+        if self.cascade:
+            self.build_cascade()
+
+        # Complete accuracy validation
         if self.validate:
-            self.cross_validate()
+            self.finish_validation(validation)
+
+        # Compare the accuracy of hashing features with the exact vocabulary
+        if self.compare:
+            self.hashing = self.compare_hashing(self.compare)
 
         # Record the finish time
         self.finished = datetime.now()
@@ -155,45 +508,116 @@ class ClassifierBuilder(object):
         # Write the information to disk
         self.write_details()
 
+    def build_cascade(self):
+        """
+        Extracts the features of the names of the corpus (pruned like the
+        features of the model) and trains the name-only model used first in
+        cascade classification, writing its compact artifact alongside the
+        model's.
+        """
+        start = time.time()
+        featureset = self.extract(('name',))
+        if self.min_df > 1 or self.top_n:
+            featureset = featureset.prune(featureset.select(self.min_df, self.top_n))
+
+        if self.algorithm == 'numpy':
+            model = MaxentTrainer(self.sigma, workers=self.workers).train(featureset)
+        else:
+            model = CompiledModel.from_classifier(train_maxent(featureset, self.sigma))
+
+        model.buckets = self.featurizer.buckets
+        model.fields  = ('name',)
+        model.save(cascade_path(self.artifact_path))
+
+        self.cascaded = {
+            'artifact': cascade_path(self.artifact_path),
+            'features': len(model),
+            'training': time.time() - start,
+        }
+        return model
+
     def cross_validate(self):
         """
-        Performs cross validation by training the model on 90% of the
-        corpus then checking the accuracy on the remaining 10%.
+        Performs k-fold cross validation by training a model on all but
+        one fold of the corpus then checking the accuracy on that fold, for
+        each of the folds. The folds are trained concurrently if the
+        builder has more than one worker.
         """
-        start  = time.time()
+        self.finish_validation(self.start_validation())
 
+    def start_validation(self):
+        """
+        Splits the featureset into folds (without modifying it) and begins
+        training and evaluating them, returning the pending validation.
+        """
         feats  = self.featureset()
-        offset = len(feats) / 10
-        random.shuffle(feats)
-
-        train  = feats[:offset]
-        test   = feats[offset:]
+        self._folds = kfolds(
+            feats.targets.tolist(), self.folds, self.stratified, self.seed
+        )
 
-        classifier, _  = self.train(train)
-        self.accuracy  = accuracy(classifier, test)
+        return FoldValidation(feats, self.trainer(), self._folds, self.workers)
 
-        self.validtime = time.time() - start
+    def finish_validation(self, validation):
+        """
+        Waits for the pending validation and records the per-fold results
+        along with the mean accuracy of the model.
+        """
+        self.validation = validation.get()
+        self.accuracy   = float(np.mean(
+            [fold['accuracy'] for fold in self.validation]
+        ))
+        self.validtime  = validation.elapsed
+
+        # Validate the unpruned features on the same folds for comparison
+        if self._unpruned is not None:
+            unpruned = FoldValidation(
+                self._unpruned, self.trainer(), self._folds, self.workers
+            ).get()
+
+            nlabels  = len(self._unpruned.labels)
+            itemsize = np.dtype(float).itemsize
+            for name, results, features in (
+                ('pruned', self.validation, self.pruning['after']),
+                ('unpruned', unpruned, self.pruning['before']),
+            ):
+                self.pruning[name] = {
+                    'accuracy': float(np.mean([fold['accuracy'] for fold in results])),
+                    'training': float(np.mean([fold['training'] for fold in results])),
+                    'weights': features * nlabels * itemsize,
+                }
 
     def get_output_paths(self):
         """
-        Returns two paths - the pickle path and the information yaml path.
-        Ensures those paths don't exist and wont' be overwritten.
+        Returns three paths - the pickle path, the compact artifact path and
+        the information yaml path. Ensures those paths don't exist and wont'
+        be overwritten.
+
+        Updates are versioned: since a model may be updated more than once a
+        day, the first of today's revisions (-r1, -r2, ...) that doesn't
+        exist yet is used rather than raising an exception.
         """
 
         today = datetime.now().strftime('%Y-%d-%m')
-        mname = os.path.join(self.outpath, "model-%s.pickle" % today)
-        iname = os.path.join(self.outpath, "info-%s.json" % today)
+        for revision in itertools.count(1):
+            version = today if self.parent is None else "%s-r%i" % (today, revision)
+            mname = os.path.join(self.outpath, "model-%s.pickle" % version)
+            aname = os.path.join(self.outpath, "model-%s" % version)
+            iname = os.path.join(self.outpath, "info-%s.json" % version)
 
-        for name in (mname, iname):
-            if os.path.exists(name):
-                raise Exception("Can't overwrite file at '%s'!" % name)
+            existing = [name for name in (mname, aname, iname) if os.path.exists(name)]
+            if not existing:
+                return mname, aname, iname
 
-        return mname, iname
+            if self.parent is None:
+                raise Exception("Can't overwrite file at '%s'!" % existing[0])
 
     def write_details(self):
         """
         Writes the details of the classifier to a YAML file.
         """
+        from nltk.classify import MaxentClassifier
+
+        reading = self.reader.stats() if self.reader is not None else {}
 
         details = {
             'version': apparel.get_version(),
@@ -204,23 +628,110 @@ class ClassifierBuilder(object):
             'corpus': self.corpus,
             'paths': {
                 'model': self.model_path,
+                'artifact': self.artifact_path,
                 'info': self.info_path,
             },
             'classes': {
                 'classifier': MaxentClassifier.__name__,
                 'features': ProductFeatures.__name__,
             },
+            'workers': self.workers,
+            'parent': self.get_parent_details(),
+            'training': {
+                'algorithm': self.algorithm,
+                'sigma': self.sigma,
+                'iterations': len(self.history) if self.history else None,
+                'loss': self.history[-1]['loss'] if self.history else None,
+                'history': self.history,
+            },
+            'validation': self.get_validation_details(),
+            'cascade': self.cascaded,
+            'features': {
+                'fields': self.fields,
+                'buckets': self.featurizer.buckets,
+                'count': self.features,
+                'hashing': self.hashing,
+                'pruning': self.pruning,
+            },
+            'reader': {
+                'files': reading.get('files'),
+                'bytes': reading.get('bytes'),
+                'rows': reading.get('rows'),
+            },
+            'cache': {
+                'path': self.cache.path if self.cache else None,
+                'hit': self.cached,
+            },
+            'memory': {
+                'peak': peak_memory_usage(),
+                'featureset': self._featureset.nbytes if self._featureset is not None else None,
+                'validation': max(
+                    fold['peak_memory'] for fold in self.validation
+                ) if self.validation else None,
+            },
             'timer': {
                 'build': self.buildtime,
                 'features': self.feattime,
                 'validation': self.validtime,
                 'training': self.traintime,
+                'lemmas': self.lemmatime,
+                'reading': reading.get('reading'),
+                'bytes_per_sec': reading.get('bytes_per_sec'),
+                'rows_per_sec': reading.get('rows_per_sec'),
             }
         }
 
         with open(self.info_path, 'w') as f:
             json.dump(details, f, indent=4)
 
+    def get_parent_details(self):
+        """
+        Describes the model that was updated (None for a full build): its
+        paths and accuracy (from its information file, if it is found)
+        and the features and labels that the update added to it.
+        """
+        if self.parent is None:
+            return None
+
+        parent = self.parent_model()
+        stem   = artifact_path(self.parent)
+        info   = os.path.join(
+            os.path.dirname(stem), os.path.basename(stem).replace("model-", "info-", 1) + ".json"
+        )
+
+        details = {}
+        if os.path.exists(info):
+            with open(info, 'r') as f:
+                details = json.load(f)
+
+        featureset = self.featureset()
+        return {
+            'model': self.parent,
+            'info': info if details else None,
+            'accuracy': details.get('accuracy'),
+            'rows': len(featureset),
+            'features': len(parent),
+            'new_features': len(set(featureset.vocabulary).difference(parent.vocabulary)),
+            'new_labels': sorted(set(featureset.labels).difference(parent.labels)),
+        }
+
+    def get_validation_details(self):
+        """
+        Summarizes the cross validation folds for the information file.
+        """
+        if not self.validation:
+            return None
+
+        scores = [fold['accuracy'] for fold in self.validation]
+        return {
+            'folds': len(self.validation),
+            'stratified': self.stratified,
+            'seed': self.seed,
+            'mean': float(np.mean(scores)),
+            'stddev': float(np.std(scores, ddof=1)) if len(scores) > 1 else 0.0,
+            'results': self.validation,
+        }
+
 if __name__ == '__main__':
     builder = ClassifierBuilder()
     print builder.build()
@@ -0,0 +1,344 @@
+# apparel.cache
+# Caches for features and tokens so they need not be recomputed
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 17:03:26 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: cache.py [] benjamin@bengfort.com $
+
+"""
+Caches for features and tokens so they need not be recomputed
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import time
+import glob
+import json
+import pickle
+import hashlib
+import tempfile
+import threading
+
+from apparel.reader import corpus_paths
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+BLOCK_SIZE = 1048576  # Read the corpus 1MB at a time when hashing
+FORMAT     = 3        # Version of the format of cached featuresets
+
+## Indices of the fields of a link in the LRU cache linked list
+PREV, NEXT, KEY, VALUE = 0, 1, 2, 3
+
+## Sentinel for keys that are not in the cache
+MISSING = object()
+
+##########################################################################
+## Feature Cache
+##########################################################################
+
+class FeatureCache(object):
+    """
+    An on-disk cache of the featureset extracted from a corpus. Entries
+    are keyed by a hash of the contents of the corpus files along with the
+    configuration of the featurizer and the fields of the products that
+    are featurized (and the format of the entries), so a change to any of
+    them results in a cache miss, at which point the stale entry for the
+    corpus and fields is replaced by the newly extracted features. Builds
+    of different fields of the same corpus keep their own entries.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def key(self, corpus, featurizer, fields=None):
+        """
+        Computes the cache key from the contents of the corpus (every file
+        of it, in order, if sharded), the configuration of the featurizer
+        and the fields of the products that are featurized (if given).
+        """
+        digest = hashlib.sha1()
+        for path in corpus_paths(corpus):
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+                    digest.update(block)
+
+        config = json.dumps(featurizer.config(), sort_keys=True)
+        digest.update(config.encode('utf-8'))
+        if fields is not None:
+            digest.update(json.dumps(sorted(fields)).encode('utf-8'))
+        digest.update(str(FORMAT).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, corpus, key, fields=None):
+        """
+        Returns the cached featureset for the corpus, key and fields, or None.
+        """
+        path = self.get_entry_path(corpus, key, fields)
+        if not os.path.exists(path):
+            return None
+
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def put(self, corpus, key, featureset, fields=None):
+        """
+        Writes the featureset to the cache (atomically, so that concurrent
+        builds never see partial entries) and removes any stale entries
+        of the fields that were extracted from a previous version of the
+        corpus (or with another featurizer).
+        """
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+
+        path = self.get_entry_path(corpus, key, fields)
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(featureset, f, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp, path)
+
+        for stale in glob.glob(self.get_entry_path(corpus, '*', fields)):
+            if stale != path:
+                os.remove(stale)
+
+        return path
+
+    def get_entry_path(self, corpus, key, fields=None):
+        """
+        Entries are named by the corpus location and fields along with the
+        key, so that each corpus has at most one entry in the cache at a
+        time for each set of fields that are featurized.
+        """
+        corpus = hashlib.sha1(os.path.abspath(corpus).encode('utf-8'))
+        if fields is not None:
+            corpus.update(json.dumps(sorted(fields)).encode('utf-8'))
+        name   = "features-%s-%s.pickle" % (corpus.hexdigest()[:12], key)
+        return os.path.join(self.path, name)
+
+##########################################################################
+## LRU Cache
+##########################################################################
+
+class LRUCache(object):
+    """
+    A bounded mapping that evicts the least recently used key when it is
+    full, keeping counters of hits, misses and evictions. Entries are kept
+    in a dictionary of links in a circular doubly linked list ordered by
+    recency (as in functools.lru_cache) so that every operation is O(1).
+
+    A maxsize of 0 disables the cache: nothing is stored and every lookup
+    is a miss. Each operation holds a (non-reentrant) mutex while it
+    relinks the list, so a cache may be shared between threads, e.g. the
+    token cache of a featurizer used by the server.
+    """
+
+    def __init__(self, maxsize=100000):
+        self.maxsize   = maxsize
+        self.mutex     = threading.Lock()
+        self.clear()
+
+    def get(self, key, default=None):
+        """
+        Returns the value for the key, marking it as the most recently used,
+        or the default (counted as a miss) if the key is not in the cache.
+        """
+        with self.mutex:
+            link = self.links.get(key)
+            if link is None:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self._unlink(link)
+            self._append(link)
+            return link[VALUE]
+
+    def put(self, key, value):
+        """
+        Stores the value for the key as the most recently used entry,
+        evicting the least recently used entry if the cache is full.
+        """
+        with self.mutex:
+            link = self.links.get(key)
+            if link is not None:
+                link[VALUE] = value
+                self._unlink(link)
+                self._append(link)
+                return
+
+            if self.maxsize <= 0:
+                return
+
+            if len(self.links) >= self.maxsize:
+                oldest = self.root[NEXT]
+                self._unlink(oldest)
+                del self.links[oldest[KEY]]
+                self.evictions += 1
+                self.evicted(oldest[KEY], oldest[VALUE])
+
+            link = [None, None, key, value]
+            self.links[key] = link
+            self._append(link)
+
+    def pop(self, key, default=None):
+        """
+        Removes the key from the cache, returning its value or the default.
+        """
+        with self.mutex:
+            link = self.links.pop(key, None)
+            if link is None:
+                return default
+
+            self._unlink(link)
+            return link[VALUE]
+
+    def clear(self):
+        """
+        Removes every entry and resets the counters.
+        """
+        with self.mutex:
+            self.links     = {}
+            self.root      = []
+            self.root[:]   = [self.root, self.root, None, None]
+            self.hits      = 0
+            self.misses    = 0
+            self.evictions = 0
+
+    def evicted(self, key, value):
+        """
+        Called with every entry that is evicted (while the mutex is held),
+        so that subclasses can release anything else they hold for it.
+        """
+        pass
+
+    def items(self):
+        """
+        Returns the (key, value) pairs from least to most recently used.
+        """
+        with self.mutex:
+            items, link = [], self.root[NEXT]
+            while link is not self.root:
+                items.append((link[KEY], link[VALUE]))
+                link = link[NEXT]
+            return items
+
+    def stats(self):
+        """
+        Returns the size of the cache and its hit, miss and eviction counts.
+        """
+        with self.mutex:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.links),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': float(self.hits) / lookups if lookups else None,
+            }
+
+    def _unlink(self, link):
+        link[PREV][NEXT] = link[NEXT]
+        link[NEXT][PREV] = link[PREV]
+
+    def _append(self, link):
+        last = self.root[PREV]
+        link[PREV], link[NEXT] = last, self.root
+        last[NEXT] = self.root[PREV] = link
+
+    def __contains__(self, key):
+        return key in self.links
+
+    def __len__(self):
+        return len(self.links)
+
+    def __getstate__(self):
+        # The linked list is too deeply nested to pickle directly
+        return {
+            'maxsize': self.maxsize,
+            'items': self.items(),
+            'counts': (self.hits, self.misses, self.evictions),
+        }
+
+    def __setstate__(self, state):
+        self.maxsize = state['maxsize']
+        self.mutex   = threading.Lock()
+        self.clear()
+        for key, value in state['items']:
+            self.put(key, value)
+        self.hits, self.misses, self.evictions = state['counts']
+
+##########################################################################
+## Result Cache
+##########################################################################
+
+class ResultCache(LRUCache):
+    """
+    A thread-safe LRU cache whose entries optionally expire ttl seconds
+    after they were stored; an expired entry counts as a miss (and an
+    expiration) when it is next looked up, and is removed.
+    """
+
+    def __init__(self, maxsize=10000, ttl=None):
+        self.ttl  = ttl
+        self.lock = threading.RLock()
+        LRUCache.__init__(self, maxsize)
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = LRUCache.get(self, key, MISSING)
+            if entry is MISSING:
+                return default
+
+            expires, value = entry
+            if expires is not None and expires <= time.time():
+                self.pop(key)
+                self.hits -= 1
+                self.misses += 1
+                self.expirations += 1
+                return default
+
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            expires = time.time() + self.ttl if self.ttl else None
+            LRUCache.put(self, key, (expires, value))
+
+    def clear(self):
+        with self.lock:
+            LRUCache.clear(self)
+            self.expirations = 0
+
+    def stats(self):
+        with self.lock:
+            stats = LRUCache.stats(self)
+            stats['ttl'] = self.ttl
+            stats['expirations'] = self.expirations
+            return stats
+
+    def __getstate__(self):
+        with self.lock:
+            state = LRUCache.__getstate__(self)
+            state['ttl'] = self.ttl
+            state['expirations'] = self.expirations
+            return state
+
+    def __setstate__(self, state):
+        self.ttl  = state['ttl']
+        self.lock = threading.RLock()
+        self.mutex = threading.Lock()
+        self.maxsize = state['maxsize']
+        LRUCache.clear(self)
+        for key, value in state['items']:
+            LRUCache.put(self, key, value)
+        self.hits, self.misses, self.evictions = state['counts']
+        self.expirations = state['expirations']
@@ -17,10 +17,13 @@ Classifier package - utilize built model to perform classifications
 ## Imports
 ##########################################################################
 
-import pickle
-
 from operator import itemgetter
+from collections import Counter
 from apparel.config import settings
+from apparel.reader import chunked, validate_records
+from apparel.model import load_model, cascade_path
+from apparel.cache import ResultCache
+from apparel.dedupe import NearDuplicateIndex, MAXSIZE
 from apparel.features import ProductFeatures
 
 ##########################################################################
@@ -29,52 +32,343 @@ from apparel.features import ProductFeatures
 
 class ApparelClassifier(object):
     """
-    Performs classification of products using a classifier that is loaded
-    via a pickle at runtime. This classifier can be of any type, but we
-    expect the Maximum Entropy classifier trained from a CSV corpus.
+    Performs classification of products using a Maximum Entropy classifier
+    trained from a CSV corpus, that is loaded at runtime either from its
+    compact artifact or from a pickle (then compiled for fast scoring).
     """
 
-    def __init__(self, model=None):
+    def __init__(self, model=None, featurizer=None, mmap=False, wordnet=True,
+                 cache_size=0, cache_ttl=None, instrument=None, cascade=None,
+                 dedupe=None, dedupe_size=MAXSIZE):
         """
-        Pass in the path of the pickle classifier object.
+        Pass in the path of the model artifact or pickle classifier object
+        (if a pickle has an artifact alongside it, the artifact is loaded),
+        and optionally the featurizer to use (ProductFeatures by default).
+        If mmap is True the artifact weights, vocabulary and lemma table are
+        memory mapped so that they are shared between all of the classifier
+        processes on a host.
+
+        If the artifact has a lemma table, the default featurizer looks up
+        words in it and only loads WordNet for words the corpus never had,
+        or never if wordnet is False (such words are not lemmatized). It
+        also hashes features into the buckets of the model, if any. Fields
+        of products that the model wasn't trained on are ignored.
+
+        If cache_size is greater than zero, the label distributions of up
+        to that many distinct featuresets are cached (expiring after
+        cache_ttl seconds if given), so that repeated products, or products
+        that only differ by stopwords or punctuation, skip scoring.
+
+        If an Instrument is passed, the time spent in each stage of
+        classification is recorded with it, as is featurization if the
+        featurizer isn't already instrumented.
+
+        If a cascade threshold is given, the name-only model built with the
+        model scores the name of each product first; only if the top label
+        has a lower probability than the threshold is the whole product
+        (with its much longer description) featurized and scored by the
+        full model. The escalation rate is reported by cascade_stats.
+
+        If a dedupe threshold is given, the features and results of up to
+        dedupe_size recently scored products are indexed (by MinHash), and
+        a product whose features have at least that Jaccard similarity with
+        those of one of them reuses its result rather than being scored,
+        e.g. the same product in another color. Unlike the result cache the
+        reused distribution is not exactly the one the product would get.
+        The reuse rate is reported by dedupe_stats.
         """
 
         ## Get the default model from the settings if it isn't passed in
         model = model or settings.model
 
-        ## Load the model from the pickle
-        with open(model, 'rb') as pkl:
-            self._classifier = pickle.load(pkl)
+        ## Load the compiled model, by preference from the compact artifact
+        self._model = load_model(model, mmap=mmap)
+
+        ## The fields of products the model was trained on (None for all)
+        self.fields = self._model.fields
+
+        ## Load the name-only model to classify with first in a cascade
+        self.cascade = cascade
+        self.cascaded = Counter()
+        self._names = None
+
+        ## Count the streamed records and those skipped as invalid
+        self.validated = Counter()
+        if cascade is not None:
+            self._names = load_model(cascade_path(model), mmap=mmap)
 
         ## Create a featurizer to use
-        self.featurizer = ProductFeatures()
+        self.featurizer = featurizer or ProductFeatures(
+            lemmas=self._model.lemmas, fallback=wordnet,
+            buckets=self._model.buckets,
+        )
+
+        ## Create a thread-safe cache of results keyed by featureset
+        self.cache = ResultCache(cache_size, cache_ttl) if cache_size > 0 else None
+
+        ## Create an index of recent results to reuse for near-duplicates
+        self.dedupe = NearDuplicateIndex(dedupe, dedupe_size) if dedupe else None
+
+        ## Instrument the stages of classification (and featurization)
+        self.instrument = instrument
+        if instrument is not None and getattr(self.featurizer, 'instrument', False) is None:
+            self.featurizer.instrument = instrument
 
     def classify(self, name, description=None, keywords=None):
         """
         Classifies the text using the internal classifier. Returns a
         probability distribution of the labels associated with the text.
         """
+        inst = self.instrument
+        if inst is not None: begin = start = inst.clock()
+
+        # Only score the whole product if the name model isn't confident
+        if self.cascade is not None:
+            labels = self.classify_names([name])[0]
+            if inst is not None: start = inst.lap('classify.cascade', start)
+            if labels is not None:
+                if inst is not None: inst.lap('classify', begin)
+                return labels
+
+        if self.fields is not None:
+            if 'description' not in self.fields: description = None
+            if 'keywords' not in self.fields: keywords = None
+
         features = self.featurizer.featurize(name, description, keywords)
-        probdist = self._classifier.prob_classify(features)
-        labels   = [(label, probdist.prob(label))
-                    for label in probdist.samples()
-                    if probdist.prob(label) > 0.01]
+        if inst is not None: start = inst.lap('classify.featurize', start)
+
+        key = labels = None
+        if self.cache is not None:
+            key    = self.cache_key(features)
+            labels = self.cache.get(key)
+            if inst is not None: start = inst.lap('classify.cache', start)
+
+        if labels is None and self.dedupe is not None:
+            nearkeys = self.dedupe.keys(features)
+            labels   = self.dedupe.get(features, nearkeys)
+            if inst is not None: start = inst.lap('classify.dedupe', start)
+
+            if labels is not None and self.cache is not None:
+                self.cache.put(key, labels)
+
+        if labels is None:
+            probdist = self._model.prob_classify(features)
+            if inst is not None: start = inst.lap('classify.score', start)
+
+            labels = self.distribution(probdist)
+            if inst is not None: inst.lap('classify.distribution', start)
+
+            if self.cache is not None:
+                self.cache.put(key, labels)
+            if self.dedupe is not None:
+                self.dedupe.put(features, labels, nearkeys)
+
+        if inst is not None: inst.lap('classify', begin)
+        return labels if self.cache is None and self.dedupe is None else list(labels)
+
+    def classify_many(self, records):
+        """
+        Classifies a batch of products, featurizing every record and then
+        scoring the entire batch at once against the model weights.
+
+        Records are either strings (the product name) or dictionaries with
+        a name and optionally a description and keywords, e.g. rows read
+        from the CSV corpus. Returns a list of label distributions in the
+        same order and form as the classify method.
+        """
+        inst = self.instrument
+        if inst is not None: begin = start = inst.clock()
+
+        # Only featurize and score the records the name model isn't sure of
+        if self.cascade is not None:
+            records  = list(records)
+            results  = self.classify_names([
+                record if isinstance(record, basestring) else record['name']
+                for record in records
+            ])
+            escalate = [idx for idx, labels in enumerate(results) if labels is None]
+            if inst is not None: start = inst.lap('classify_many.cascade', start)
+
+            featuresets = [self.featurize(records[idx]) for idx in escalate]
+            if inst is not None: start = inst.lap('classify_many.featurize', start)
+
+            for idx, labels in zip(escalate, self.score_many(featuresets)):
+                results[idx] = labels
+
+        else:
+            featuresets = [self.featurize(record) for record in records]
+            if inst is not None: start = inst.lap('classify_many.featurize', start)
+
+            results = self.score_many(featuresets)
+
+        if inst is not None:
+            inst.lap('classify_many', begin)
+            inst.count('classify_many.records', len(results))
+        return results
+
+    def score_many(self, featuresets):
+        """
+        Scores a batch of featuresets with the model, only scoring the
+        distinct featuresets whose results aren't cached (if caching) or
+        reused from a near-duplicate (if deduplicating). Near-duplicates
+        within the batch are all scored, but are reused by later batches.
+        """
+        inst = self.instrument
+        if inst is not None: start = inst.clock()
+
+        if self.cache is None and self.dedupe is None:
+            probdists = self._model.prob_classify_many(featuresets)
+            if inst is not None: start = inst.lap('classify_many.score', start)
+
+            results = [self.distribution(probdist) for probdist in probdists]
+            if inst is not None: inst.lap('classify_many.distribution', start)
+            return results
+
+        # Only score the distinct featuresets whose results aren't cached
+        keys    = [self.cache_key(features) for features in featuresets]
+        bykey   = dict(zip(keys, featuresets))
+        if self.cache is not None:
+            cached  = dict((key, self.cache.get(key)) for key in set(keys))
+            if inst is not None: start = inst.lap('classify_many.cache', start)
+        else:
+            cached  = dict.fromkeys(keys)
+        missing = [key for key, labels in cached.items() if labels is None]
+
+        # Nor those whose near-duplicates were recently scored
+        if self.dedupe is not None and missing:
+            nearkeys = dict((key, self.dedupe.keys(bykey[key])) for key in missing)
+            for key in missing:
+                cached[key] = self.dedupe.get(bykey[key], nearkeys[key])
+                if cached[key] is not None and self.cache is not None:
+                    self.cache.put(key, cached[key])
+
+            missing = [key for key in missing if cached[key] is None]
+            if inst is not None: start = inst.lap('classify_many.dedupe', start)
+
+        if missing:
+            probdists = self._model.prob_classify_many([bykey[key] for key in missing])
+            if inst is not None: start = inst.lap('classify_many.score', start)
+
+            for key, probdist in zip(missing, probdists):
+                cached[key] = self.distribution(probdist)
+                if self.cache is not None:
+                    self.cache.put(key, cached[key])
+                if self.dedupe is not None:
+                    self.dedupe.put(bykey[key], cached[key], nearkeys[key])
+            if inst is not None: inst.lap('classify_many.distribution', start)
+
+        return [list(cached[key]) for key in keys]
+
+    def classify_names(self, names):
+        """
+        Scores the names of a batch of products with the name-only model of
+        the cascade, returning the label distribution of each name whose
+        top label is at least as probable as the threshold, or None for
+        those that must be escalated to the full model.
+        """
+        featuresets = [self.featurizer.featurize(name) for name in names]
+        probdists   = self._names.prob_classify_many(featuresets)
+        results     = [
+            self.distribution(probdist, self._names.labels)
+            if probdist.max() >= self.cascade else None
+            for probdist in probdists
+        ]
+
+        escalated = sum(1 for labels in results if labels is None)
+        self.cascaded.update({'records': len(results), 'escalated': escalated})
+        if self.instrument is not None:
+            self.instrument.count('cascade.escalated', escalated)
+        return results
+
+    def cascade_stats(self):
+        """
+        Returns the threshold of the cascade along with the number of
+        products it has classified and the number (and fraction) of them
+        that were escalated to the full model, or None without a cascade.
+        """
+        if self.cascade is None:
+            return None
+
+        records, escalated = self.cascaded['records'], self.cascaded['escalated']
+        return {
+            'threshold': self.cascade,
+            'records': records,
+            'escalated': escalated,
+            'rate': float(escalated) / records if records else None,
+        }
+
+    def dedupe_stats(self):
+        """
+        Returns the stats of the near-duplicate index (see NearDuplicateIndex),
+        including the reuse rate, or None if not deduplicating.
+        """
+        if self.dedupe is None:
+            return None
+        return self.dedupe.stats()
+
+    def classify_stream(self, records, chunksize=1000, skip_invalid=False):
+        """
+        Lazily classifies an iterable of records (e.g. from a file reader)
+        in bounded-size batches, yielding (record, labels) pairs in order
+        so that memory use is independent of the number of records.
+
+        A record without a product name raises a ValueError naming its
+        number in the input, or if skip_invalid is True is skipped and
+        counted in validated['skipped'] (see validate_records).
+        """
+        records = validate_records(records, skip_invalid, self.validated)
+        for chunk in chunked(records, chunksize):
+            for record, labels in zip(chunk, self.classify_many(chunk)):
+                yield record, labels
+
+    def featurize(self, record):
+        """
+        Featurizes a single record passed to classify_many.
+        """
+        if isinstance(record, basestring):
+            return self.featurizer.featurize(record)
+
+        if self.fields is not None:
+            return self.featurizer.featurize(**dict(
+                (field, record.get(field)) for field in self.fields
+            ))
+
+        return self.featurizer.featurize(
+            record['name'], record.get('description'), record.get('keywords')
+        )
+
+    def cache_key(self, features):
+        """
+        Returns the canonical form of a featureset used as the key of the
+        result cache: the same bag of features in any order has one key.
+        """
+        return frozenset(features.items())
+
+    def distribution(self, probdist, labels=None):
+        """
+        Converts an array of label probabilities from the compiled model
+        (or of the given labels) into a sorted list of (label, probability)
+        pairs above 0.01.
+        """
+        labels = [(label, prob)
+                  for label, prob in zip(labels or self._model.labels, probdist.tolist())
+                  if prob > 0.01]
         return sorted(labels, key=itemgetter(1), reverse=True)
 
     def explain(self, name, description=None, keywords=None):
         """
-        Wrapper for classifier.explain - prints out (no way to capture the
+        Wrapper for model.explain - prints out (no way to capture the
         string output, unfortunately) the features contributing to the
         chosen classifier.
         """
         features = self.featurizer.featurize(name, description, keywords)
-        self._classifier.explain(features)
+        self._model.explain(features)
 
     def labels(self):
         """
-        Wrapper for classifier.labels - returns a list of the labels.
+        Returns a list of the labels of the model.
         """
-        return self._classifier.labels()
+        return list(self._model.labels)
 
 if __name__ == '__main__':
     classifier = ApparelClassifier()
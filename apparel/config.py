@@ -10,44 +10,53 @@
 # ID: config.py [] benjamin@bengfort.com $
 
 """
-Uses confire to get meaningful configurations from a yaml file
+Uses confire to get meaningful configurations from a yaml file, which is
+only read (and confire imported) when a setting is first accessed.
 """
 
 ##########################################################################
-## Imports
+## Loader
 ##########################################################################
 
-import os
-import confire
+def load_configuration():
+    """
+    Loads the configuration, importing confire (and yaml with it) only when
+    a setting is first accessed rather than on every start of the utility.
+    """
+    from apparel.configuration import ApparelConfiguration
+    return ApparelConfiguration.load()
 
 ##########################################################################
-## Configuration
+## Lazy Settings
 ##########################################################################
 
-class ApparelConfiguration(confire.Configuration):
+class LazySettings(object):
     """
-    Meaningful defaults and required configurations.
-
-    debug:    the app will print or log debug statements
-    testing:  the app will not overwrite important resources
-    corpus:   the location of the corpus on disk
-    model:    the location of the pickled model on disk
+    Proxy for the configuration that only loads it (reading the YAML files
+    from every one of the configuration paths) the first time a setting is
+    accessed, so that importing the package stays cheap.
     """
 
-    CONF_PATHS = [
-        "/etc/apparel.yaml",                     # System configuration
-        os.path.expanduser("~/.apparel.yaml"),   # User specific config
-        os.path.abspath("conf/apparel.yaml"),    # Local configuration
-    ]
+    def __init__(self, loader):
+        self._loader   = loader
+        self._settings = None
+
+    def load(self):
+        if self._settings is None:
+            self._settings = self._loader()
+        return self._settings
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
 
-    debug    = True
-    testing  = True
-    corpus   = None
-    model    = None
+    def __str__(self):
+        return str(self.load())
 
+    def __repr__(self):
+        return repr(self.load())
 
-## Load settings immediately for import
-settings = ApparelConfiguration.load()
+## Settings are loaded on first access
+settings = LazySettings(load_configuration)
 
 if __name__ == '__main__':
     print settings
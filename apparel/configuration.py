@@ -0,0 +1,52 @@
+# apparel.configuration
+# Meaningful defaults and required configurations of the apparel package
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 22:14:05 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: configuration.py [] benjamin@bengfort.com $
+
+"""
+Meaningful defaults and required configurations of the apparel package,
+read with confire from the yaml files in the configuration paths. Use the
+lazily loaded apparel.config.settings rather than importing this module.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import confire
+
+##########################################################################
+## Configuration
+##########################################################################
+
+class ApparelConfiguration(confire.Configuration):
+    """
+    Meaningful defaults and required configurations.
+
+    debug:    the app will print or log debug statements
+    testing:  the app will not overwrite important resources
+    corpus:   the location of the corpus on disk
+    model:    the location of the pickled model on disk
+    cache:    a directory to cache extracted features in during builds
+    buckets:  the number of buckets to hash features into (None for exact)
+    """
+
+    CONF_PATHS = [
+        "/etc/apparel.yaml",                     # System configuration
+        os.path.expanduser("~/.apparel.yaml"),   # User specific config
+        os.path.abspath("conf/apparel.yaml"),    # Local configuration
+    ]
+
+    debug    = True
+    testing  = True
+    corpus   = None
+    model    = None
+    cache    = None
+    buckets  = None
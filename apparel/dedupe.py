@@ -0,0 +1,236 @@
+# apparel.dedupe
+# Reuses the results of recently classified near-duplicate products
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 02:41:15 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: dedupe.py [] benjamin@bengfort.com $
+
+"""
+Reuses the results of recently classified near-duplicate products.
+
+Product feeds are full of near-duplicates: the same product in a different
+color or size, or relisted with a slightly different description. The
+NearDuplicateIndex remembers the features and result of a bounded number of
+recently classified products, indexed by the MinHash signature of their
+features in the bands of a locality sensitive hash, so that a product whose
+features have a Jaccard similarity with those of a remembered product of at
+least the threshold can reuse its result rather than be scored again.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import threading
+import numpy as np
+
+from apparel.cache import LRUCache
+from apparel.features import hash_feature
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+PERMUTATIONS = 64             # Number of hash functions of a signature
+MAXSIZE      = 10000          # Default number of products remembered
+
+##########################################################################
+## MinHash
+##########################################################################
+
+class MinHash(object):
+    """
+    Computes MinHash signatures of sets of tokens: the minimum of each of
+    permutations random multiply-shift hash functions, the high 32 bits of
+    (a * x + b) mod 2**64 for an odd a, over the CRC32 checksums of the
+    tokens (which, unlike a modulus, NumPy computes without division). The
+    fraction of the values of the signatures of two sets that are equal
+    estimates the Jaccard similarity of the sets. The hash functions are
+    drawn with the seed so that signatures are the same in every process.
+    """
+
+    def __init__(self, permutations=PERMUTATIONS, seed=42):
+        rand = np.random.RandomState(seed)
+        self.permutations = permutations
+        self.a = (rand.randint(0, 1 << 62, size=permutations).astype(np.uint64) * 2 + 1)[:, np.newaxis]
+        self.b = rand.randint(0, 1 << 62, size=permutations).astype(np.uint64)[:, np.newaxis]
+
+    def signature(self, tokens):
+        """
+        Returns the signature (an array of permutations integers) of a
+        non-empty set of tokens.
+        """
+        x = np.fromiter(
+            (hash_feature(token, 1 << 32) for token in tokens), dtype=np.uint64, count=len(tokens)
+        )
+        return ((self.a * x + self.b) >> np.uint64(32)).min(axis=1)
+
+##########################################################################
+## Helper functions
+##########################################################################
+
+def bands(threshold, permutations=PERMUTATIONS):
+    """
+    Divides the permutations of a signature into (bands, rows) such that
+    the similarity at which two sets are likely to share a bucket in some
+    band, about (1 / bands) ** (1 / rows), is as close to the threshold as
+    possible without exceeding it. Fewer rows find more candidates.
+    """
+    best = (permutations, 1)
+    for rows in range(1, permutations + 1):
+        if permutations % rows == 0 and (1.0 / (permutations // rows)) ** (1.0 / rows) <= threshold:
+            best = (permutations // rows, rows)
+    return best
+
+def jaccard(a, b):
+    """
+    Returns the Jaccard similarity of two sets.
+    """
+    if not a and not b:
+        return 1.0
+    return float(len(a & b)) / len(a | b)
+
+##########################################################################
+## Near-Duplicate Index
+##########################################################################
+
+class NearDuplicateIndex(LRUCache):
+    """
+    A thread-safe LRU cache of the results of up to maxsize featuresets,
+    keyed by the set of their feature names, that is looked up by Jaccard
+    similarity rather than equality. Each entry is also stored in a bucket
+    of every band of the index by the corresponding rows of its MinHash
+    signature; entries that share a bucket with a featureset are the
+    candidates whose exact similarity is compared with the threshold, and
+    the most similar candidate (if any) is a hit.
+
+    Evicted entries are removed from their buckets, so the memory used is
+    bounded by maxsize. Featuresets without features are never indexed.
+    """
+
+    def __init__(self, threshold=0.9, maxsize=MAXSIZE, permutations=PERMUTATIONS, seed=42):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("Jaccard threshold must be in (0, 1], not %r" % threshold)
+
+        self.threshold    = threshold
+        self.seed         = seed
+        self.minhash      = MinHash(permutations, seed)
+        self.bands, self.rows = bands(threshold, permutations)
+        self.lock         = threading.RLock()
+        LRUCache.__init__(self, maxsize)
+
+    def keys(self, features):
+        """
+        Returns the bucket of the featureset (whose keys are its feature
+        names) in every band, or None if it has no features.
+        """
+        if not features:
+            return None
+
+        signature = self.minhash.signature(features).tostring()
+        width = len(signature) // self.bands
+        return [signature[idx:idx+width] for idx in range(0, len(signature), width)]
+
+    def get(self, features, keys=None, default=None):
+        """
+        Returns the result of the most similar remembered featureset whose
+        Jaccard similarity with the featureset is at least the threshold,
+        marking it as the most recently used, or the default (counted as a
+        miss). Pass the keys of the featureset if they were computed.
+        """
+        if keys is None:
+            keys = self.keys(features)
+
+        tokens = frozenset(features)
+        with self.lock:
+            if keys is None:
+                self.misses += 1
+                return default
+
+            if tokens in self.links:
+                self.exact += 1
+                return LRUCache.get(self, tokens)[1]
+
+            candidates = set()
+            for buckets, key in zip(self.buckets, keys):
+                candidates.update(buckets.get(key, ()))
+            self.candidates += len(candidates)
+
+            best, similarity = None, self.threshold
+            for candidate in candidates:
+                score = jaccard(tokens, candidate)
+                if score >= similarity:
+                    best, similarity = candidate, score
+
+            if best is None:
+                self.misses += 1
+                return default
+
+            return LRUCache.get(self, best)[1]
+
+    def put(self, features, value, keys=None):
+        """
+        Remembers the result of the featureset as the most recently used
+        entry, evicting the least recently used entry if the index is full.
+        """
+        if keys is None:
+            keys = self.keys(features)
+        if keys is None or self.maxsize <= 0:
+            return
+
+        tokens = frozenset(features)
+        with self.lock:
+            if tokens not in self.links:
+                for buckets, key in zip(self.buckets, keys):
+                    buckets.setdefault(key, set()).add(tokens)
+            LRUCache.put(self, tokens, (keys, value))
+
+    def evicted(self, tokens, value):
+        for buckets, key in zip(self.buckets, value[0]):
+            bucket = buckets[key]
+            bucket.discard(tokens)
+            if not bucket:
+                del buckets[key]
+
+    def clear(self):
+        with self.lock:
+            LRUCache.clear(self)
+            self.buckets    = [{} for _ in range(self.bands)]
+            self.exact      = 0
+            self.candidates = 0
+
+    def stats(self):
+        """
+        Returns the cache stats along with the threshold and bands of the
+        index, the number of hits that were exact duplicates, the mean
+        number of candidates compared per lookup and the reuse rate (the
+        fraction of lookups whose result was reused).
+        """
+        with self.lock:
+            stats   = LRUCache.stats(self)
+            lookups = self.hits + self.misses
+            stats.update({
+                'threshold': self.threshold,
+                'bands': self.bands,
+                'rows': self.rows,
+                'exact': self.exact,
+                'candidates': float(self.candidates) / lookups if lookups else None,
+                'reuse_rate': stats['hit_rate'],
+            })
+            return stats
+
+    def __getstate__(self):
+        # Only the configuration is sent to other processes, not the entries
+        return {
+            'threshold': self.threshold,
+            'maxsize': self.maxsize,
+            'permutations': self.minhash.permutations,
+            'seed': self.seed,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
@@ -17,11 +17,43 @@ Extracts the features from text for classification and building
 ## Imports
 ##########################################################################
 
+import zlib
 import string
 
-from nltk.corpus import stopwords
-from nltk import wordpunct_tokenize
-from nltk.stem.wordnet import WordNetLemmatizer
+from apparel.cache import LRUCache, MISSING
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+CACHE_SIZE = 100000  # Default number of tokens to memoize normalization of
+FIELDS     = ('name', 'description', 'keywords')  # Text fields of a product
+
+##########################################################################
+## Feature Hashing
+##########################################################################
+
+def hash_feature(fname, buckets):
+    """
+    Returns the bucket (in [0, buckets)) of a feature name by its CRC32
+    checksum, which unlike the builtin hash is stable across processes,
+    platforms and Python versions.
+    """
+    if isinstance(fname, unicode):
+        fname = fname.encode('utf-8')
+    return (zlib.crc32(fname) & 0xffffffff) % buckets
+
+##########################################################################
+## Lazy NLTK
+##########################################################################
+
+def wordpunct_tokenize(text):
+    """
+    NLTK's wordpunct_tokenize, imported on first use since importing NLTK
+    takes a significant part of a second.
+    """
+    from nltk.tokenize import wordpunct_tokenize as tokenize
+    return tokenize(text)
 
 ##########################################################################
 ## Featurize Class
@@ -36,15 +68,65 @@ class ProductFeatures(object):
     the feature space for better classification).
 
     The reason this is a class is because data needs to be stored to do
-    the work of featurization - e.g. loading stopwords and punctuation.
+    the work of featurization - e.g. loading stopwords and punctuation, and
+    a bounded cache of the normalized form of every token seen, whose hit,
+    miss and eviction counts can be read from featurizer.cache.stats().
+
+    If a number of buckets is given, features are hashed into that many
+    buckets (the hashing trick) so that the number of features, and so the
+    size of a model, is fixed no matter how large the vocabulary grows.
     """
 
-    def __init__(self, stoplist=None, punct=None, lemmatizer=None):
+    ## Template used to distinguish keyword features from name tokens
+    KEYWORD = "KEYWORD(%s)"
+
+    ## Template of the feature names of hashed features
+    BUCKET  = "BUCKET(%i)"
+
+    def __init__(self, stoplist=None, punct=None, lemmatizer=None,
+                 cache_size=CACHE_SIZE, lemmas=None, fallback=True,
+                 instrument=None, buckets=None):
         # Load stopwords, punctuation, and lemmatizer
         # This takes a bit of work, so we only want to do it once!
-        self.stopwords   = stoplist or stopwords.words('english')
+        if not stoplist:
+            from nltk.corpus import stopwords
+            stoplist = stopwords.words('english')
+
+        self.stopwords   = frozenset(stoplist)
         self.punctuation = punct or string.punctuation
-        self.lemmatizer  = lemmatizer or WordNetLemmatizer()
+        self._lemmatizer = lemmatizer
+
+        # A table of lowercase word to lemma (e.g. from the model artifact)
+        # that is consulted before the lemmatizer; if fallback is False,
+        # words that aren't in the table are not lemmatized at all.
+        self.lemmas      = lemmas
+        self.fallback    = fallback
+
+        # Product vocabularies are extremely repetitive, so memoize the
+        # normalization (and filtering) of every token in a bounded cache.
+        self.cache       = LRUCache(cache_size)
+
+        # Optionally record the time spent in each stage of featurization
+        # (see apparel.instrument); when None this costs next to nothing.
+        self.instrument  = instrument
+
+        # Number of buckets to hash features into (None for no hashing)
+        self.buckets     = buckets
+
+        # When recording, the lemma of every word normalized (see record)
+        self.lemmatized  = None
+
+        # Tokens are filtered if they're contained in the punctuation; for a
+        # string that means any substring of it, so precompute the set of
+        # all substrings to make the membership check a hash lookup.
+        if isinstance(self.punctuation, basestring):
+            self._punctuation = frozenset(
+                self.punctuation[i:j]
+                for i in xrange(len(self.punctuation) + 1)
+                for j in xrange(i, len(self.punctuation) + 1)
+            )
+        else:
+            self._punctuation = frozenset(self.punctuation)
 
     def tokenize(self, text):
         """
@@ -55,24 +137,82 @@ class ProductFeatures(object):
 
         For now, token = word as in bag of words (the feature we're using).
         """
-        for token in wordpunct_tokenize(text):
-            token = self.normalize(token)
-            if token in self.punctuation: continue
-            if token in self.stopwords: continue
-            yield token
+        for word in wordpunct_tokenize(text):
+            token = self.cache.get(word, MISSING)
+            if token is MISSING:
+                if self.instrument is not None: start = self.instrument.clock()
+                lemma = self.normalize(word)
+                token = self.filter(lemma)
+                if self.lemmatized is not None:
+                    self.lemmatized[word.lower()] = lemma
+                if self.instrument is not None: self.instrument.lap('featurize.lemmatize', start)
+                self.cache.put(word, token)
+
+            if token is not None:
+                yield token
+
+    def filter(self, token):
+        """
+        Returns None if the (normalized) token is punctuation or a stopword
+        and should be removed, otherwise returns the token.
+        """
+        if token in self._punctuation: return None
+        if token in self.stopwords: return None
+        return token
+
+    def warm(self, words):
+        """
+        Pre-warms the token cache by normalizing each of the given words,
+        e.g. from a list of the most frequent tokens in the corpus.
+        """
+        for word in words:
+            self.cache.put(word, self.filter(self.normalize(word)))
+
+    def record(self):
+        """
+        Starts recording the lemma of every word that the featurizer
+        normalizes, clearing the token cache so that no word is missed,
+        and returns the table of lowercase word to lemma that is filled in
+        as products are featurized, e.g. the lemma table of a corpus as it
+        is extracted. Set lemmatized to None to stop recording.
+        """
+        self.cache.clear()
+        self.lemmatized = {}
+        return self.lemmatized
+
+    @property
+    def lemmatizer(self):
+        """
+        The lemmatizer is created on demand, so that the WordNet corpus is
+        only loaded if a word has to be lemmatized that isn't in the table.
+        """
+        if self._lemmatizer is None:
+            from nltk.stem.wordnet import WordNetLemmatizer
+            self._lemmatizer = WordNetLemmatizer()
+        return self._lemmatizer
 
     def normalize(self, word):
         """
         Ensures words are in the same class (lemma) as well as lowercase
         """
         word = word.lower()
+        if self.lemmas is not None:
+            lemma = self.lemmas.get(word)
+            if lemma is not None: return lemma
+            if not self.fallback: return word
         return self.lemmatizer.lemmatize(word)
 
     def featurize(self, name, description=None, keywords=None):
         """
         Returns a dictionary of features to use with the Maximum Entropy
         classifier. In this case we're using a "bag of words" approach.
+
+        If instrumented, the tokenize stage includes the time taken to
+        lemmatize the tokens that were not in the cache, which is also
+        recorded separately as the lemmatize stage.
         """
+        inst = self.instrument
+        if inst is not None: begin = start = inst.clock()
 
         # Get the bag of words from the name
         tokens = set(self.tokenize(name))
@@ -83,16 +223,87 @@ class ProductFeatures(object):
 
         # Get the bag of keywords
         keywords = set(self.tokenize(keywords)) if keywords else set([])
+        if inst is not None: start = inst.lap('featurize.tokenize', start)
 
         # Create the features
         features = {}
         for token in tokens:
             features[token] = True
         for keyword in keywords:
-            features["KEYWORD(%s)" % keyword] = True
+            features[self.KEYWORD % keyword] = True
+
+        # Hash the features (token or keyword) into the buckets
+        if self.buckets:
+            features = dict((self.hash(fname), True) for fname in features)
 
+        if inst is not None:
+            inst.lap('featurize.features', start)
+            inst.lap('featurize', begin)
         return features
 
+    def hash(self, fname):
+        """
+        Returns the name of the hashed feature that a feature falls into.
+        """
+        return self.BUCKET % hash_feature(fname, self.buckets)
+
+    def config(self):
+        """
+        Returns a description of the configuration of the featurizer, e.g.
+        to determine if features extracted by another featurizer can be
+        reused by this one.
+        """
+        lemmatizer = type(self.lemmatizer)
+        return {
+            'stopwords': sorted(self.stopwords),
+            'punctuation': self.punctuation,
+            'lemmatizer': "%s.%s" % (lemmatizer.__module__, lemmatizer.__name__),
+            'keyword': self.KEYWORD,
+            'buckets': self.buckets,
+        }
+
+##########################################################################
+## Field Features
+##########################################################################
+
+class FieldFeatures(object):
+    """
+    Wraps a featurizer to extract the features of each field of a product
+    separately, returning a tuple of the features of its name, description
+    and keywords (in the order of FIELDS) whose union is the featurization
+    of the whole product. This is used to extract the features of a corpus
+    once for every combination of the fields (e.g. by a sweep).
+    """
+
+    def __init__(self, featurizer):
+        self.featurizer = featurizer
+
+    @property
+    def lemmatized(self):
+        return self.featurizer.lemmatized
+
+    @lemmatized.setter
+    def lemmatized(self, value):
+        self.featurizer.lemmatized = value
+
+    def config(self):
+        """
+        Returns the configuration of the wrapped featurizer along with the
+        fields its features are split by, so that cached features of each
+        field are never mistaken for those of whole products.
+        """
+        config = self.featurizer.config()
+        config['split'] = list(FIELDS)
+        return config
+
+    def featurize(self, name, description=None, keywords=None):
+        featurize = self.featurizer.featurize
+        return (
+            featurize(name),
+            featurize(description) if description else {},
+            featurize(u"", keywords=keywords) if keywords else {},
+        )
+
 ##########################################################################
 ## Development testing
 ##########################################################################
@@ -0,0 +1,207 @@
+# apparel.instrument
+# Opt-in timers, counters and histograms for the stages of classification
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 21:34:06 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: instrument.py [] benjamin@bengfort.com $
+
+"""
+Opt-in timers, counters and histograms for the stages of classification.
+
+The featurizer and classifier have an instrument attribute that is None by
+default, in which case each stage only costs an attribute check. When an
+Instrument is attached, the time spent in every stage is recorded in a
+histogram and passed to any exporters, callables of the form:
+
+    exporter(kind, name, value)
+
+where kind is "timer" (value in seconds) or "counter" (value an increment),
+so that measurements can be fed to an external metrics system.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import bisect
+import threading
+
+from timeit import default_timer
+from collections import defaultdict, Counter
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+## Upper bounds (seconds) of the histogram buckets: 1 microsecond to ~8 seconds
+BUCKETS = tuple(1e-6 * 2 ** idx for idx in range(24))
+
+## Stages timed by the featurizer and classifier (with their instruments)
+STAGES = (
+    'featurize',                    # Extracting the features of a product
+    'featurize.tokenize',           # Splitting, normalizing and filtering tokens
+    'featurize.lemmatize',          # Normalizing tokens not in the token cache
+    'featurize.features',           # Constructing the feature dictionary
+    'classify',                     # Classifying a single product
+    'classify.cascade',             # Scoring the name with the name-only model
+    'classify.featurize',           # Featurizing the product
+    'classify.cache',               # Looking up the result cache (if any)
+    'classify.dedupe',              # Looking up near-duplicates (if any)
+    'classify.score',               # Scoring the features with the model
+    'classify.distribution',        # Sorting and filtering the distribution
+    'classify_many',                # Classifying a batch of products
+    'classify_many.cascade',        # ... and the same stages for the batch
+    'classify_many.featurize',
+    'classify_many.cache',
+    'classify_many.dedupe',
+    'classify_many.score',
+    'classify_many.distribution',
+)
+
+##########################################################################
+## Histogram
+##########################################################################
+
+class Histogram(object):
+    """
+    Aggregates observations into fixed, exponentially sized buckets so
+    that percentiles can be estimated in constant memory.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts  = [0] * (len(buckets) + 1)
+        self.count   = 0
+        self.total   = 0.0
+        self.min     = None
+        self.max     = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min: self.min = value
+        if self.max is None or value > self.max: self.max = value
+
+    def percentile(self, q):
+        """
+        Estimates the qth percentile as the upper bound of the bucket it
+        falls in (or the maximum, for the overflow bucket).
+        """
+        if not self.count:
+            return None
+
+        rank = q / 100.0 * self.count
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                if idx == len(self.buckets):
+                    return self.max
+                return min(self.buckets[idx], self.max)
+        return self.max
+
+    def report(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+        }
+
+##########################################################################
+## Instrument
+##########################################################################
+
+class Instrument(object):
+    """
+    Thread-safe collection of timers (recorded as histograms) and counters
+    that is attached to a featurizer or classifier to measure its stages.
+    Stages are timed with clock and lap, which keeps the instrumented code
+    free of context managers and closures:
+
+        start = instrument.clock()
+        ...
+        start = instrument.lap('stage', start)
+
+    Every measurement is also passed to the exporters, if any.
+    """
+
+    clock = staticmethod(default_timer)
+
+    def __init__(self, exporters=None, buckets=BUCKETS):
+        self.exporters = list(exporters or [])
+        self.buckets   = buckets
+        self.lock      = threading.Lock()
+        self.reset()
+
+    def lap(self, name, start):
+        """
+        Records the time since start for the named stage, returning the
+        current time so that the next stage can be timed from it.
+        """
+        now = self.clock()
+        self.observe(name, now - start)
+        return now
+
+    def observe(self, name, seconds):
+        """
+        Records a duration (in seconds) for the named timer.
+        """
+        with self.lock:
+            self.timers[name].observe(seconds)
+
+        for exporter in self.exporters:
+            exporter('timer', name, seconds)
+
+    def count(self, name, value=1):
+        """
+        Increments the named counter.
+        """
+        with self.lock:
+            self.counters[name] += value
+
+        for exporter in self.exporters:
+            exporter('counter', name, value)
+
+    def add_exporter(self, exporter):
+        """
+        Adds a callable that receives every measurement as it's made.
+        """
+        self.exporters.append(exporter)
+
+    def reset(self):
+        """
+        Discards every measurement made so far.
+        """
+        with self.lock:
+            self.timers   = defaultdict(lambda: Histogram(self.buckets))
+            self.counters = Counter()
+
+    def report(self):
+        """
+        Returns the histogram summary (in seconds) of every timer and the
+        value of every counter, suitable for serializing as JSON.
+        """
+        with self.lock:
+            return {
+                'timers': dict(
+                    (name, timer.report()) for name, timer in self.timers.items()
+                ),
+                'counters': dict(self.counters),
+            }
+
+    def __getstate__(self):
+        # Measurements (and the lock) are not sent to other processes
+        return {'exporters': self.exporters, 'buckets': self.buckets}
+
+    def __setstate__(self, state):
+        self.__init__(state['exporters'], state['buckets'])
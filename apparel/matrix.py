@@ -0,0 +1,312 @@
+# apparel.matrix
+# A compact, integer indexed representation of a featurized corpus
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 23:05:39 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: matrix.py [] benjamin@bengfort.com $
+
+"""
+A compact, integer indexed representation of a featurized corpus
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import numpy as np
+
+from array import array
+
+##########################################################################
+## Feature Matrix
+##########################################################################
+
+class FeatureMatrix(object):
+    """
+    Stores a featureset, a list of (features, label) pairs of boolean
+    features, as a vocabulary of feature names, the list of labels, and a
+    sparse binary CSR matrix (indptr, indices) of the feature indices of
+    every row along with an array of the label index of every row. This
+    costs a few bytes per feature rather than a dictionary entry and a
+    string per feature of every row.
+
+    A matrix can be a view of some of the rows of another (e.g. the train
+    and test split of a cross validation fold), which shares its arrays;
+    the indices of a contiguous view are not copied either. Iterating
+    over a matrix (or indexing it) yields (features, label) pairs as
+    dictionaries so that it can be passed to NLTK trainers and accuracy.
+    """
+
+    def __init__(self, vocabulary, labels, indptr, indices, targets, rows=None):
+        self.vocabulary = vocabulary    # Map of feature name to index
+        self.labels     = list(labels)  # Labels in target index order
+        self.indptr     = indptr        # Row offsets into the indices
+        self.indices    = indices       # Feature indices of every row
+        self.targets    = targets       # Label index of every row
+        self.rows       = rows          # Rows of the view (None for all)
+        self._names     = None
+
+    @classmethod
+    def from_featureset(cls, featureset, vocabulary=None, labels=None):
+        """
+        Encodes an iterable of (features, label) pairs (which is consumed
+        lazily, so need not be in memory) into a matrix. Labels are sorted
+        unless given; if a vocabulary or labels are given (e.g. those of a
+        model being updated) they are extended, as copies, so that they
+        keep their indices.
+        """
+        pairs = (((features,), label) for features, label in featureset)
+        return cls.from_fields(pairs, 1, vocabulary, labels)[0]
+
+    @classmethod
+    def from_fields(cls, pairs, count, vocabulary=None, labels=None):
+        """
+        Encodes an iterable of (fields, label) pairs, where fields is a
+        tuple of the features of each of count fields of a row (e.g. its
+        name, description and keywords), into a matrix per field. The
+        matrices share the vocabulary and labels, so that fields can be
+        combined with union.
+        """
+        vocabulary = dict(vocabulary or {})
+        columns    = dict((label, idx) for idx, label in enumerate(labels or []))
+        buffers    = [(array('l', [0]), array('l')) for _ in range(count)]
+        targets    = array('l')
+
+        for fields, label in pairs:
+            for features, (indptr, indices) in zip(fields, buffers):
+                for fname, fval in features.items():
+                    if fval is not True:
+                        raise ValueError(
+                            "Can only encode boolean features, '%s' has value %r" % (fname, fval)
+                        )
+                    indices.append(vocabulary.setdefault(fname, len(vocabulary)))
+                indptr.append(len(indices))
+            targets.append(columns.setdefault(label, len(columns)))
+
+        targets  = intp(targets)
+        matrices = [
+            cls(vocabulary, sorted(columns, key=columns.get), intp(indptr), intp(indices), targets)
+            for indptr, indices in buffers
+        ]
+
+        if labels is None:
+            matrices = [matrix.relabel(sorted(columns)) for matrix in matrices]
+        return matrices
+
+    @classmethod
+    def union(cls, matrices):
+        """
+        Combines matrices of the same rows that share a vocabulary (e.g. of
+        the fields of the rows) into a matrix of the union of the features
+        of each row.
+        """
+        if len(matrices) == 1:
+            return matrices[0]
+
+        vocabulary, labels = matrices[0].vocabulary, matrices[0].labels
+        nfeatures = max(len(vocabulary), 1)
+
+        # Key every (row, feature) pair so that np.unique sorts and dedupes
+        keys = []
+        for matrix in matrices:
+            indptr, indices, targets = matrix.csr()
+            rows = np.repeat(np.arange(len(targets)), np.diff(indptr))
+            keys.append(rows * nfeatures + indices)
+
+        keys   = np.unique(np.concatenate(keys))
+        counts = np.bincount(keys // nfeatures, minlength=len(targets))
+        indptr = np.zeros(len(targets) + 1, dtype=np.intp)
+        np.cumsum(counts, out=indptr[1:])
+
+        return cls(vocabulary, labels, indptr, keys % nfeatures, targets)
+
+    def relabel(self, labels):
+        """
+        Returns a copy of the matrix whose labels are in the given order.
+        """
+        columns = dict((label, idx) for idx, label in enumerate(labels))
+        mapping = np.array([columns[label] for label in self.labels], dtype=np.intp)
+        return FeatureMatrix(
+            self.vocabulary, labels, self.indptr, self.indices,
+            mapping[self.targets], self.rows,
+        )
+
+    def extend(self, vocabulary, labels):
+        """
+        Re-encodes the rows with the given vocabulary and labels (e.g. those
+        of a model being updated) extended by the features and labels of
+        this matrix that they don't have, keeping their indices.
+        """
+        vocabulary = dict(vocabulary)
+        labels     = list(labels) + sorted(set(self.labels).difference(labels))
+        columns    = dict((label, idx) for idx, label in enumerate(labels))
+
+        features = np.array(
+            [vocabulary.setdefault(name, len(vocabulary)) for name in self.names],
+            dtype=np.intp
+        )
+        targets  = np.array([columns[label] for label in self.labels], dtype=np.intp)
+
+        indptr, indices, previous = self.csr()
+        return FeatureMatrix(vocabulary, labels, indptr, features[indices], targets[previous])
+
+    def view(self, rows):
+        """
+        Returns a view of the given rows (an array of row numbers) of the
+        matrix, which shares the arrays of the matrix.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        if self.rows is not None:
+            rows = self.rows[rows]
+        return FeatureMatrix(
+            self.vocabulary, self.labels, self.indptr, self.indices, self.targets, rows
+        )
+
+    def split(self, rows):
+        """
+        Splits the matrix into a view of every row not in the given rows
+        (e.g. the training set of a fold) and a view of the given rows.
+        """
+        holdout = np.zeros(len(self), dtype=bool)
+        holdout[np.asarray(rows, dtype=np.intp)] = True
+        return self.view(np.flatnonzero(~holdout)), self.view(np.flatnonzero(holdout))
+
+    def counts(self):
+        """
+        Returns the (features x labels) document frequencies of the rows of
+        the matrix: the number of rows of each label that have a feature.
+        """
+        indptr, indices, targets = self.csr()
+        shape = (len(self.vocabulary), len(self.labels))
+        rows  = np.repeat(targets, np.diff(indptr))
+        return np.bincount(
+            indices * shape[1] + rows, minlength=shape[0] * shape[1]
+        ).reshape(shape)
+
+    def select(self, min_df=1, top_n=None):
+        """
+        Returns a boolean mask of the features that are in at least min_df
+        rows and, if top_n is given, that are one of the top_n features of
+        at least one label by the number of rows of the label they are in
+        (ties are broken by the order of the vocabulary).
+        """
+        counts = self.counts()
+        keep   = counts.sum(axis=1) >= min_df
+
+        if top_n:
+            counts   = np.where(keep[:, np.newaxis], counts, 0)
+            selected = np.zeros(len(keep), dtype=bool)
+            for col in range(counts.shape[1]):
+                top = np.argsort(-counts[:, col], kind='mergesort')[:top_n]
+                selected[top[counts[top, col] > 0]] = True
+            keep &= selected
+
+        return keep
+
+    def prune(self, keep):
+        """
+        Returns a copy of the rows of the matrix with only the features in
+        the boolean mask keep, renumbered in the same order.
+        """
+        keep    = np.asarray(keep, dtype=bool)
+        mapping = np.cumsum(keep) - 1
+
+        indptr, indices, targets = self.csr()
+        present = keep[indices]
+        rows    = np.repeat(np.arange(len(targets)), np.diff(indptr))
+        counts  = np.bincount(rows[present], minlength=len(targets))
+
+        pruned  = np.zeros(len(targets) + 1, dtype=np.intp)
+        np.cumsum(counts, out=pruned[1:])
+
+        vocabulary = dict(
+            (fname, int(mapping[idx])) for fname, idx in self.vocabulary.items() if keep[idx]
+        )
+        return FeatureMatrix(
+            vocabulary, self.labels, pruned, mapping[indices[present]], targets
+        )
+
+    def csr(self):
+        """
+        Returns the (indptr, indices, targets) arrays of the rows of the
+        matrix. For the whole matrix these are its arrays; for a view the
+        feature indices of its rows are gathered into new arrays unless the
+        rows are contiguous, in which case the indices are a slice.
+        """
+        if self.rows is None:
+            return self.indptr, self.indices, self.targets
+
+        rows    = self.rows
+        starts  = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        indptr  = np.zeros(len(rows) + 1, dtype=np.intp)
+        np.cumsum(lengths, out=indptr[1:])
+
+        if len(rows) and np.all(np.diff(rows) == 1):
+            indices = self.indices[starts[0]:starts[0] + indptr[-1]]
+        else:
+            offsets = np.repeat(starts - indptr[:-1], lengths)
+            indices = self.indices[offsets + np.arange(indptr[-1])]
+
+        return indptr, indices, self.targets[rows]
+
+    @property
+    def names(self):
+        """
+        The feature names in index order.
+        """
+        if self._names is None or len(self._names) != len(self.vocabulary):
+            self._names = sorted(self.vocabulary, key=self.vocabulary.get)
+        return self._names
+
+    @property
+    def nbytes(self):
+        """
+        The number of bytes of the index arrays of the whole matrix.
+        """
+        return self.indptr.nbytes + self.indices.nbytes + self.targets.nbytes
+
+    def __len__(self):
+        if self.rows is None:
+            return len(self.targets)
+        return len(self.rows)
+
+    def __getitem__(self, idx):
+        row = idx if self.rows is None else self.rows[idx]
+        features = self.indices[self.indptr[row]:self.indptr[row+1]]
+        return (
+            dict((self.names[fid], True) for fid in features),
+            self.labels[self.targets[row]],
+        )
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def __getstate__(self):
+        # The feature names are recomputed from the vocabulary
+        state = self.__dict__.copy()
+        state['_names'] = None
+        return state
+
+    def __repr__(self):
+        return "<FeatureMatrix: %d rows, %d features, %d labels>" % (
+            len(self), len(self.vocabulary), len(self.labels)
+        )
+
+##########################################################################
+## Helper functions
+##########################################################################
+
+def intp(values):
+    """
+    Converts an array.array of integers into a NumPy index array without
+    copying it (unless the platform's C long isn't the size of a pointer).
+    """
+    if not len(values):
+        return np.zeros(0, dtype=np.intp)
+    return np.frombuffer(values, dtype=values.typecode).astype(np.intp, copy=False)
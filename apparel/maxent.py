@@ -0,0 +1,351 @@
+# apparel.maxent
+# Trains maximum entropy models natively with NumPy (without megam)
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 22:10:51 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: maxent.py [] benjamin@bengfort.com $
+
+"""
+Trains maximum entropy models natively with NumPy (without megam).
+
+The model is the same as the one NLTK trains with megam: a weight for every
+(feature, label) pair that occurs in the training data plus an always on
+weight for every label, fit by maximizing the conditional log likelihood
+with a Gaussian prior, i.e. minimizing
+
+    -sum(log P(label | features)) + ||w||^2 / (2 * sigma^2)
+
+with L-BFGS. The featureset is encoded as a sparse (CSR) FeatureMatrix and
+the likelihood and its gradient are computed with vectorized gathers
+and bincounts, sharded across processes when there are multiple workers.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import time
+import numpy as np
+import multiprocessing as mp
+
+from collections import deque
+from apparel.matrix import FeatureMatrix
+from apparel.model import CompiledModel, sparse_dot
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+LOG2E = np.log2(np.e)   # Converts natural log weights to base-2 weights
+
+##########################################################################
+## Joint features
+##########################################################################
+
+def joint_features(indptr, indices, targets, shape):
+    """
+    Returns the sorted flat indices into the (features x labels) weights of
+    every (feature, label) pair that occurs in the design matrix; these are
+    the only joint features that are given a weight (as in NLTK).
+    """
+    rows = np.repeat(targets, np.diff(indptr))
+    return np.unique(indices * shape[1] + rows)
+
+##########################################################################
+## Objective
+##########################################################################
+
+def objective(shard, joint, shape, theta):
+    """
+    Computes the negative log likelihood of a shard (indptr, indices,
+    targets) of the design matrix, and its gradient, for the parameters
+    theta: the natural log weights of the joint features then the bias.
+    """
+    indptr, indices, targets = shard
+    nfeatures, nlabels = shape
+
+    weights = np.zeros(nfeatures * nlabels)
+    weights[joint] = theta[:len(joint)]
+    weights = weights.reshape(shape)
+
+    # Log-sum-exp normalized scores of every row
+    scores  = sparse_dot(indptr, indices, weights) + theta[len(joint):]
+    scores -= scores.max(axis=1)[:, np.newaxis]
+    logz    = np.log(np.exp(scores).sum(axis=1))
+
+    rows    = np.arange(len(targets))
+    loss    = -(scores[rows, targets] - logz).sum()
+
+    # The gradient is the expected less the observed feature counts
+    delta   = np.exp(scores - logz[:, np.newaxis])
+    delta[rows, targets] -= 1.0
+
+    lengths  = np.diff(indptr)
+    gradient = np.empty(shape)
+    for col in range(nlabels):
+        gradient[:, col] = np.bincount(
+            indices, weights=np.repeat(delta[:, col], lengths), minlength=nfeatures
+        )
+
+    return loss, np.concatenate([gradient.ravel()[joint], delta.sum(axis=0)])
+
+## The shards of the design matrix held by each worker process
+_problem = None
+
+def _init_objective(shards, joint, shape):
+    """
+    Pool initializer: installs the design matrix once per worker.
+    """
+    global _problem
+    _problem = (shards, joint, shape)
+
+def _shard_objective(args):
+    """
+    Computes the objective on one shard with the worker's design matrix.
+    """
+    idx, theta = args
+    shards, joint, shape = _problem
+    return objective(shards[idx], joint, shape, theta)
+
+def shard(indptr, indices, targets, count):
+    """
+    Splits the design matrix into count shards of contiguous rows.
+    """
+    bounds = np.linspace(0, len(targets), count + 1).astype(np.intp)
+    return [
+        (
+            indptr[start:stop+1] - indptr[start],
+            indices[indptr[start]:indptr[stop]],
+            targets[start:stop],
+        )
+        for start, stop in zip(bounds[:-1], bounds[1:])
+    ]
+
+##########################################################################
+## L-BFGS
+##########################################################################
+
+def lbfgs(func, x0, max_iter=100, tol=1e-5, memory=10, callback=None):
+    """
+    Minimizes func (which returns the value and gradient at a point) from
+    x0 with limited memory BFGS and a backtracking (Armijo) line search.
+    Stops after max_iter iterations or when the relative decrease of the
+    value is below tol. The callback, if given, is called after each
+    iteration with the iteration, value, gradient, step and evaluations.
+    Returns the minimizing point, its value and the number of iterations.
+    """
+    x = np.asarray(x0, dtype=float)
+    value, grad = func(x)
+    history = deque(maxlen=memory)
+
+    for iteration in range(1, max_iter + 1):
+
+        # Two loop recursion to compute the quasi-Newton direction
+        direction = -grad
+        alphas = []
+        for s, y, rho in reversed(history):
+            alpha = rho * s.dot(direction)
+            direction -= alpha * y
+            alphas.append(alpha)
+
+        if history:
+            s, y, _ = history[-1]
+            direction *= s.dot(y) / y.dot(y)
+        else:
+            direction /= max(1.0, np.sqrt(grad.dot(grad)))
+
+        for (s, y, rho), alpha in zip(history, reversed(alphas)):
+            beta = rho * y.dot(direction)
+            direction += (alpha - beta) * s
+
+        # Reset to steepest descent if the direction isn't downhill
+        slope = grad.dot(direction)
+        if slope >= 0:
+            history.clear()
+            direction = -grad / max(1.0, np.sqrt(grad.dot(grad)))
+            slope = grad.dot(direction)
+
+        # Backtracking line search for sufficient decrease
+        step, evaluations = 1.0, 0
+        while True:
+            candidate = x + step * direction
+            new_value, new_grad = func(candidate)
+            evaluations += 1
+            if new_value <= value + 1e-4 * step * slope or evaluations >= 20:
+                break
+            step *= 0.5
+
+        s, y = candidate - x, new_grad - grad
+        if s.dot(y) > 1e-10:
+            history.append((s, y, 1.0 / s.dot(y)))
+
+        decrease = (value - new_value) / max(abs(value), abs(new_value), 1.0)
+        x, value, grad = candidate, new_value, new_grad
+
+        if callback is not None:
+            callback(iteration, value, grad, step, evaluations)
+
+        if decrease < tol:
+            break
+
+    return x, value, iteration
+
+##########################################################################
+## Trainer
+##########################################################################
+
+class MaxentTrainer(object):
+    """
+    Trains a maximum entropy model with a Gaussian prior of the given sigma
+    on a list of (features, label) pairs, returning a CompiledModel with
+    base-2 weights like those NLTK produces, which can be converted into
+    an NLTK MaxentClassifier with its to_classifier method.
+
+    With more than one worker the design matrix is split into shards of
+    rows and the objective is computed on the shards in a process pool
+    (unless the trainer itself runs in a daemonic worker, e.g. to cross
+    validate a fold, which cannot start processes).
+
+    If a parent model is passed to train, the model is updated rather than
+    trained from scratch: training starts from the parent weights and the
+    prior is centered on them, so that the parent (which summarizes the
+    data it was trained on) is adjusted to fit the new featureset by as
+    much as sigma allows. Features and labels the parent did not have
+    are added, with a prior centered on zero.
+
+    The history of the last training holds, for every iteration, the
+    objective (the loss including the prior), the gradient norm, the step
+    size, the number of function evaluations and the elapsed seconds.
+    """
+
+    def __init__(self, sigma=1.0, max_iter=100, tol=1e-5, memory=10, workers=1, trace=0):
+        self.sigma    = sigma
+        self.max_iter = max_iter
+        self.tol      = tol
+        self.memory   = memory
+        self.workers  = workers
+        self.trace    = trace
+        self.history  = []
+        self.mean     = None
+
+    def train(self, featureset, parent=None):
+        """
+        Trains on the featureset, a FeatureMatrix or a list of (features,
+        label) pairs, returning the CompiledModel.
+        """
+        if not isinstance(featureset, FeatureMatrix):
+            featureset = FeatureMatrix.from_featureset(featureset)
+
+        if parent is not None:
+            featureset = featureset.extend(parent.vocabulary, parent.labels)
+
+        vocabulary, labels = featureset.vocabulary, featureset.labels
+        indptr, indices, targets = featureset.csr()
+
+        shape = (len(vocabulary), len(labels))
+        joint = joint_features(indptr, indices, targets, shape)
+
+        # Start from (and center the prior on) the weights of the parent
+        if parent is None:
+            self.mean = None
+        else:
+            rows, cols = np.nonzero(parent.weights)
+            inherited  = rows * shape[1] + cols
+            joint      = np.union1d(joint, inherited)
+
+            weights = np.zeros(shape[0] * shape[1])
+            weights[inherited] = parent.weights[rows, cols] / LOG2E
+            bias = np.zeros(shape[1])
+            bias[:len(parent.labels)] = np.asarray(parent.bias) / LOG2E
+            self.mean = np.concatenate([weights[joint], bias])
+
+        theta = np.zeros(len(joint) + len(labels)) if self.mean is None else self.mean.copy()
+
+        workers = self.workers
+        if workers > 1 and mp.current_process().daemon:
+            workers = 1
+
+        pool = None
+        if workers > 1:
+            shards = shard(indptr, indices, targets, workers)
+            pool   = mp.Pool(
+                workers, initializer=_init_objective, initargs=(shards, joint, shape)
+            )
+
+            def func(theta):
+                results = pool.map(_shard_objective, [(idx, theta) for idx in range(workers)])
+                return self.penalize(
+                    sum(loss for loss, _ in results), sum(grad for _, grad in results), theta
+                )
+        else:
+            shards = [(indptr, indices, targets)]
+
+            def func(theta):
+                loss, grad = objective(shards[0], joint, shape, theta)
+                return self.penalize(loss, grad, theta)
+
+        self.history = []
+        self.started = time.time()
+
+        if self.trace:
+            print("  %9s %16s %12s %8s %9s" % ("Iteration", "Loss", "|Gradient|", "Step", "Seconds"))
+
+        try:
+            theta, _, _ = lbfgs(
+                func, theta, self.max_iter, self.tol, self.memory, self.record
+            )
+        except:
+            if pool is not None: pool.terminate()
+            raise
+        else:
+            if pool is not None: pool.close()
+        finally:
+            if pool is not None: pool.join()
+
+        # Convert the natural log weights into base-2 weights
+        weights = np.zeros(shape[0] * shape[1])
+        weights[joint] = theta[:len(joint)] * LOG2E
+        bias = theta[len(joint):] * LOG2E
+        return CompiledModel(vocabulary, labels, weights.reshape(shape), bias)
+
+    def penalize(self, loss, grad, theta):
+        """
+        Adds the Gaussian prior to the negative log likelihood and gradient.
+        """
+        if not self.sigma:
+            return loss, grad
+
+        precision = 1.0 / self.sigma ** 2
+        offset    = theta if self.mean is None else theta - self.mean
+        return loss + 0.5 * precision * offset.dot(offset), grad + precision * offset
+
+    def record(self, iteration, loss, grad, step, evaluations):
+        """
+        Records (and if tracing, prints) the progress of an iteration.
+        """
+        elapsed = time.time() - self.started
+        self.history.append({
+            'iteration': iteration,
+            'loss': float(loss),
+            'gradient': float(np.sqrt(grad.dot(grad))),
+            'step': step,
+            'evaluations': evaluations,
+            'seconds': elapsed,
+        })
+
+        if self.trace:
+            print("  %9i %16.6f %12.6f %8.4f %9.3f" % (
+                iteration, loss, self.history[-1]['gradient'], step, elapsed
+            ))
+
+def train_numpy(featureset, sigma=1.0, workers=1, trace=0, parent=None, **kwargs):
+    """
+    Trains a maximum entropy model on the featureset with the MaxentTrainer,
+    updating the parent model if one is given.
+    """
+    trainer = MaxentTrainer(sigma, workers=workers, trace=trace, **kwargs)
+    return trainer.train(featureset, parent)
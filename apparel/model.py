@@ -0,0 +1,571 @@
+# apparel.model
+# Compiled representation of a trained Maximum Entropy model
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 14:52:10 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: model.py [] benjamin@bengfort.com $
+
+"""
+Compiled representation of a trained Maximum Entropy model
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import json
+import pickle
+import numpy as np
+
+from collections import defaultdict, Mapping
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+ARTIFACT_VERSION = 2                # Version of the compact artifact format
+MANIFEST         = "manifest.json"  # Labels and metadata of the model
+VOCABULARY       = "vocabulary.npy" # Sorted feature names
+ROWS             = "rows.npy"       # Weight row of each sorted feature name
+WEIGHTS          = "weights.npy"    # Base-2 weights (features x labels)
+BIAS             = "bias.npy"       # Base-2 always on weights per label
+WORDS            = "words.npy"      # Optional sorted words of the lemma table
+LEMMAS           = "lemmas.npy"     # Lemma of each sorted word
+CASCADE          = "-names"         # Suffix of the name-only model artifact
+
+## Files of the vocabulary and lemma table of version 1 artifacts
+VOCABULARY_JSON  = "vocabulary.json" # Feature names in weight row order
+LEMMAS_JSON      = "lemmas.json"    # Table of word to lemma
+
+##########################################################################
+## Helper functions
+##########################################################################
+
+def artifact_path(path):
+    """
+    Returns the path of the compact artifact that accompanies a pickled
+    model, e.g. model-2015-05-02.pickle is stored as model-2015-05-02/
+    """
+    base, ext = os.path.splitext(path)
+    return base if ext == '.pickle' else path
+
+def cascade_path(path):
+    """
+    Returns the path of the compact artifact of the name-only model that
+    is built alongside a model for cascade classification, e.g. the names
+    model of model-2015-05-02.pickle is stored as model-2015-05-02-names/
+    """
+    return artifact_path(path).rstrip(os.sep) + CASCADE
+
+def load_model(path, mmap=False):
+    """
+    Loads a CompiledModel from the given path, which is either a compact
+    artifact directory or a pickled MaxentClassifier. For a pickle, the
+    compact artifact alongside it is loaded instead if one exists. If mmap
+    is True the weights of the artifact are memory mapped (read only),
+    which requires the compact artifact.
+    """
+    artifact = artifact_path(path)
+    if os.path.isdir(artifact):
+        return CompiledModel.load(artifact, mmap=mmap)
+
+    if mmap:
+        raise ValueError(
+            "Memory mapping requires a compact artifact, convert '%s' first" % path
+        )
+    return CompiledModel.from_pickle(path)
+
+def load_pickle(path):
+    """
+    Loads a CompiledModel from a pickled MaxentClassifier, even if a compact
+    artifact exists alongside it (e.g. to compare the two formats).
+    """
+    return CompiledModel.from_pickle(path)
+
+def table(mapping):
+    """
+    Returns the mapping as a SortedTable (e.g. to save it as .npy files).
+    """
+    return mapping if isinstance(mapping, SortedTable) else SortedTable.from_dict(mapping)
+
+def encode(value):
+    """
+    Encodes unicode strings as UTF-8 (the keys and values of sorted tables).
+    """
+    return value.encode('utf-8') if isinstance(value, unicode) else value
+
+def decode(strings):
+    """
+    Decodes an array of UTF-8 strings into a list of unicode strings all at
+    once (joined by NUL characters), which is much faster than one by one.
+    """
+    if not len(strings):
+        return []
+    return b'\x00'.join(strings.tolist()).decode('utf-8').split(u'\x00')
+
+def normalize(scores):
+    """
+    Converts base-2 log scores (the representation NLTK uses for maxent
+    weights) into a probability distribution along the last axis using a
+    numerically stable log-sum-exp.
+    """
+    scores = scores - scores.max(axis=-1, keepdims=True)
+    probs  = np.exp2(scores)
+    return probs / probs.sum(axis=-1, keepdims=True)
+
+def sparse_dot(indptr, indices, weights):
+    """
+    Computes the (rows x columns) product of a binary CSR matrix given as
+    (indptr, indices) with the dense weights: the weight rows of every
+    present index are gathered at once, then summed per row.
+    """
+    nrows = len(indptr) - 1
+    if nrows < 1:
+        return np.zeros((0, weights.shape[1]))
+
+    # Gather rows with a trailing zero row so that every offset in
+    # indptr (including empty trailing rows) is a valid index.
+    gathered = np.zeros((len(indices) + 1, weights.shape[1]))
+    gathered[:-1] = weights[indices]
+
+    product = np.add.reduceat(gathered, indptr[:-1], axis=0)
+    product[indptr[1:] == indptr[:-1]] = 0.0
+    return product
+
+##########################################################################
+## Sorted Table
+##########################################################################
+
+class SortedTable(Mapping):
+    """
+    A read-only mapping of strings to integers or strings, stored as an
+    array of the sorted UTF-8 encoded keys (of fixed width) and an array
+    of their values in the same order, which are looked up by a binary
+    search. Unlike a dictionary, the arrays can be saved as .npy files and
+    memory mapped, so that every process on a host shares a single copy of
+    a large table (e.g. the vocabulary or lemma table of a model).
+    """
+
+    def __init__(self, index, data):
+        self.index = index  # Sorted encoded keys
+        self.data  = data   # Value of each key (encoded if a string)
+        self.text  = data.dtype.kind == 'S'
+
+    @classmethod
+    def from_dict(cls, mapping):
+        """
+        Creates a table in memory from a dictionary.
+        """
+        items = sorted(
+            (encode(key), encode(value)) for key, value in mapping.items()
+        )
+        index = np.array([key for key, _ in items] or [b''])
+        data  = np.array([value for _, value in items] or [0])
+        return cls(index[:len(items)], data[:len(items)])
+
+    @classmethod
+    def load(cls, index, data, mmap=False):
+        """
+        Loads a table from the paths of its .npy files, opening them as
+        read-only memory maps if mmap is True.
+        """
+        mode = 'r' if mmap else None
+        return cls(np.load(index, mmap_mode=mode), np.load(data, mmap_mode=mode))
+
+    def save(self, index, data):
+        """
+        Writes the table to the paths of its .npy files.
+        """
+        np.save(index, self.index)
+        np.save(data, self.data)
+
+    def find(self, keys):
+        """
+        Looks up a list of (encoded) keys with one binary search for all of
+        them, returning an array of the values of the keys that are in the
+        table (in order) and a boolean array of which of the keys those are.
+        """
+        if not keys or not len(self.index):
+            return self.data[:0], np.zeros(len(keys), dtype=bool)
+
+        # Keys wider than the index are truncated to search for, but are
+        # compared in full so that they (correctly) are never found
+        keys  = np.array(keys)
+        found = np.searchsorted(self.index, keys)
+        found[found == len(self.index)] = 0
+        mask  = self.index[found] == keys
+        return self.data[found[mask]], mask
+
+    def lookup(self, keys):
+        """
+        Returns an array of the values of those of the (encoded) keys that
+        are in the table, in order.
+        """
+        return self.find(keys)[0]
+
+    def to_dict(self):
+        """
+        Returns the table as a (much faster, but private) dictionary.
+        """
+        values = decode(self.data) if self.text else self.data.tolist()
+        return dict(zip(decode(self.index), values))
+
+    def __getitem__(self, key):
+        value = self.lookup([encode(key)])
+        if not len(value):
+            raise KeyError(key)
+        return value[0].decode('utf-8') if self.text else int(value[0])
+
+    def __contains__(self, key):
+        return len(self.lookup([encode(key)])) > 0
+
+    def __iter__(self):
+        for key in self.index.tolist():
+            yield key.decode('utf-8')
+
+    def __len__(self):
+        return len(self.index)
+
+##########################################################################
+## Compiled Model
+##########################################################################
+
+class CompiledModel(object):
+    """
+    A MaxentClassifier compiled into a feature vocabulary (feature name to
+    row index) and a dense (features x labels) weight matrix, along with a
+    bias vector that holds the "always on" weight of each label.
+
+    Scoring a featureset is then a row gather over the weights of the
+    features that are present, plus a log-sum-exp over the labels, rather
+    than a walk over every (feature, value, label) tuple in the encoding.
+    """
+
+    def __init__(self, vocabulary, labels, weights, bias=None, lemmas=None,
+                 buckets=None, fields=None):
+        self.vocabulary = vocabulary    # Map of feature name to row index
+        self.labels     = list(labels)  # Labels in column order
+        self.weights    = weights       # Base-2 weights (features x labels)
+
+        if bias is None:
+            bias = np.zeros(len(self.labels))
+        self.bias       = bias          # Base-2 always on weights per label
+        self.lemmas     = lemmas        # Word to lemma table of the corpus
+        self.buckets    = buckets       # Buckets features are hashed into
+        self.fields     = fields        # Product fields featurized (None for all)
+        self._ones      = np.ones(0)    # Sums the weight rows of one featureset
+
+    @classmethod
+    def from_classifier(cls, classifier):
+        """
+        Compiles an NLTK MaxentClassifier that uses a binary feature
+        encoding (as trained by the ClassifierBuilder). Unseen-value
+        features are dropped since they fire equally for every label and
+        so have no effect on the probability distribution.
+        """
+        if not classifier._logarithmic:
+            raise ValueError("Can only compile logarithmic maxent classifiers")
+
+        encoding = classifier._encoding
+        labels   = list(encoding.labels())
+        columns  = dict((label, idx) for idx, label in enumerate(labels))
+
+        vocabulary = {}
+        rows, cols, fids = [], [], []
+        for (fname, fval, label), fid in encoding._mapping.items():
+            if fval is not True:
+                raise ValueError(
+                    "Can only compile boolean features, '%s' has value %r"
+                    % (fname, fval)
+                )
+            rows.append(vocabulary.setdefault(fname, len(vocabulary)))
+            cols.append(columns[label])
+            fids.append(fid)
+
+        weights = np.zeros((len(vocabulary), len(labels)))
+        weights[rows, cols] = classifier._weights[fids]
+
+        bias = np.zeros(len(labels))
+        for label, fid in (encoding._alwayson or {}).items():
+            bias[columns[label]] = classifier._weights[fid]
+
+        return cls(vocabulary, labels, weights, bias)
+
+    @classmethod
+    def from_pickle(cls, path):
+        """
+        Unpickles a MaxentClassifier from disk and compiles it.
+        """
+        with open(path, 'rb') as pkl:
+            return cls.from_classifier(pickle.load(pkl))
+
+    @classmethod
+    def load(cls, path, mmap=False):
+        """
+        Loads a model from a compact artifact directory, which holds the
+        labels in a manifest, the vocabulary as sorted tables (.npy arrays)
+        of the feature names and their rows, and the weight matrix and bias
+        vector as .npy arrays, along with (optionally) a sorted table of the
+        words of the corpus and their lemmas. The manifest also records the
+        number of buckets features are hashed into, if the model was
+        trained on hashed features, and the fields of the products it was
+        trained on, if not all of them. Version 1 artifacts, which store the
+        vocabulary and lemma table as JSON, can also be loaded.
+
+        If mmap is True, the weight matrix and the vocabulary and lemma
+        tables are opened as read-only memory maps rather than read into
+        memory. Pages are then loaded lazily as they are used, and every
+        process on the host that maps the same artifact shares a single
+        physical copy through the page cache. Otherwise the tables are read
+        into dictionaries, which are faster to look features up in.
+        """
+        with open(os.path.join(path, MANIFEST), 'r') as f:
+            manifest = json.load(f)
+
+        if manifest['version'] > ARTIFACT_VERSION:
+            raise ValueError(
+                "Unsupported model artifact version %r" % manifest['version']
+            )
+
+        weights = np.load(os.path.join(path, WEIGHTS), mmap_mode='r' if mmap else None)
+        bias    = np.load(os.path.join(path, BIAS))
+
+        if manifest['version'] < 2:
+            vocabulary, lemmas = cls.load_json(path)
+        else:
+            vocabulary = SortedTable.load(
+                os.path.join(path, VOCABULARY), os.path.join(path, ROWS), mmap
+            )
+
+            lemmas = None
+            if os.path.exists(os.path.join(path, WORDS)):
+                lemmas = SortedTable.load(
+                    os.path.join(path, WORDS), os.path.join(path, LEMMAS), mmap
+                )
+
+            if not mmap:
+                vocabulary = vocabulary.to_dict()
+                lemmas = lemmas.to_dict() if lemmas is not None else None
+
+        return cls(
+            vocabulary, manifest['labels'], weights, bias, lemmas,
+            manifest.get('buckets'), manifest.get('fields'),
+        )
+
+    @staticmethod
+    def load_json(path):
+        """
+        Reads the vocabulary and lemma table (or None) of a version 1
+        artifact, which are stored as JSON, into dictionaries.
+        """
+        with open(os.path.join(path, VOCABULARY_JSON), 'r') as f:
+            vocabulary = dict((fname, idx) for idx, fname in enumerate(json.load(f)))
+
+        lemmas = None
+        if os.path.exists(os.path.join(path, LEMMAS_JSON)):
+            with open(os.path.join(path, LEMMAS_JSON), 'r') as f:
+                lemmas = json.load(f)
+
+        return vocabulary, lemmas
+
+    def save(self, path):
+        """
+        Writes the model as a compact artifact to a new directory at path.
+        """
+        if os.path.exists(path):
+            raise Exception("Can't overwrite model artifact at '%s'!" % path)
+        os.makedirs(path)
+
+        manifest = {
+            'version': ARTIFACT_VERSION,
+            'labels': self.labels,
+            'features': len(self.vocabulary),
+            'buckets': self.buckets,
+            'fields': self.fields,
+        }
+
+        with open(os.path.join(path, MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=4)
+
+        table(self.vocabulary).save(
+            os.path.join(path, VOCABULARY), os.path.join(path, ROWS)
+        )
+
+        np.save(os.path.join(path, WEIGHTS), self.weights)
+        np.save(os.path.join(path, BIAS), self.bias)
+
+        if self.lemmas is not None:
+            table(self.lemmas).save(
+                os.path.join(path, WORDS), os.path.join(path, LEMMAS)
+            )
+
+        return path
+
+    def indices(self, features):
+        """
+        Returns the row indices of the features in the vocabulary that are
+        present (True) in the given featureset; all others are ignored.
+        """
+        vocabulary = self.vocabulary
+        if isinstance(vocabulary, SortedTable):
+            return vocabulary.lookup([
+                encode(fname) for fname, fval in features.iteritems() if fval is True
+            ])
+
+        return [
+            vocabulary[fname] for fname, fval in features.iteritems()
+            if fval is True and fname in vocabulary
+        ]
+
+    def transform(self, featuresets):
+        """
+        Converts a list of featuresets into a sparse CSR-style pair of
+        arrays (indptr, indices) such that the vocabulary rows of the i-th
+        featureset are indices[indptr[i]:indptr[i+1]].
+        """
+        vocabulary = self.vocabulary
+        if isinstance(vocabulary, SortedTable):
+            # Look up the features of every featureset at once
+            names, offsets = [], [0]
+            for features in featuresets:
+                names.extend(
+                    encode(fname) for fname, fval in features.iteritems() if fval is True
+                )
+                offsets.append(len(names))
+
+            indices, found = vocabulary.find(names)
+            indptr = np.concatenate(([0], np.cumsum(found)))[offsets]
+            return indptr.astype(np.intp), indices.astype(np.intp)
+
+        indptr  = [0]
+        indices = []
+        for features in featuresets:
+            indices.extend(self.indices(features))
+            indptr.append(len(indices))
+        return np.array(indptr, dtype=np.intp), np.array(indices, dtype=np.intp)
+
+    def scores(self, features):
+        """
+        Returns the base-2 log score of every label for the featureset. A
+        single product only has a handful of weight rows, so rather than a
+        NumPy reduction (whose fixed overhead dominates at this size) they
+        are summed by one dot product with a vector of ones.
+        """
+        rows = self.indices(features)
+        ones = self._ones
+        if len(ones) < len(rows):
+            ones = self._ones = np.ones(max(len(rows), 2 * len(ones)))
+        return self.bias + ones[:len(rows)].dot(self.weights.take(rows, axis=0))
+
+    def scores_many(self, indptr, indices):
+        """
+        Computes the (featuresets x labels) score matrix for a CSR batch as
+        a single sparse-dense product of the featuresets and the weights.
+        """
+        return sparse_dot(indptr, indices, self.weights) + self.bias
+
+    def prob_classify(self, features):
+        """
+        Returns an array of probabilities, one for each label in order. The
+        scores of one product are normalized like normalize does, but with
+        the max and sum of its few labels taken in Python, which is faster.
+        """
+        scores = self.scores(features)
+        probs  = np.exp2(scores - max(scores.tolist()))
+        return probs / sum(probs.tolist())
+
+    def prob_classify_many(self, featuresets):
+        """
+        Returns a (featuresets x labels) array of probabilities.
+        """
+        return normalize(self.scores_many(*self.transform(featuresets)))
+
+    def classify(self, features):
+        """
+        Returns the most likely label for the featureset.
+        """
+        return self.labels[int(np.argmax(self.scores(features)))]
+
+    def classify_many(self, featuresets):
+        """
+        Returns the most likely label of each featureset, e.g. so that the
+        model can be evaluated with nltk.classify.util.accuracy.
+        """
+        scores = self.scores_many(*self.transform(featuresets))
+        return [self.labels[idx] for idx in np.argmax(scores, axis=1)]
+
+    def to_classifier(self):
+        """
+        Converts the model into an NLTK MaxentClassifier with a binary
+        feature encoding (the inverse of from_classifier), which has a
+        joint feature for every non-zero weight and an always on feature
+        for every label.
+        """
+        from nltk.classify.maxent import MaxentClassifier, BinaryMaxentFeatureEncoding
+
+        names   = sorted(self.vocabulary, key=self.vocabulary.get)
+        rows, cols = np.nonzero(self.weights)
+
+        mapping = dict(
+            ((names[row], True, self.labels[col]), fid)
+            for fid, (row, col) in enumerate(zip(rows, cols))
+        )
+
+        encoding = BinaryMaxentFeatureEncoding(
+            self.labels, mapping, alwayson_features=True
+        )
+
+        weights = np.concatenate([self.weights[rows, cols], self.bias])
+        return MaxentClassifier(encoding, weights)
+
+    def explain(self, features, columns=4):
+        """
+        Prints a table of the weight of each feature present in the given
+        featureset towards the most likely labels, and how they combine to
+        determine the probabilities of those labels (after NLTK's explain).
+        """
+        descr_width = 50
+        TEMPLATE = '  %-'+str(descr_width-2)+'s%s%8.3f'
+
+        probs  = self.prob_classify(features)
+        order  = np.argsort(-probs, kind='mergesort')[:columns]
+        rows   = [(fname, self.vocabulary[fname])
+                  for fname, fval in features.items()
+                  if fval is True and fname in self.vocabulary]
+
+        print('  Feature'.ljust(descr_width)+''.join(
+            '%8s' % (("%s" % self.labels[col])[:7]) for col in order))
+        print('  '+'-'*(descr_width-2+8*len(order)))
+
+        sums = defaultdict(int)
+        for i, col in enumerate(order):
+            label  = self.labels[col]
+            scores = [("%s==True (1)" % fname, self.weights[row, col])
+                      for fname, row in rows
+                      if self.weights[row, col] != 0]
+            scores.append(("label is %r (1)" % label, self.bias[col]))
+            scores.sort(key=lambda item: abs(item[1]), reverse=True)
+
+            for descr, score in scores:
+                if len(descr) > 47: descr = descr[:44]+'...'
+                print(TEMPLATE % (descr, i*8*' ', score))
+                sums[label] += score
+
+        print('  '+'-'*(descr_width-1+8*len(order)))
+        print('  TOTAL:'.ljust(descr_width)+''.join(
+            '%8.3f' % sums[self.labels[col]] for col in order))
+        print('  PROBS:'.ljust(descr_width)+''.join(
+            '%8.3f' % probs[col] for col in order))
+
+    def __len__(self):
+        return len(self.vocabulary)
+
+    def __repr__(self):
+        return "<CompiledModel: %d labels, %d features>" % (
+            len(self.labels), len(self.vocabulary)
+        )
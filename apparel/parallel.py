@@ -0,0 +1,332 @@
+# apparel.parallel
+# Multi-process classification, featurization and validation
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 16:20:44 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: parallel.py [] benjamin@bengfort.com $
+
+"""
+Multi-process classification, featurization and validation
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import time
+import numpy as np
+import multiprocessing as mp
+
+from collections import Counter, deque
+from apparel.reader import chunked, validate_records
+from apparel.model import SortedTable, load_model
+from apparel.matrix import FeatureMatrix
+from apparel.utils import memory_details, peak_memory_usage
+from apparel.classify import ApparelClassifier
+
+##########################################################################
+## Worker functions
+##########################################################################
+
+## The classifier, featurizer or featureset loaded once by each worker
+_classifier = None
+_featurizer = None
+_validation = None
+
+def _init_classifier(model, featurizer, kwargs):
+    """
+    Pool initializer: loads the model and featurizer once per worker.
+    """
+    global _classifier
+    _classifier = ApparelClassifier(model, featurizer=featurizer, **kwargs)
+
+def _classify_chunk(chunk):
+    """
+    Classifies a chunk of records with the worker's classifier.
+    """
+    return _classifier.classify_many(chunk)
+
+def _init_featurizer(featurizer):
+    """
+    Pool initializer: installs the featurizer once per worker.
+    """
+    global _featurizer
+    _featurizer = featurizer
+
+def _featurize_chunk(chunk):
+    """
+    Featurizes a chunk of (row, label) pairs with the worker's featurizer,
+    returning the featuresets along with the lemmas of the words the
+    featurizer normalized for the first time (if it is recording them).
+    """
+    featuresets = [(_featurizer.featurize(**row), label) for row, label in chunk]
+    lemmas = getattr(_featurizer, 'lemmatized', None)
+    if lemmas is not None:
+        _featurizer.lemmatized = {}
+    return featuresets, lemmas
+
+def _init_validation(featureset, trainer):
+    """
+    Pool initializer: installs the featureset and trainer once per worker
+    (on fork based platforms these are inherited rather than pickled).
+    """
+    global _validation
+    _validation = (featureset, trainer)
+
+def _validate_fold(fold):
+    """
+    Trains and evaluates a single fold with the worker's featureset.
+    """
+    featureset, trainer = _validation
+    return validate_fold(featureset, trainer, fold)
+
+##########################################################################
+## Ordered dispatch
+##########################################################################
+
+def imap_ordered(pool, func, chunks, backlog):
+    """
+    Applies func to every chunk across the pool, yielding (chunk, result)
+    pairs in the order of the chunks. At most backlog chunks are in flight
+    at once so that a lazy iterable of chunks is never read ahead into
+    memory faster than the workers can consume it.
+    """
+    pending = deque()
+    for chunk in chunks:
+        pending.append((chunk, pool.apply_async(func, (chunk,))))
+        if len(pending) >= backlog:
+            chunk, result = pending.popleft()
+            yield chunk, result.get()
+
+    while pending:
+        chunk, result = pending.popleft()
+        yield chunk, result.get()
+
+def featurize_parallel(pairs, featurizer, processes=None, chunksize=1000):
+    """
+    Featurizes an iterable of (row, label) pairs from the corpus, sharding
+    chunks of rows across a pool of processes. Yields (features, label)
+    pairs in corpus order, identical to featurizing the rows serially.
+    If the featurizer is recording lemmas, those the workers record are
+    added to its table.
+    """
+    processes = processes or mp.cpu_count()
+    pool = mp.Pool(processes, initializer=_init_featurizer, initargs=(featurizer,))
+
+    try:
+        chunks = chunked(pairs, chunksize)
+        for _, (featuresets, lemmas) in imap_ordered(pool, _featurize_chunk, chunks, 2*processes):
+            if lemmas:
+                featurizer.lemmatized.update(lemmas)
+            for item in featuresets:
+                yield item
+    except:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+##########################################################################
+## Cross validation
+##########################################################################
+
+def validate_fold(featureset, trainer, fold):
+    """
+    Trains a classifier with the trainer (a function that accepts a list
+    of (features, label) pairs, or a FeatureMatrix, and returns a
+    classifier) on every item of the featureset that is not in the fold of
+    test indices, then returns the accuracy on the fold along with timings,
+    sizes and the peak memory of the process that validated it.
+
+    A FeatureMatrix is split into views of its rows rather than copied.
+    """
+    from nltk.classify.util import accuracy
+
+    if isinstance(featureset, FeatureMatrix):
+        train, test = featureset.split(fold)
+    else:
+        holdout = set(fold)
+        train = [item for idx, item in enumerate(featureset) if idx not in holdout]
+        test  = [featureset[idx] for idx in fold]
+
+    start = time.time()
+    classifier = trainer(train)
+    trained = time.time()
+    score = accuracy(classifier, test)
+
+    return {
+        'accuracy': score,
+        'training': trained - start,
+        'testing': time.time() - trained,
+        'train_size': len(train),
+        'test_size': len(test),
+        'peak_memory': peak_memory_usage(),
+    }
+
+class FoldValidation(object):
+    """
+    Validates each of the given folds against the featureset, either
+    concurrently across a pool of processes or (with one process) serially
+    in this process when the results are requested. Because the pool work
+    begins as soon as the object is created, other work, such as training
+    the final model, can proceed in this process while the folds train.
+    """
+
+    def __init__(self, featureset, trainer, folds, processes=1):
+        self.featureset = featureset
+        self.trainer    = trainer
+        self.folds      = folds
+        self.pool       = None
+        self.pending    = None
+        self.started    = time.time()
+        self.elapsed    = None  # Wall clock time (seconds) of the validation
+
+        if processes > 1:
+            self.pool = mp.Pool(
+                min(processes, len(folds)), initializer=_init_validation,
+                initargs=(featureset, trainer),
+            )
+            self.pending = self.pool.map_async(_validate_fold, folds, chunksize=1)
+            self.pool.close()
+
+    def get(self):
+        """
+        Returns the list of fold results, in fold order, blocking until
+        every fold has been trained and evaluated.
+        """
+        if self.pool is None:
+            self.started = time.time()
+            results = [
+                validate_fold(self.featureset, self.trainer, fold)
+                for fold in self.folds
+            ]
+        else:
+            try:
+                results = self.pending.get()
+            except:
+                self.pool.terminate()
+                raise
+            finally:
+                self.pool.join()
+
+        self.elapsed = time.time() - self.started
+        return results
+
+##########################################################################
+## Worker memory
+##########################################################################
+
+def _measure_worker(model, mmap, results, done):
+    """
+    Loads the model as a classifier worker would, touches every page of
+    the weights and of the vocabulary and lemma tables (as scoring
+    eventually does) then reports its memory and stays alive until every
+    other worker has reported too.
+    """
+    loaded = load_model(model, mmap=mmap)
+    loaded.weights.sum()
+    for table in (loaded.vocabulary, loaded.lemmas):
+        if isinstance(table, SortedTable):
+            table.index.view(np.uint8).sum()
+            table.data.view(np.uint8).sum()
+    results.put(memory_details())
+    done.wait()
+
+def worker_memory(model, processes=2, mmap=False):
+    """
+    Starts the given number of processes that each load the model, with or
+    without memory mapping the weights, and returns a list of the memory
+    details (rss, shared and pss bytes) of each worker measured while all
+    of them are alive, so that the effect of sharing can be compared.
+    """
+    results = mp.Queue()
+    done    = mp.Event()
+    workers = [
+        mp.Process(target=_measure_worker, args=(model, mmap, results, done))
+        for _ in range(processes)
+    ]
+
+    for worker in workers:
+        worker.start()
+
+    try:
+        return [results.get() for _ in workers]
+    finally:
+        done.set()
+        for worker in workers:
+            worker.join()
+
+##########################################################################
+## Classifier Pool
+##########################################################################
+
+class ClassifierPool(object):
+    """
+    Spreads batch classification across a pool of processes, each of which
+    loads the model and featurizer once when it starts. Chunks of records
+    are dispatched to the workers and results are yielded in input order.
+
+    The number of chunks in flight is bounded (a small multiple of the
+    number of processes) so that streaming input is never read ahead into
+    memory faster than the workers can consume it. Any other keyword
+    arguments (e.g. mmap to share a single copy of the model artifact, or
+    cache_size) are passed to the ApparelClassifier of every worker.
+    """
+
+    def __init__(self, model=None, processes=None, featurizer=None, backlog=2, **kwargs):
+        self.processes = processes or mp.cpu_count()
+        self.backlog   = backlog * self.processes
+        self.validated = Counter()
+        self.pool      = mp.Pool(
+            self.processes, initializer=_init_classifier,
+            initargs=(model, featurizer, kwargs),
+        )
+
+    def classify_stream(self, records, chunksize=1000, skip_invalid=False):
+        """
+        Lazily classifies an iterable of records in chunks across the
+        pool, yielding (record, labels) pairs in the order of the input.
+        Records are validated before they are dispatched to the workers,
+        as by ApparelClassifier.classify_stream.
+        """
+        records = validate_records(records, skip_invalid, self.validated)
+        chunks  = chunked(records, chunksize)
+        for chunk, results in imap_ordered(self.pool, _classify_chunk, chunks, self.backlog):
+            for result in zip(chunk, results):
+                yield result
+
+    def classify_many(self, records, chunksize=1000):
+        """
+        Classifies a list of records across the pool, returning a list of
+        label distributions in the same order as the input.
+        """
+        return [labels for _, labels in self.classify_stream(records, chunksize)]
+
+    def close(self):
+        """
+        Waits for the workers to finish and shuts down the pool.
+        """
+        self.pool.close()
+        self.pool.join()
+
+    def terminate(self):
+        """
+        Stops the workers immediately without finishing pending work.
+        """
+        self.pool.terminate()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
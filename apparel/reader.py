@@ -0,0 +1,312 @@
+# apparel.reader
+# Streaming readers for product records in CSV or JSON lines format
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 15:48:51 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: reader.py [] benjamin@bengfort.com $
+
+"""
+Streaming readers for product records in CSV or JSON lines format, which
+may be compressed (gzip, bz2 or xz) and sharded across many files.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import io
+import os
+import sys
+import bz2
+import json
+import glob
+import gzip
+import time
+import threading
+import unicodecsv as csv
+
+from six.moves import queue
+from itertools import islice
+
+try:
+    import lzma
+except ImportError:
+    try:
+        from backports import lzma
+    except ImportError:
+        lzma = None  # Reading xz files requires Python 3 or backports.lzma
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+FORMATS    = ('csv', 'jsonl')
+EXTENSIONS = {
+    '.csv': 'csv',
+    '.json': 'jsonl',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+
+## Functions that open a compressed file (by extension) for reading bytes
+COMPRESSIONS = {
+    '.gz': lambda path: io.BufferedReader(gzip.GzipFile(path, 'rb')),
+    '.bz2': lambda path: bz2.BZ2File(path, 'rb'),
+    '.xz': lambda path: lzma.LZMAFile(path, 'rb'),
+}
+
+PREFETCH   = 8     # Chunks of records read ahead of the consumer
+CHUNKSIZE  = 1000  # Records per chunk read ahead
+
+##########################################################################
+## Readers
+##########################################################################
+
+def detect_format(path):
+    """
+    Guesses the format of a file of records from its extension (ignoring
+    any compression extension), falling back on CSV (the format of the
+    training corpus) if it is unknown.
+    """
+    root, ext = os.path.splitext(path.lower())
+    if ext in COMPRESSIONS:
+        ext = os.path.splitext(root)[1]
+    return EXTENSIONS.get(ext, 'csv')
+
+def corpus_paths(corpus):
+    """
+    Returns the paths of the files (shards) of a corpus in sorted order:
+    the files in it if it is a directory (ignoring hidden files), the files
+    that match it if it is a glob pattern, or otherwise the path itself.
+    """
+    if os.path.isdir(corpus):
+        paths = [
+            os.path.join(corpus, name) for name in os.listdir(corpus)
+            if not name.startswith('.')
+        ]
+    elif glob.has_magic(corpus):
+        paths = glob.glob(corpus)
+    else:
+        return [corpus]
+
+    paths = sorted(path for path in paths if os.path.isfile(path))
+    if not paths:
+        raise ValueError("No corpus files found at '%s'" % corpus)
+    return paths
+
+def open_file(path):
+    """
+    Opens a file for reading bytes, decompressing it if it has the
+    extension of a compression format.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in COMPRESSIONS:
+        return open(path, 'rb')
+
+    if ext == '.xz' and lzma is None:
+        raise ValueError(
+            "Reading '%s' requires the lzma module (backports.lzma on Python 2)" % path
+        )
+    return COMPRESSIONS[ext](path)
+
+def read_records(path, format=None):
+    """
+    Lazily reads records (dictionaries with the same name, description,
+    and keywords columns as the training corpus) from a CSV or JSON lines
+    file, one at a time so that memory does not grow with the input. A
+    path of "-" reads from stdin. The path can also be a compressed file,
+    or a directory or glob pattern of files that are read in sorted order
+    (the format of each is detected from its extension unless given).
+    """
+    if format is not None and format not in FORMATS:
+        raise ValueError("Unknown record format '%s'" % format)
+
+    if path == '-':
+        for record in parse_records(sys.stdin, format or 'csv'):
+            yield record
+        return
+
+    for shard in corpus_paths(path):
+        with open_file(shard) as f:
+            for record in parse_records(f, format or detect_format(shard)):
+                yield record
+
+def parse_records(f, format):
+    """
+    Parses records from an open file-like object in the given format.
+    """
+    if format == 'csv':
+        for row in csv.DictReader(f):
+            yield row
+        return
+
+    for line in f:
+        line = line.strip()
+        if not line: continue
+        yield json.loads(line)
+
+def prefetch(iterable, size=PREFETCH):
+    """
+    Iterates over the iterable (e.g. of chunks of records) in a background
+    thread that reads up to size items ahead into a bounded queue, so that
+    reading and decompressing the input overlaps with processing it, and
+    yields the items in order. An exception raised by the iterable is
+    raised in the consumer; if the consumer stops early, so does the thread.
+    """
+    items = queue.Queue(size)
+    stop  = threading.Event()
+    done  = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)): return
+            put((done, None))
+        except Exception as e:
+            put((done, e))
+
+    thread = threading.Thread(target=produce, name="prefetch")
+    thread.daemon = True
+    thread.start()
+
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+def chunked(iterable, size):
+    """
+    Breaks an iterable into lists of at most size items without ever
+    holding more than a single chunk in memory.
+    """
+    iterable = iter(iterable)
+    while True:
+        chunk = list(islice(iterable, size))
+        if not chunk: return
+        yield chunk
+
+def validate_records(records, skip=False, counts=None):
+    """
+    Yields the records that can be classified: product names, or records
+    with a name (e.g. a CSV row without a name column has none). Records
+    are counted in the 'records' key of counts (e.g. a Counter) if given.
+    An invalid record raises a ValueError naming its number in the input,
+    or if skip is True is skipped and counted in its 'skipped' key.
+    """
+    for idx, record in enumerate(records, 1):
+        if counts is not None: counts['records'] += 1
+
+        if isinstance(record, basestring):
+            yield record
+        elif isinstance(record, dict) and isinstance(record.get('name'), basestring):
+            yield record
+        elif skip:
+            if counts is not None: counts['skipped'] += 1
+        else:
+            raise ValueError("Record %i of the input has no product name" % idx)
+
+##########################################################################
+## Corpus Reader
+##########################################################################
+
+class CorpusReader(object):
+    """
+    Streams the records of a labeled corpus, which can be a file (CSV or
+    JSON lines, optionally compressed) or a directory or glob pattern of
+    such files, e.g. the compressed part files of a large corpus. Chunks of
+    records are read, decompressed and parsed ahead in a background thread
+    (unless prefetch is 0) into a bounded queue, so that memory is bounded
+    and reading overlaps with featurizing the records.
+
+    Every iteration records the number of rows, the seconds spent reading
+    them and the seconds it took to stream them; stats reports these along
+    with the throughput in bytes (of the files on disk) and rows per second.
+    """
+
+    def __init__(self, corpus, format=None, prefetch=PREFETCH, chunksize=CHUNKSIZE):
+        if format is not None and format not in FORMATS:
+            raise ValueError("Unknown record format '%s'" % format)
+
+        self.corpus    = corpus
+        self.paths     = corpus_paths(corpus)
+        self.format    = format
+        self.prefetch  = prefetch
+        self.chunksize = chunksize
+        self.rows      = 0     # Rows read by the last iteration
+        self.reading   = 0.0   # Seconds spent reading, decompressing and parsing
+        self.elapsed   = None  # Seconds to stream every row (None until done)
+
+    def records(self):
+        """
+        Reads the records of every file of the corpus in order.
+        """
+        for path in self.paths:
+            with open_file(path) as f:
+                for record in parse_records(f, self.format or detect_format(path)):
+                    yield record
+
+    def chunks(self):
+        """
+        Reads the records in chunks, timing how long each takes to read.
+        """
+        records = self.records()
+        while True:
+            start = time.time()
+            chunk = list(islice(records, self.chunksize))
+            self.reading += time.time() - start
+            if not chunk: return
+            self.rows += len(chunk)
+            yield chunk
+
+    @property
+    def bytes(self):
+        """
+        The number of bytes of the files of the corpus on disk.
+        """
+        return sum(os.path.getsize(path) for path in self.paths)
+
+    def stats(self):
+        """
+        Returns the number of files, bytes and rows read, the time spent
+        reading and streaming them, and the streaming throughput.
+        """
+        nbytes  = self.bytes
+        elapsed = self.elapsed
+        return {
+            'files': len(self.paths),
+            'bytes': nbytes,
+            'rows': self.rows,
+            'reading': self.reading,
+            'elapsed': elapsed,
+            'bytes_per_sec': nbytes / elapsed if elapsed else None,
+            'rows_per_sec': self.rows / elapsed if elapsed else None,
+        }
+
+    def __iter__(self):
+        self.rows, self.reading, self.elapsed = 0, 0.0, None
+        start  = time.time()
+        chunks = prefetch(self.chunks(), self.prefetch) if self.prefetch else self.chunks()
+        for chunk in chunks:
+            for record in chunk:
+                yield record
+        self.elapsed = time.time() - start
@@ -0,0 +1,319 @@
+# apparel.server
+# A long-running HTTP JSON classification service with micro-batching
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 18:44:37 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: server.py [] benjamin@bengfort.com $
+
+"""
+A long-running HTTP JSON classification service with micro-batching
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import json
+import time
+import threading
+import numpy as np
+
+from collections import deque, Counter
+from six import string_types
+from six.moves import queue
+from six.moves.socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, make_server
+from apparel.features import FIELDS
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+JSON_HEADERS = [('Content-Type', 'application/json')]
+
+##########################################################################
+## Metrics
+##########################################################################
+
+class Metrics(object):
+    """
+    Thread-safe collection of request latencies (a bounded window of the
+    most recent requests, from which percentiles are computed) and of the
+    sizes of the micro-batches that were scored.
+    """
+
+    def __init__(self, window=10000):
+        self.lock      = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.batches   = Counter()
+        self.requests  = 0
+        self.errors    = 0
+        self.started   = time.time()
+
+    def request(self, latency, error=False):
+        with self.lock:
+            self.latencies.append(latency)
+            self.requests += 1
+            if error: self.errors += 1
+
+    def batch(self, size):
+        with self.lock:
+            self.batches[size] += 1
+
+    def report(self):
+        """
+        Returns a dictionary of latency percentiles (in milliseconds) and
+        batch size statistics suitable for serializing as JSON.
+        """
+        with self.lock:
+            latencies = np.array(self.latencies) * 1000.0
+            batches   = dict(self.batches)
+            requests, errors = self.requests, self.errors
+
+        sizes  = sum(size * count for size, count in batches.items())
+        counts = sum(batches.values())
+
+        report = {
+            'uptime': time.time() - self.started,
+            'requests': requests,
+            'errors': errors,
+            'latency': None,
+            'batches': {
+                'count': counts,
+                'items': sizes,
+                'mean': float(sizes) / counts if counts else None,
+                'max': max(batches) if batches else None,
+                'histogram': dict((str(size), count) for size, count in batches.items()),
+            },
+        }
+
+        if len(latencies):
+            report['latency'] = {
+                'p50': float(np.percentile(latencies, 50)),
+                'p90': float(np.percentile(latencies, 90)),
+                'p99': float(np.percentile(latencies, 99)),
+                'mean': float(latencies.mean()),
+                'max': float(latencies.max()),
+            }
+
+        return report
+
+##########################################################################
+## Micro Batcher
+##########################################################################
+
+class Pending(object):
+    """
+    A record waiting in the micro-batch queue for its classification.
+    """
+
+    def __init__(self, record):
+        self.record = record
+        self.result = None
+        self.error  = None
+        self.done   = threading.Event()
+
+class MicroBatcher(object):
+    """
+    Coalesces records submitted concurrently (e.g. from the threads that
+    handle HTTP requests) into batches that are scored together with the
+    classify_many method of the classifier. A batch is scored as soon as
+    it has max_batch records or window seconds after its first record
+    arrived, whichever comes first.
+    """
+
+    def __init__(self, classifier, window=0.005, max_batch=64, metrics=None):
+        self.classifier = classifier
+        self.window     = window
+        self.max_batch  = max_batch
+        self.metrics    = metrics or Metrics()
+        self.queue      = queue.Queue()
+        self.thread     = threading.Thread(target=self.run, name="micro-batcher")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def submit(self, records):
+        """
+        Submits a list of records and blocks until all are classified,
+        returning their label distributions in order.
+        """
+        pending = [Pending(record) for record in records]
+        for item in pending:
+            self.queue.put(item)
+
+        for item in pending:
+            item.done.wait()
+            if item.error is not None:
+                raise item.error
+
+        return [item.result for item in pending]
+
+    def stop(self):
+        """
+        Stops the batching thread once the queued records are scored.
+        """
+        self.queue.put(None)
+        self.thread.join()
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None: return
+
+            batch    = [item]
+            deadline = time.time() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.time()
+                if remaining <= 0: break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+                if item is None:
+                    self.queue.put(None)
+                    break
+                batch.append(item)
+
+            self.score(batch)
+
+    def score(self, batch):
+        """
+        Scores a batch, rescoring its records one at a time if the batch
+        fails so that only the records that fail (rather than every record
+        coalesced with them) are given the error.
+        """
+        try:
+            results = self.classifier.classify_many([item.record for item in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].error = e
+                batch[0].done.set()
+                return
+
+            for item in batch:
+                self.score([item])
+            return
+
+        self.metrics.batch(len(batch))
+        for item, result in zip(batch, results):
+            item.result = result
+            item.done.set()
+
+##########################################################################
+## WSGI Application
+##########################################################################
+
+class ClassifierApplication(object):
+    """
+    WSGI application that serves the classifier as a JSON API:
+
+        POST /classify  a product record (or a list of them) with a name
+                        and optionally a description and keywords
+        GET  /metrics   latency percentiles, micro-batch, cache and stage statistics
+    """
+
+    def __init__(self, batcher):
+        self.batcher = batcher
+        self.metrics = batcher.metrics
+
+    def __call__(self, environ, start_response):
+        path   = environ.get('PATH_INFO', '')
+        method = environ.get('REQUEST_METHOD', 'GET')
+
+        if path == '/classify':
+            if method != 'POST':
+                return self.respond(start_response, '405 Method Not Allowed', {'error': 'use POST'})
+            return self.classify(environ, start_response)
+
+        if path == '/metrics':
+            return self.respond(start_response, '200 OK', self.report())
+
+        return self.respond(start_response, '404 Not Found', {'error': 'not found'})
+
+    def classify(self, environ, start_response):
+        start = time.time()
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+            body   = json.loads(environ['wsgi.input'].read(length))
+            single = not isinstance(body, list)
+            records = [body] if single else body
+            for record in records:
+                if not isinstance(record, dict) or not record.get('name'):
+                    raise ValueError("every product requires a name")
+                for field in FIELDS:
+                    if record.get(field) is not None and not isinstance(record[field], string_types):
+                        raise ValueError("the %s of a product must be a string" % field)
+        except ValueError as e:
+            self.metrics.request(time.time() - start, error=True)
+            return self.respond(start_response, '400 Bad Request', {'error': str(e)})
+
+        try:
+            results = self.batcher.submit(records)
+        except Exception as e:
+            self.metrics.request(time.time() - start, error=True)
+            return self.respond(start_response, '500 Internal Server Error', {'error': str(e)})
+
+        results = [{'labels': labels} for labels in results]
+        self.metrics.request(time.time() - start)
+        return self.respond(start_response, '200 OK', results[0] if single else results)
+
+    def report(self):
+        """
+        The metrics report along with the result cache statistics, the
+        stage timings, the cascade escalations and the near-duplicate reuse
+        of the classifier (None if the classifier does not cache results, is
+        not instrumented, does not cascade or does not deduplicate).
+        """
+        report  = self.metrics.report()
+        cache   = getattr(self.batcher.classifier, 'cache', None)
+        inst    = getattr(self.batcher.classifier, 'instrument', None)
+        cascade = getattr(self.batcher.classifier, 'cascade_stats', None)
+        dedupe  = getattr(self.batcher.classifier, 'dedupe_stats', None)
+        report['cache']   = cache.stats() if cache is not None else None
+        report['stages']  = inst.report() if inst is not None else None
+        report['cascade'] = cascade() if cascade is not None else None
+        report['dedupe']  = dedupe() if dedupe is not None else None
+        return report
+
+    def respond(self, start_response, status, data):
+        body = json.dumps(data).encode('utf-8')
+        start_response(status, JSON_HEADERS + [('Content-Length', str(len(body)))])
+        return [body]
+
+##########################################################################
+## Server
+##########################################################################
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """
+    Handles each request in its own thread so that concurrent requests can
+    be coalesced into micro-batches.
+    """
+
+    daemon_threads = True
+
+class QuietHandler(WSGIRequestHandler):
+    """
+    Request handler that does not log every request to stderr.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+def create_server(classifier, host='127.0.0.1', port=8080, window=0.005,
+                  max_batch=64, quiet=True):
+    """
+    Creates (but does not start) a threaded WSGI server that keeps the
+    classifier warm behind the JSON API. Call serve_forever to run it.
+    """
+    batcher = MicroBatcher(classifier, window, max_batch)
+    handler = QuietHandler if quiet else WSGIRequestHandler
+    return make_server(
+        host, port, ClassifierApplication(batcher),
+        server_class=ThreadingWSGIServer, handler_class=handler,
+    )
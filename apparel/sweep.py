@@ -0,0 +1,314 @@
+# apparel.sweep
+# Sweeps the hyperparameters of a build, training candidates concurrently
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 00:12:27 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: sweep.py [] benjamin@bengfort.com $
+
+"""
+Sweeps the hyperparameters of a build, training candidates concurrently.
+
+A sweep extracts the features of every field of the corpus once, then cross
+validates a candidate model for every combination of the prior sigma, the
+feature pruning thresholds and the fields of the products to include, on
+the same folds, across a pool of processes. Candidates are ranked by their
+validation accuracy alongside their training and inference costs, and the
+best can be promoted to a full build by the ClassifierBuilder.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import time
+import itertools
+import numpy as np
+import multiprocessing as mp
+
+from functools import partial
+from apparel.matrix import FeatureMatrix
+from apparel.reader import CorpusReader
+from apparel.maxent import train_numpy
+from apparel.features import FIELDS, FieldFeatures
+from apparel.build import train_maxent, kfolds
+from apparel.parallel import featurize_parallel, validate_fold
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+## Default values of each hyperparameter that is swept
+GRID = {
+    'sigma': (0.5, 1.0, 2.0),
+    'min_df': (1, 2),
+    'top_n': (None,),
+    'fields': (
+        ('name',),
+        ('name', 'keywords'),
+        ('name', 'description'),
+        ('name', 'description', 'keywords'),
+    ),
+}
+
+##########################################################################
+## Candidates
+##########################################################################
+
+def candidates(grid=None):
+    """
+    Returns every combination of the hyperparameters of the grid (a dict of
+    the values of each, defaulting to those of GRID) as a list of dicts.
+    """
+    grid = dict(GRID, **(grid or {}))
+    for fields in grid['fields']:
+        if 'name' not in fields or set(fields).difference(FIELDS):
+            raise ValueError(
+                "Fields must include the name and be some of %s" % ", ".join(FIELDS)
+            )
+
+    keys = ('sigma', 'min_df', 'top_n', 'fields')
+    return [
+        dict(zip(keys, values))
+        for values in itertools.product(*[grid[key] for key in keys])
+    ]
+
+def combine(fields, candidate):
+    """
+    Combines the matrices of the fields (in the order of FIELDS) that the
+    candidate includes, then prunes the features as it specifies. Returns
+    the unpruned and the pruned featureset (the same if not pruned).
+    """
+    union = FeatureMatrix.union([
+        matrix for field, matrix in zip(FIELDS, fields)
+        if field in candidate['fields']
+    ])
+
+    # Drop the features (of the shared vocabulary) of the excluded fields
+    union = union.prune(union.select())
+
+    if candidate['min_df'] > 1 or candidate['top_n']:
+        return union, union.prune(union.select(candidate['min_df'], candidate['top_n']))
+    return union, union
+
+def trainer(algorithm, sigma):
+    """
+    Returns the function that trains a candidate with the given sigma.
+    """
+    if algorithm == 'numpy':
+        return partial(train_numpy, sigma=sigma)
+    return partial(train_maxent, sigma=sigma)
+
+##########################################################################
+## Worker functions
+##########################################################################
+
+## The field matrices, folds and algorithm installed in each worker, along
+## with the featureset of the last candidate (tasks arrive in candidate order)
+_sweep = None
+_combined = (None, None)
+
+def _init_sweep(fields, folds, algorithm):
+    """
+    Pool initializer: installs the field matrices and folds once per worker.
+    """
+    global _sweep, _combined
+    _sweep    = (fields, folds, algorithm)
+    _combined = (None, None)
+
+def _validate_candidate(args):
+    """
+    Cross validates one fold of a candidate with the worker's featuresets,
+    returning the fold results along with the size of the featureset.
+    """
+    global _combined
+    index, candidate, fold = args
+    fields, folds, algorithm = _sweep
+
+    if _combined[0] != index:
+        _combined = (index, combine(fields, candidate)[1])
+    featureset = _combined[1]
+
+    result = validate_fold(featureset, trainer(algorithm, candidate['sigma']), folds[fold])
+    result['features'] = len(featureset.vocabulary)
+    result['labels']   = len(featureset.labels)
+    return result
+
+##########################################################################
+## Sweep
+##########################################################################
+
+class Sweep(object):
+    """
+    Sweeps the hyperparameters of the given ClassifierBuilder, whose corpus,
+    featurizer, algorithm, folds and workers are used: the features of each
+    field of the corpus are extracted once, then every fold of every
+    candidate is trained and evaluated across a pool of the builder's
+    workers. The results are ranked by mean accuracy (then training time).
+    """
+
+    def __init__(self, builder, grid=None):
+        self.builder    = builder
+        self.candidates = candidates(grid)
+        self.fields     = None  # Matrix of the features of each field
+        self.lemmas     = None  # Lemma table of the words of the corpus
+        self.results    = None  # Ranked results of every candidate
+        self.feattime   = None  # Time (seconds) to extract the features
+        self.elapsed    = None  # Time (seconds) to train the candidates
+
+    def extract(self):
+        """
+        Reads the corpus and extracts the features of each field of every
+        row into matrices that share a vocabulary (in parallel if the
+        builder has more than one worker). If the builder has a cache, the
+        matrices (and lemma table) are read from it if the corpus has not
+        changed since they were extracted, or written to it otherwise.
+        """
+        builder = self.builder
+        start   = time.time()
+        featurizer = FieldFeatures(builder.featurizer)
+
+        # The features of each field are cached apart from those of builds
+        if builder.cache is not None:
+            key   = builder.cache.key(builder.corpus, featurizer)
+            entry = builder.cache.get(builder.corpus, key)
+            if entry is not None:
+                self.fields, self.lemmas = entry
+                self.feattime = time.time() - start
+                return self.fields
+
+        reader = CorpusReader(builder.corpus, chunksize=builder.chunksize)
+        pairs  = ((row, row.pop('category')) for row in reader)
+        self.lemmas = builder.featurizer.record()
+
+        if builder.workers > 1:
+            featuresets = featurize_parallel(
+                pairs, featurizer, builder.workers, builder.chunksize
+            )
+        else:
+            featuresets = (
+                (featurizer.featurize(**row), label) for row, label in pairs
+            )
+
+        try:
+            self.fields = FeatureMatrix.from_fields(featuresets, len(FIELDS))
+        finally:
+            builder.featurizer.lemmatized = None
+
+        if builder.cache is not None:
+            builder.cache.put(builder.corpus, key, (self.fields, self.lemmas))
+
+        self.feattime = time.time() - start
+        return self.fields
+
+    def run(self):
+        """
+        Cross validates every candidate on the same folds and returns the
+        ranked results.
+        """
+        builder = self.builder
+        fields  = self.fields or self.extract()
+        folds   = kfolds(
+            fields[0].targets.tolist(), builder.folds, builder.stratified, builder.seed
+        )
+
+        tasks = [
+            (index, candidate, fold)
+            for index, candidate in enumerate(self.candidates)
+            for fold in range(len(folds))
+        ]
+
+        start = time.time()
+        if builder.workers > 1:
+            pool = mp.Pool(
+                builder.workers, initializer=_init_sweep,
+                initargs=(fields, folds, builder.algorithm),
+            )
+            try:
+                results = pool.map(_validate_candidate, tasks, chunksize=1)
+            except:
+                pool.terminate()
+                raise
+            else:
+                pool.close()
+            finally:
+                pool.join()
+        else:
+            _init_sweep(fields, folds, builder.algorithm)
+            results = [_validate_candidate(task) for task in tasks]
+        self.elapsed = time.time() - start
+
+        self.results = self.rank([
+            self.summarize(candidate, results[idx*len(folds):(idx+1)*len(folds)])
+            for idx, candidate in enumerate(self.candidates)
+        ])
+        return self.results
+
+    def summarize(self, candidate, folds):
+        """
+        Summarizes the fold results of a candidate: the mean and standard
+        deviation of the accuracy, the mean time to train a fold, the mean
+        time to classify a product and the bytes of the dense weights.
+        """
+        scores = [fold['accuracy'] for fold in folds]
+        return dict(candidate, **{
+            'fields': list(candidate['fields']),
+            'accuracy': float(np.mean(scores)),
+            'stddev': float(np.std(scores, ddof=1)) if len(scores) > 1 else 0.0,
+            'training': float(np.mean([fold['training'] for fold in folds])),
+            'inference': float(np.mean([
+                fold['testing'] / fold['test_size'] for fold in folds
+            ])),
+            'features': folds[0]['features'],
+            'weights': folds[0]['features'] * folds[0]['labels'] * np.dtype(float).itemsize,
+        })
+
+    def rank(self, results):
+        """
+        Sorts the results by descending accuracy, breaking ties by the
+        faster training time, and numbers them by rank.
+        """
+        results = sorted(results, key=lambda result: (-result['accuracy'], result['training']))
+        for rank, result in enumerate(results, 1):
+            result['rank'] = rank
+        return results
+
+    def promote(self, result=None):
+        """
+        Configures the builder with the hyperparameters of the given result
+        (the best by default) and builds it from the features the sweep
+        extracted, writing the model and its info to the output path.
+        """
+        result  = result or self.results[0]
+        builder = self.builder
+
+        builder.sigma     = result['sigma']
+        builder.min_df    = result['min_df']
+        builder.top_n     = result['top_n']
+        builder.fields    = tuple(result['fields'])
+        builder.extracted = combine(self.fields, result)[0]
+        builder.lemmas    = self.lemmas
+
+        builder.build()
+        return builder
+
+    def report(self):
+        """
+        Describes the sweep and its ranked results, e.g. to write as JSON.
+        """
+        return {
+            'corpus': self.builder.corpus,
+            'algorithm': self.builder.algorithm,
+            'folds': self.builder.folds,
+            'seed': self.builder.seed,
+            'candidates': len(self.candidates),
+            'features': len(self.fields[0].vocabulary) if self.fields else None,
+            'timer': {
+                'features': self.feattime,
+                'sweep': self.elapsed,
+            },
+            'results': self.results,
+        }
@@ -0,0 +1,136 @@
+# apparel.utils
+# Utilities for measuring the time and memory used by the classifier
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 17:58:12 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: utils.py [] benjamin@bengfort.com $
+
+"""
+Utilities for measuring the time and memory used by the classifier
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import sys
+import time
+import resource
+import multiprocessing as mp
+
+##########################################################################
+## Memory usage
+##########################################################################
+
+def memory_usage():
+    """
+    Returns the current resident set size of this process in bytes. On
+    platforms without /proc the peak resident set size is returned.
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError):
+        return peak_memory_usage()
+
+def memory_details():
+    """
+    Returns a dictionary describing the memory of this process in bytes:
+    the resident set size (rss), how much of it is shared with other
+    processes (shared, e.g. memory mapped files in the page cache) and the
+    proportional set size (pss) which divides each shared page among the
+    processes that map it. Values that the platform does not expose are
+    None (everything but rss outside of Linux).
+    """
+    details = {'rss': memory_usage(), 'shared': None, 'pss': None}
+
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            details['shared'] = int(f.read().split()[2]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError):
+        pass
+
+    for path in ('/proc/self/smaps_rollup', '/proc/self/smaps'):
+        try:
+            with open(path, 'r') as f:
+                details['pss'] = sum(
+                    int(line.split()[1]) * 1024
+                    for line in f if line.startswith('Pss:')
+                )
+            break
+        except (IOError, OSError, ValueError):
+            continue
+
+    return details
+
+def peak_memory_usage():
+    """
+    Returns the peak resident set size of this process in bytes.
+    """
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError, ValueError):
+        pass
+
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return usage        # Reported in bytes on OS X
+    return usage * 1024     # Reported in kilobytes on Linux
+
+def reset_peak_memory_usage():
+    """
+    Resets the peak resident set size to the current resident set size
+    where the platform allows it (Linux), otherwise does nothing.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except (IOError, OSError):
+        pass
+
+##########################################################################
+## Profiling
+##########################################################################
+
+def _profile(func, args):
+    """
+    Calls the function, returning the time and memory taken to do so.
+    """
+    reset_peak_memory_usage()
+    rss    = memory_usage()
+    start  = time.time()
+    result = func(*args)
+    delta  = time.time() - start
+
+    stats  = {
+        'seconds': delta,
+        'rss': memory_usage() - rss,
+        'peak': peak_memory_usage() - rss,
+    }
+
+    del result
+    return stats
+
+def profile(func, *args):
+    """
+    Calls the function in a fresh child process so that memory already
+    allocated by this process does not affect the measurement. Returns a
+    dictionary of the seconds taken, the bytes the resident set size grew
+    by while holding the result, and the peak growth during the call. The
+    function must be importable (defined at module level).
+    """
+    pool = mp.Pool(1)
+    try:
+        return pool.apply(_profile, (func, args))
+    finally:
+        pool.close()
+        pool.join()
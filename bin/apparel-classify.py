@@ -13,10 +13,18 @@
 """
 Command line script to execute classification commands.
 
-There are two primary commands:
+The primary commands are:
 
     - build (builds the model)
     - classify (classifies the input text)
+    - classify-file (classifies a CSV or JSON lines file of products)
+    - convert (converts a pickled model into a compact artifact)
+    - memory (reports per-worker memory with and without a shared model)
+    - serve (serves the classifier behind an HTTP JSON API)
+    - benchmark (measures startup, featurize, load, latency and batch performance)
+    - update (updates a model with newly labeled products)
+    - sweep (cross validates builds over a grid of hyperparameters)
+    - cascade (reports the accuracy and latency of cascade thresholds)
 
 These commands are dependent on configurations found in conf/apparel.yaml
 """
@@ -27,6 +35,8 @@ These commands are dependent on configurations found in conf/apparel.yaml
 
 import os
 import sys
+import json
+import time
 import argparse
 
 ## Helper to add apparel to Python Path for development
@@ -35,8 +45,10 @@ sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 import apparel
 
 from apparel.config import settings
-from apparel.build import ClassifierBuilder
-from apparel.classify import ApparelClassifier
+from apparel.reader import FORMATS, read_records
+
+## Heavy modules (NLTK, NumPy) are imported by each command as required so
+## that a command only pays for the imports that it actually uses.
 
 ##########################################################################
 ## Command Constants
@@ -46,6 +58,21 @@ DESCRIPTION = "An administrative utility for classification"
 EPILOG      = "Build and use classifiers all from one easy command"
 VERSION     = apparel.get_version()
 
+##########################################################################
+## Helpers
+##########################################################################
+
+def configure(args, *names):
+    """
+    Fills in the named options that weren't given on the command line from
+    the settings, so that the configuration files are only read by the
+    commands whose options aren't all given.
+    """
+    for name in names:
+        if getattr(args, name) is None:
+            setattr(args, name, getattr(settings, name))
+    return args
+
 ##########################################################################
 ## Administrative Commands
 ##########################################################################
@@ -54,12 +81,15 @@ def classify(args):
     """
     Classifies text using a prebuilt model.
     """
+    configure(args, 'model')
+    from apparel.classify import ApparelClassifier
+
     output     = []
-    classifier = ApparelClassifier(args.model)
+    classifier = ApparelClassifier(args.model, wordnet=not args.no_wordnet)
 
-    for text in args.text:
+    for text, labels in zip(args.text, classifier.classify_many(args.text)):
         output.append('"%s" is classified as:' % text)
-        for cls in classifier.classify(text):
+        for cls in labels:
             output.append("    %s (%0.4f)" % cls)
         output.append("")
 
@@ -70,13 +100,308 @@ def classify(args):
 
     return "\n".join(output)
 
+def classify_file(args):
+    """
+    Classifies a CSV or JSON lines file of products in chunks, writing a
+    JSON line per product (the input record with its classification).
+    """
+    configure(args, 'model')
+    from apparel.classify import ApparelClassifier
+    from apparel.parallel import ClassifierPool
+
+    options = {
+        'mmap': args.mmap, 'cache_size': args.cache_size, 'cache_ttl': args.cache_ttl,
+        'cascade': args.cascade, 'dedupe': args.dedupe, 'dedupe_size': args.dedupe_size,
+        'wordnet': not args.no_wordnet,
+    }
+
+    if args.workers > 1:
+        classifier = ClassifierPool(args.model, processes=args.workers, **options)
+    else:
+        classifier = ApparelClassifier(args.model, **options)
+
+    records    = read_records(args.input, args.format)
+    output     = open(args.output, 'w') if args.output else sys.stdout
+
+    start = time.time()
+    count = 0
+
+    try:
+        for record, labels in classifier.classify_stream(records, args.chunksize, args.skip_invalid):
+            record['classification'] = labels
+            output.write(json.dumps(record) + "\n")
+
+            count += 1
+            if count % args.chunksize == 0:
+                output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if args.workers > 1:
+            classifier.close()
+
+    delta   = time.time() - start
+    rate    = count / delta if delta > 0 else 0.0
+    summary = "Classified %i rows in %0.3f seconds (%0.1f rows/sec)" % (count, delta, rate)
+
+    if args.skip_invalid:
+        summary += "\nSkipped %i of %i rows without a product name" % (
+            classifier.validated['skipped'], classifier.validated['records']
+        )
+
+    # The stats of pooled workers stay in their processes and aren't reported
+    if args.workers <= 1 and args.cascade is not None:
+        stats = classifier.cascade_stats()
+        summary += "\nEscalated %i of %i rows to the full model (%0.1f%%) below probability %0.2f" % (
+            stats['escalated'], stats['records'], 100 * (stats['rate'] or 0.0), stats['threshold']
+        )
+
+    if args.workers <= 1 and args.dedupe is not None:
+        stats = classifier.dedupe_stats()
+        summary += "\nReused the results of %i of %i lookups (%0.1f%%, %i exact) at Jaccard %0.2f" % (
+            stats['hits'], stats['hits'] + stats['misses'], 100 * (stats['reuse_rate'] or 0.0),
+            stats['exact'], stats['threshold']
+        )
+
+    return summary
+
+def convert(args):
+    """
+    Converts a pickled model into a compact artifact, then reports the
+    time and memory taken to load the model from each format.
+    """
+    from apparel.build import lemma_table
+    from apparel.features import ProductFeatures
+    from apparel.utils import profile
+    from apparel.model import CompiledModel, artifact_path, load_model, load_pickle
+
+    output = args.output or artifact_path(args.model)
+    model  = CompiledModel.from_pickle(args.model)
+
+    # Store the lemma table of the training corpus if it is available
+    if args.corpus:
+        model.lemmas = lemma_table(args.corpus, ProductFeatures())
+
+    # Profile the pickle itself (not any existing artifact) before writing
+    loads = [('pickle', profile(load_pickle, args.model))]
+    model.save(output)
+    loads.append(('artifact', profile(load_model, output)))
+
+    lines = ["Wrote compact artifact to %s" % output, ""]
+    for name, stats in loads:
+        lines.append(
+            "    %-8s loaded in %0.3f seconds using %0.1f MB (%0.1f MB peak)" %
+            (name, stats['seconds'], stats['rss'] / 1048576.0, stats['peak'] / 1048576.0)
+        )
+
+    return "\n".join(lines)
+
+def memory(args):
+    """
+    Reports the memory used by each of a number of classifier workers with
+    and without memory mapping (sharing) the weights and tables of the model.
+    """
+    configure(args, 'model')
+    from apparel.parallel import worker_memory
+
+    def mb(nbytes):
+        if nbytes is None: return "%11s" % "n/a"
+        return "%8.1f MB" % (nbytes / 1048576.0)
+
+    output = []
+
+    for mmap in (False, True):
+        output.append("%s (%i workers):" % (
+            "Memory mapped" if mmap else "Private copies", args.workers
+        ))
+        output.append("    %-8s %11s %11s %11s" % ("worker", "rss", "shared", "pss"))
+        for idx, stats in enumerate(worker_memory(args.model, args.workers, mmap)):
+            output.append("    %-8i %s %s %s" % (
+                idx, mb(stats['rss']), mb(stats['shared']), mb(stats['pss'])
+            ))
+        output.append("")
+
+    return "\n".join(output)
+
+def serve(args):
+    """
+    Serves a warm classifier behind an HTTP JSON API until interrupted.
+    """
+    configure(args, 'model')
+    from apparel.classify import ApparelClassifier
+    from apparel.instrument import Instrument
+    from apparel.server import create_server
+
+    classifier = ApparelClassifier(
+        args.model, mmap=args.mmap, cache_size=args.cache_size, cache_ttl=args.cache_ttl,
+        instrument=Instrument() if args.instrument else None, cascade=args.cascade,
+        dedupe=args.dedupe, dedupe_size=args.dedupe_size, wordnet=not args.no_wordnet,
+    )
+    server = create_server(
+        classifier, args.host, args.port, args.window / 1000.0,
+        args.max_batch, quiet=not settings.debug,
+    )
+
+    print "Serving classifier on http://%s:%i/ (Ctrl+C to stop)" % server.server_address
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    return "Server stopped"
+
+def benchmark(args):
+    """
+    Runs benchmarks on synthetic products and reports the results as JSON,
+    or compares them with a baseline, failing if any measurement regressed.
+    """
+    configure(args, 'model')
+    from apparel import benchmark as bench
+
+    suites  = bench.SUITES if args.suite == 'all' else (args.suite,)
+    results = bench.run(
+        suites, args.model, count=args.records, seed=args.seed,
+        repeat=args.repeat, batchsize=args.batchsize,
+    )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if not args.baseline:
+        return json.dumps(results, indent=2, sort_keys=True)
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+
+    thresholds  = bench.parse_thresholds(args.threshold)
+    comparison  = bench.compare(results, baseline, thresholds)
+    regressions = [item for item in comparison if item['regression']]
+
+    output = ["Compared with the baseline in %s:" % args.baseline]
+    for item in comparison:
+        output.append("    %-32s %12.4f %12.4f %+7.1f%%%s" % (
+            item['metric'], item['baseline'], item['current'],
+            item['change'] * 100, "  REGRESSION" if item['regression'] else "",
+        ))
+
+    if regressions:
+        raise Exception("\n".join(output) + "\n%i measurements regressed" % len(regressions))
+    return "\n".join(output)
+
+def cascade(args):
+    """
+    Reports the accuracy, escalation rate and latency of classifying the
+    labeled products of a file with the full model and each cascade
+    threshold.
+    """
+    configure(args, 'model')
+    from apparel import benchmark as bench
+
+    records = list(read_records(args.input, args.format))
+    results = bench.cascade(args.model, records, args.threshold, repeat=args.repeat)
+
+    output = ["%10s %10s %11s %10s %10s %10s" % (
+        "Threshold", "Accuracy", "Escalation", "p50 (ms)", "p99 (ms)", "Mean (ms)"
+    )]
+    for result in results:
+        output.append("%10s %10.4f %11.4f %10.4f %10.4f %10.4f" % (
+            result['threshold'] or "full", result['accuracy'], result['escalation'],
+            result['p50'], result['p99'], result['mean'],
+        ))
+    return "\n".join(output)
+
 def build(args):
     """
     Build a classifier model and write to a pickle
     """
-    builder = ClassifierBuilder(corpus=args.corpus, outpath=args.outpath)
+    configure(args, 'corpus', 'cache', 'buckets')
+    from apparel.build import ClassifierBuilder
+
+    builder = ClassifierBuilder(
+        corpus=args.corpus, outpath=args.outpath, workers=args.workers,
+        cache=args.cache, folds=args.folds, stratified=args.stratified,
+        seed=args.seed, algorithm=args.algorithm, sigma=args.sigma,
+        buckets=args.buckets, compare=args.compare_buckets,
+        min_df=args.min_df, top_n=args.top_n, cascade=args.cascade,
+    )
     builder.build()
-    return "Build Complete!"
+
+    output = ["Build Complete!"]
+    if builder.pruning:
+        output.append("Pruned %(before)i features to %(after)i" % builder.pruning)
+    if builder.hashing:
+        output.append("%12s %10s %10s %10s %9s %12s" % (
+            "Buckets", "Features", "Collisions", "Accuracy", "Change", "Weights (MB)"
+        ))
+        for mode in builder.hashing:
+            output.append("%12s %10i %10i %10.4f %+9.4f %12.2f" % (
+                mode['buckets'] or "exact", mode['features'], mode['collisions'],
+                mode['accuracy'], mode['change'], mode['weights'] / 1048576.0,
+            ))
+    return "\n".join(output)
+
+def update(args):
+    """
+    Update a classifier model with newly labeled products
+    """
+    configure(args, 'model', 'cache')
+    from apparel.build import ClassifierBuilder
+
+    builder = ClassifierBuilder(
+        corpus=args.corpus, parent=args.model, outpath=args.outpath,
+        workers=args.workers, cache=args.cache, folds=args.folds,
+        validate=not args.no_validate, seed=args.seed, sigma=args.sigma,
+    )
+    builder.build()
+    return "Updated %s to %s" % (args.model, builder.model_path)
+
+def sweep(args):
+    """
+    Sweep the hyperparameters of a build and report the ranked candidates
+    """
+    configure(args, 'corpus', 'cache')
+    from apparel.build import ClassifierBuilder
+    from apparel.sweep import Sweep
+
+    builder = ClassifierBuilder(
+        corpus=args.corpus, outpath=args.outpath, workers=args.workers,
+        folds=args.folds, stratified=args.stratified, seed=args.seed,
+        algorithm=args.algorithm, cache=args.cache,
+    )
+
+    grid = {
+        'sigma': args.sigma,
+        'min_df': args.min_df,
+        'top_n': [n or None for n in args.top_n],
+        'fields': [tuple(fields.split(',')) for fields in args.fields],
+    }
+
+    search  = Sweep(builder, grid)
+    results = search.run()
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(search.report(), f, indent=2)
+
+    output = ["%4s %6s %6s %6s %-26s %9s %10s %12s %9s %11s" % (
+        "Rank", "Sigma", "MinDF", "TopN", "Fields", "Accuracy",
+        "Train (s)", "Infer (ms)", "Features", "Weights (MB)",
+    )]
+    for result in results:
+        output.append("%4i %6.2f %6i %6s %-26s %9.4f %10.3f %12.4f %9i %11.2f" % (
+            result['rank'], result['sigma'], result['min_df'], result['top_n'] or "-",
+            ",".join(result['fields']), result['accuracy'], result['training'],
+            result['inference'] * 1000, result['features'], result['weights'] / 1048576.0,
+        ))
+
+    if args.promote:
+        search.promote()
+        output.append("Promoted rank 1 to %s" % builder.model_path)
+    return "\n".join(output)
 
 ##########################################################################
 ## Main method
@@ -92,15 +417,129 @@ if __name__ == '__main__':
     classify_parser = subparsers.add_parser('classify', help='Classify text using a prebuilt model')
     classify_parser.add_argument('text', nargs='+', help='Text to classify, surrounded by quotes')
     classify_parser.add_argument('--explain', default=False, action='store_true', help='Print out an explanation of the classification')
-    classify_parser.add_argument('--model', default=settings.get('model'), metavar='PATH', help='Specify the path to the pickled classifier')
+    classify_parser.add_argument('--no-wordnet', default=False, action='store_true', help='Never load WordNet; words not in the lemma table of the model are not lemmatized')
+    classify_parser.add_argument('--model', default=None, metavar='PATH', help='Specify the path to the pickled classifier')
     classify_parser.set_defaults(func=classify)
 
+    # Classify File Command
+    classify_file_parser = subparsers.add_parser('classify-file', help='Classify a CSV or JSON lines file of products')
+    classify_file_parser.add_argument('input', metavar='PATH', help='File (optionally compressed), directory or glob of products to classify, or - for stdin')
+    classify_file_parser.add_argument('-f', '--format', choices=FORMATS, default=None, help='Format of the input (guessed from the extension by default)')
+    classify_file_parser.add_argument('-o', '--output', metavar='PATH', default=None, help='Where to write the JSON lines results (stdout by default)')
+    classify_file_parser.add_argument('-c', '--chunksize', metavar='N', type=int, default=1000, help='Number of products to classify per batch')
+    classify_file_parser.add_argument('-j', '--workers', metavar='N', type=int, default=1, help='Number of worker processes to classify with')
+    classify_file_parser.add_argument('--cache-size', type=int, default=0, metavar='N', help='Cache the results of up to N distinct featuresets per worker')
+    classify_file_parser.add_argument('--cache-ttl', type=float, default=None, metavar='SEC', help='Expire cached results after SEC seconds')
+    classify_file_parser.add_argument('--cascade', type=float, default=None, metavar='P', help='Score names with the name-only model first, escalating below probability P (the escalation rate is reported without --workers)')
+    classify_file_parser.add_argument('--dedupe', type=float, default=None, metavar='J', help='Reuse the results of recent products with Jaccard similarity of at least J (the reuse rate is reported without --workers)')
+    classify_file_parser.add_argument('--dedupe-size', type=int, default=10000, metavar='N', help='Number of recent products to reuse the results of')
+    classify_file_parser.add_argument('--skip-invalid', default=False, action='store_true', help='Skip (and count) rows without a product name rather than failing')
+    classify_file_parser.add_argument('--mmap', default=False, action='store_true', help='Memory map the model weights and tables to share them between workers')
+    classify_file_parser.add_argument('--no-wordnet', default=False, action='store_true', help='Never load WordNet; words not in the lemma table of the model are not lemmatized')
+    classify_file_parser.add_argument('--model', default=None, metavar='PATH', help='Specify the path to the pickled classifier')
+    classify_file_parser.set_defaults(func=classify_file)
+
+    # Convert Command
+    convert_parser = subparsers.add_parser('convert', help='Convert a pickled model into a compact artifact')
+    convert_parser.add_argument('model', metavar='PATH', help='Path to the pickled classifier to convert')
+    convert_parser.add_argument('-o', '--output', metavar='PATH', default=None, help='Directory to write the artifact to (alongside the pickle by default)')
+    convert_parser.add_argument('--corpus', metavar='PATH', default=None, help='CSV corpus the model was trained on, to store its lemma table')
+    convert_parser.set_defaults(func=convert)
+
+    # Memory Command
+    memory_parser = subparsers.add_parser('memory', help='Report per-worker memory with and without a shared model artifact')
+    memory_parser.add_argument('-j', '--workers', metavar='N', type=int, default=4, help='Number of classifier workers to measure')
+    memory_parser.add_argument('--model', default=None, metavar='PATH', help='Specify the path to the model artifact')
+    memory_parser.set_defaults(func=memory)
+
+    # Serve Command
+    serve_parser = subparsers.add_parser('serve', help='Serve the classifier behind an HTTP JSON API')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='Address to bind the server to')
+    serve_parser.add_argument('-p', '--port', type=int, default=8080, help='Port to bind the server to')
+    serve_parser.add_argument('-w', '--window', metavar='MS', type=float, default=5.0, help='Milliseconds to wait to coalesce requests into a batch')
+    serve_parser.add_argument('-b', '--max-batch', metavar='N', type=int, default=64, help='Maximum number of products to score per batch')
+    serve_parser.add_argument('--cache-size', type=int, default=10000, metavar='N', help='Cache the results of up to N distinct featuresets (0 to disable)')
+    serve_parser.add_argument('--cache-ttl', type=float, default=None, metavar='SEC', help='Expire cached results after SEC seconds')
+    serve_parser.add_argument('--instrument', default=False, action='store_true', help='Time each stage of classification and report it in /metrics')
+    serve_parser.add_argument('--cascade', type=float, default=None, metavar='P', help='Score names with the name-only model first, escalating below probability P')
+    serve_parser.add_argument('--dedupe', type=float, default=None, metavar='J', help='Reuse the results of recent products with Jaccard similarity of at least J')
+    serve_parser.add_argument('--dedupe-size', type=int, default=10000, metavar='N', help='Number of recent products to reuse the results of')
+    serve_parser.add_argument('--mmap', default=False, action='store_true', help='Memory map the model weights and tables')
+    serve_parser.add_argument('--no-wordnet', default=False, action='store_true', help='Never load WordNet; words not in the lemma table of the model are not lemmatized')
+    serve_parser.add_argument('--model', default=None, metavar='PATH', help='Specify the path to the model artifact or pickle')
+    serve_parser.set_defaults(func=serve)
+
+    # Benchmark Command
+    benchmark_parser = subparsers.add_parser('benchmark', help='Measure performance to catch regressions')
+    benchmark_parser.add_argument('suite', nargs='?', choices=('startup', 'featurize', 'load', 'latency', 'scoring', 'batch', 'all'), default='all', help='Which benchmarks to run')
+    benchmark_parser.add_argument('-n', '--repeat', metavar='N', type=int, default=5, help='Number of times to repeat each measurement')
+    benchmark_parser.add_argument('-r', '--records', metavar='N', type=int, default=5000, help='Number of synthetic products to benchmark with')
+    benchmark_parser.add_argument('-c', '--batchsize', metavar='N', type=int, default=1000, help='Number of products to classify per batch')
+    benchmark_parser.add_argument('--seed', metavar='N', type=int, default=42, help='Random seed used to generate the synthetic products')
+    benchmark_parser.add_argument('-o', '--output', metavar='PATH', default=None, help='Also write the JSON results to a file (e.g. to use as a baseline)')
+    benchmark_parser.add_argument('-b', '--baseline', metavar='PATH', default=None, help='Compare the results with a baseline and fail on regressions')
+    benchmark_parser.add_argument('-t', '--threshold', metavar='[METRIC=]FRAC', action='append', help='Fractional change that is a regression, for all or one metric (default 0.2)')
+    benchmark_parser.add_argument('--model', default=None, metavar='PATH', help='Specify the path to the model artifact or pickle')
+    benchmark_parser.set_defaults(func=benchmark)
+
+    # Cascade Command
+    cascade_parser = subparsers.add_parser('cascade', help='Report the accuracy and latency of cascade thresholds')
+    cascade_parser.add_argument('input', metavar='PATH', help='File of labeled products (with a category) to evaluate')
+    cascade_parser.add_argument('-t', '--threshold', metavar='P', type=float, nargs='+', default=[0.5, 0.7, 0.9], help='Top label probabilities below which to escalate to the full model')
+    cascade_parser.add_argument('-f', '--format', choices=FORMATS, default=None, help='Format of the input (guessed from the extension by default)')
+    cascade_parser.add_argument('-n', '--repeat', metavar='N', type=int, default=1, help='Number of times to time each product')
+    cascade_parser.add_argument('--model', default=None, metavar='PATH', help='Specify the path to the model built with --cascade')
+    cascade_parser.set_defaults(func=cascade)
+
     # Build Command
     build_parser = subparsers.add_parser('build', help='Build a classifier model and write to a pickle')
-    build_parser.add_argument('--corpus', default=settings.get('corpus'), type=str, help='Location of the CSV corpus to train from.')
+    build_parser.add_argument('--corpus', default=None, type=str, help='Location of the corpus to train from: a CSV or JSON lines file (optionally gzip, bz2 or xz compressed), or a directory or glob of them.')
     build_parser.add_argument('-o', '--outpath', metavar='PATH', type=str, help="Where to write the pickle to.", default='fixtures/')
+    build_parser.add_argument('-j', '--workers', metavar='N', type=int, default=1, help='Number of worker processes to extract features with')
+    build_parser.add_argument('--cache', default=None, metavar='PATH', help='Directory to cache extracted features in between builds')
+    build_parser.add_argument('-a', '--algorithm', choices=('megam', 'numpy'), default='megam', help='Train with the megam binary or natively with NumPy')
+    build_parser.add_argument('--sigma', metavar='S', type=float, default=1.0, help='Standard deviation of the Gaussian prior on the weights')
+    build_parser.add_argument('--buckets', metavar='N', type=int, default=None, help='Hash features into N buckets to bound the size of the model')
+    build_parser.add_argument('--min-df', metavar='N', type=int, default=1, help='Prune features that are in fewer than N products')
+    build_parser.add_argument('--top-n', metavar='N', type=int, default=None, help='Prune features that are not among the N most frequent of a category')
+    build_parser.add_argument('--cascade', default=False, action='store_true', help='Also build a name-only model for cascade classification')
+    build_parser.add_argument('--compare-buckets', metavar='N', type=int, nargs='+', default=None, help='Report the accuracy of hashing into N buckets against the exact vocabulary')
+    build_parser.add_argument('-k', '--folds', metavar='K', type=int, default=10, help='Number of folds to cross validate the model with')
+    build_parser.add_argument('--stratified', default=False, action='store_true', help='Stratify the cross validation folds by category')
+    build_parser.add_argument('--seed', metavar='N', type=int, default=None, help='Random seed used to shuffle the cross validation folds')
     build_parser.set_defaults(func=build)
 
+    # Update Command
+    update_parser = subparsers.add_parser('update', help='Update a model with newly labeled products')
+    update_parser.add_argument('corpus', metavar='PATH', help='CSV or JSON lines file(s) of the newly labeled products to update the model with')
+    update_parser.add_argument('--model', default=None, metavar='PATH', help='Specify the path to the model to update')
+    update_parser.add_argument('-o', '--outpath', metavar='PATH', type=str, help="Where to write the updated model to.", default='fixtures/')
+    update_parser.add_argument('-j', '--workers', metavar='N', type=int, default=1, help='Number of worker processes to train with')
+    update_parser.add_argument('--cache', default=None, metavar='PATH', help='Directory to cache extracted features in between builds')
+    update_parser.add_argument('--sigma', metavar='S', type=float, default=1.0, help='How far the weights may move from those of the model')
+    update_parser.add_argument('-k', '--folds', metavar='K', type=int, default=10, help='Number of folds to validate the update with')
+    update_parser.add_argument('--no-validate', default=False, action='store_true', help='Do not cross validate the update')
+    update_parser.add_argument('--seed', metavar='N', type=int, default=None, help='Random seed used to shuffle the cross validation folds')
+    update_parser.set_defaults(func=update)
+
+    # Sweep Command
+    sweep_parser = subparsers.add_parser('sweep', help='Cross validate builds over a grid of hyperparameters')
+    sweep_parser.add_argument('--corpus', default=None, type=str, help='Location of the corpus to train from: a CSV or JSON lines file (optionally gzip, bz2 or xz compressed), or a directory or glob of them.')
+    sweep_parser.add_argument('-o', '--outpath', metavar='PATH', type=str, help="Where to write the promoted model to.", default='fixtures/')
+    sweep_parser.add_argument('--cache', default=None, metavar='PATH', help='Directory to cache the extracted features of each field in between sweeps')
+    sweep_parser.add_argument('-j', '--workers', metavar='N', type=int, default=1, help='Number of worker processes to extract features and train with')
+    sweep_parser.add_argument('-a', '--algorithm', choices=('megam', 'numpy'), default='numpy', help='Train with the megam binary or natively with NumPy')
+    sweep_parser.add_argument('--sigma', metavar='S', type=float, nargs='+', default=[0.5, 1.0, 2.0], help='Standard deviations of the Gaussian prior to try')
+    sweep_parser.add_argument('--min-df', metavar='N', type=int, nargs='+', default=[1, 2], help='Minimum document frequencies of features to try')
+    sweep_parser.add_argument('--top-n', metavar='N', type=int, nargs='+', default=[0], help='Features kept per category to try (0 keeps all)')
+    sweep_parser.add_argument('--fields', metavar='F,F', nargs='+', default=['name', 'name,keywords', 'name,description', 'name,description,keywords'], help='Comma separated product fields to try (must include name)')
+    sweep_parser.add_argument('-k', '--folds', metavar='K', type=int, default=5, help='Number of folds to cross validate each candidate with')
+    sweep_parser.add_argument('--stratified', default=False, action='store_true', help='Stratify the cross validation folds by category')
+    sweep_parser.add_argument('--seed', metavar='N', type=int, default=42, help='Random seed used to shuffle the cross validation folds')
+    sweep_parser.add_argument('-r', '--report', metavar='PATH', default=None, help='Write the ranked results as JSON to PATH')
+    sweep_parser.add_argument('--promote', default=False, action='store_true', help='Build the best candidate and write it to the outpath')
+    sweep_parser.set_defaults(func=sweep)
+
     # Handle input from the command line
     args = parser.parse_args()              # Parse the arguments
     try:
@@ -0,0 +1,95 @@
+# tests.test_benchmark
+# Tests for the performance regression benchmarks
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 21:12:48 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: test_benchmark.py [] benjamin@bengfort.com $
+
+"""
+Tests for the performance regression benchmarks
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import json
+import unittest
+
+from apparel import benchmark
+from apparel.classify import ApparelClassifier
+from apparel.features import ProductFeatures
+
+from tests.test_classify import MODEL, IdentityLemmatizer
+
+##########################################################################
+## Benchmark Test Case
+##########################################################################
+
+class BenchmarkTests(unittest.TestCase):
+
+    def test_synthetic_products(self):
+        """
+        The same seed generates the same products in every category
+        """
+        products = list(benchmark.synthetic_products(200, seed=7))
+        self.assertEqual(products, list(benchmark.synthetic_products(200, seed=7)))
+        self.assertEqual(
+            set(product['category'] for product in products),
+            set(benchmark.CATEGORIES)
+        )
+        for product in products:
+            self.assertTrue(product['name'] and product['description'])
+
+    def test_run(self):
+        """
+        The classifier suites report JSON serializable measurements
+        """
+        featurizer = ProductFeatures(stoplist=["the"], lemmatizer=IdentityLemmatizer())
+        classifier = ApparelClassifier(MODEL, featurizer)
+        results    = benchmark.run(
+            ('featurize', 'latency', 'scoring', 'batch'), count=50, repeat=1,
+            batchsize=20, classifier=classifier,
+        )
+
+        self.assertEqual(json.loads(json.dumps(results)), results)
+        self.assertEqual(results['featurize']['records'], 50)
+        self.assertEqual(results['latency']['count'], 5)
+        self.assertEqual(results['batch']['batchsize'], 20)
+        self.assertGreater(results['batch']['rate'], 0)
+        self.assertLessEqual(results['latency']['p50'], results['latency']['p99'])
+        self.assertEqual(results['scoring']['compiled']['records'], 5)
+        self.assertGreater(results['scoring']['speedup'], 0)
+
+    def test_compare(self):
+        """
+        Measurements that get worse by more than the threshold regress
+        """
+        baseline = {
+            'environment': {'records': 100},
+            'batch': {'rate': 1000.0, 'seconds': 1.0},
+            'latency': {'p50': 1.0, 'p99': 2.0, 'max': 3.0},
+        }
+        results  = {
+            'batch': {'rate': 700.0, 'seconds': 0.9},
+            'latency': {'p50': 1.1, 'p99': 3.0, 'max': 30.0},
+        }
+
+        comparison = benchmark.compare(results, baseline)
+        regressed  = dict((item['metric'], item['regression']) for item in comparison)
+        self.assertEqual(regressed, {
+            'batch.rate': True, 'batch.seconds': False,
+            'latency.p50': False, 'latency.p99': True,
+        })
+
+        thresholds = benchmark.parse_thresholds(['0.5', 'latency.p99=0.1'])
+        self.assertEqual(thresholds, {'default': 0.5, 'latency.p99': 0.1})
+        comparison = benchmark.compare(results, baseline, thresholds)
+        self.assertEqual(
+            [item['metric'] for item in comparison if item['regression']],
+            ['latency.p99']
+        )
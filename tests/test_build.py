@@ -0,0 +1,515 @@
+# tests.test_build
+# Tests for the classifier model builder
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 16:41:55 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: test_build.py [] benjamin@bengfort.com $
+
+"""
+Tests for the classifier model builder
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import gzip
+import json
+import random
+import shutil
+import tempfile
+import unittest
+import unicodecsv as csv
+
+from functools import partial
+from collections import Counter
+from apparel import build
+from apparel.config import LazySettings
+from apparel.configuration import ApparelConfiguration
+from apparel.build import ClassifierBuilder, kfolds, lemma_table
+from apparel.features import ProductFeatures
+from apparel.parallel import FoldValidation
+from apparel.classify import ApparelClassifier
+from apparel import benchmark
+from apparel.model import load_model, cascade_path
+from nltk.classify import NaiveBayesClassifier
+from tests.test_classify import IdentityLemmatizer
+
+##########################################################################
+## Fixtures
+##########################################################################
+
+VOCABULARY = {
+    "tops": ["shirt", "tee", "blouse", "polo", "tank", "cotton", "sleeve"],
+    "shoes": ["boot", "sneaker", "loafer", "heel", "sandal", "leather", "sole"],
+    "bottoms": ["jean", "pant", "short", "chino", "skirt", "denim", "waist"],
+}
+
+COMMON = ["small", "large", "navy", "black", "red", "classic", "new"]
+
+def make_featurizer():
+    return ProductFeatures(stoplist=["a", "the"], lemmatizer=IdentityLemmatizer())
+
+def make_corpus(path, rows=120, seed=42):
+    """
+    Writes a small synthetic labeled corpus to the given path.
+    """
+    rand = random.Random(seed)
+    with open(path, 'wb') as f:
+        writer = csv.writer(f)
+        writer.writerow(["category", "name", "description", "keywords"])
+        for idx in xrange(rows):
+            label = sorted(VOCABULARY)[idx % len(VOCABULARY)]
+            words = VOCABULARY[label] + COMMON
+            writer.writerow([
+                label,
+                " ".join(rand.sample(words, 3)).title(),
+                "The " + " ".join(rand.sample(words, 6)),
+                ", ".join(rand.sample(words, 2)),
+            ])
+
+##########################################################################
+## Builder Test Case
+##########################################################################
+
+class ClassifierBuilderTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.corpus = os.path.join(self.tmpdir, "corpus.csv")
+        make_corpus(self.corpus)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def builder(self, **kwargs):
+        kwargs.setdefault('outpath', self.tmpdir)
+        kwargs.setdefault('featurizer', make_featurizer())
+        kwargs.setdefault('cache', None)
+        return ClassifierBuilder(self.corpus, **kwargs)
+
+    def test_featureset(self):
+        """
+        The featureset pairs each corpus row's features with its label
+        """
+        featureset = self.builder().featureset()
+        self.assertEqual(len(featureset), 120)
+        feats, label = featureset[0]
+        self.assertEqual(label, "bottoms")
+        self.assertTrue(all(val is True for val in feats.values()))
+        self.assertTrue(any(key.startswith("KEYWORD(") for key in feats))
+
+    def test_build_numpy(self):
+        """
+        Building with the native trainer writes a usable model and history
+        """
+        builder = self.builder(algorithm='numpy', folds=3, seed=42)
+        builder.build()
+
+        with open(builder.info_path, 'r') as f:
+            details = json.load(f)
+
+        self.assertEqual(details['training']['algorithm'], 'numpy')
+        self.assertEqual(details['training']['iterations'], len(builder.history))
+        self.assertGreater(details['accuracy'], 0.9)
+        self.assertGreater(details['memory']['peak'], details['memory']['featureset'])
+        self.assertIsNotNone(details['memory']['validation'])
+
+        classifier = ApparelClassifier(builder.model_path, make_featurizer())
+        self.assertEqual(classifier.classify("Navy Denim Jean")[0][0], "bottoms")
+
+    def test_build_hashing(self):
+        """
+        A model of hashed features records its buckets with the model
+        """
+        builder = self.builder(
+            algorithm='numpy', folds=3, seed=42,
+            featurizer=ProductFeatures(
+                stoplist=["a", "the"], lemmatizer=IdentityLemmatizer(), buckets=32
+            ),
+        )
+        builder.build()
+
+        with open(builder.info_path, 'r') as f:
+            details = json.load(f)
+
+        self.assertEqual(details['features']['buckets'], 32)
+        self.assertLessEqual(details['features']['count'], 32)
+
+        self.assertEqual(load_model(builder.model_path).buckets, 32)
+        classifier = ApparelClassifier(builder.model_path, builder.featurizer)
+        self.assertEqual(classifier.classify("Navy Denim Jean")[0][0], "bottoms")
+        self.assertRaises(
+            ValueError, self.builder, compare=[16], featurizer=builder.featurizer,
+            outpath=os.path.join(self.tmpdir, "compare"),
+        )
+
+    def test_compare_hashing(self):
+        """
+        Hashing is compared with the exact vocabulary on the same folds
+        """
+        builder = self.builder(algorithm='numpy', folds=3, seed=42)
+        report  = builder.compare_hashing([64, 4])
+
+        self.assertEqual([mode['buckets'] for mode in report], [None, 4, 64])
+        self.assertEqual(report[0]['features'], len(builder.featureset().vocabulary))
+        self.assertEqual(report[0]['collisions'], 0)
+        self.assertEqual(report[1]['features'], 4)
+        self.assertLess(report[1]['accuracy'], report[0]['accuracy'])
+        for mode in report:
+            self.assertAlmostEqual(mode['change'], mode['accuracy'] - report[0]['accuracy'])
+
+    def test_pruning(self):
+        """
+        Pruned builds record the vocabulary and effect of pruning
+        """
+        builder = self.builder(algorithm='numpy', folds=3, seed=42, min_df=30, top_n=10)
+        builder.build()
+
+        with open(builder.info_path, 'r') as f:
+            pruning = json.load(f)['features']['pruning']
+
+        self.assertEqual(pruning['before'], len(builder._unpruned.vocabulary))
+        self.assertEqual(pruning['after'], len(builder.featureset().vocabulary))
+        self.assertLess(pruning['after'], pruning['before'])
+        self.assertEqual(pruning['after'], builder.features)
+        self.assertLess(pruning['pruned']['weights'], pruning['unpruned']['weights'])
+        self.assertEqual(pruning['pruned']['accuracy'], builder.accuracy)
+        self.assertGreater(pruning['unpruned']['accuracy'], 0.9)
+
+    def test_cascade(self):
+        """
+        Cascade builds write a name model that escalates below a threshold
+        """
+        builder = self.builder(algorithm='numpy', validate=False, cascade=True)
+        builder.build()
+
+        with open(builder.info_path, 'r') as f:
+            details = json.load(f)
+        self.assertEqual(details['cascade']['artifact'], cascade_path(builder.model_path))
+        self.assertEqual(load_model(cascade_path(builder.model_path)).fields, ['name'])
+
+        with open(self.corpus, 'rb') as f:
+            records = list(csv.DictReader(f))
+
+        full = ApparelClassifier(builder.model_path, make_featurizer())
+        expected = full.classify_many(records)
+
+        always = ApparelClassifier(builder.model_path, make_featurizer(), cascade=1.01)
+        self.assertEqual(always.classify_many(records), expected)
+        self.assertEqual(always.cascade_stats()['rate'], 1.0)
+
+        never = ApparelClassifier(builder.model_path, make_featurizer(), cascade=0.0)
+        names = never.classify_many(records)
+        self.assertEqual(names[0], never.classify(records[0]['name'], records[0]['description']))
+        self.assertEqual(never.cascade_stats()['escalated'], 0)
+        self.assertIsNone(full.cascade_stats())
+
+        results = benchmark.cascade(
+            builder.model_path, records, [0.9], featurizer=make_featurizer()
+        )
+        self.assertEqual([result['threshold'] for result in results], [None, 0.9])
+        self.assertEqual(results[0]['escalation'], 1.0)
+        self.assertLessEqual(results[1]['escalation'], 1.0)
+
+        self.assertRaises(
+            ValueError, self.builder, cascade=True, fields=('name',),
+            outpath=os.path.join(self.tmpdir, "names"),
+        )
+
+    def test_update(self):
+        """
+        Updating a model adds new labels and records the parent revision
+        """
+        parent = self.builder(algorithm='numpy', validate=False)
+        parent.build()
+
+        updates = os.path.join(self.tmpdir, "updates.csv")
+        rand    = random.Random(42)
+        with open(updates, 'wb') as f:
+            writer = csv.writer(f)
+            writer.writerow(["category", "name"])
+            for idx in xrange(30):
+                label = "outerwear" if idx % 2 else "tops"
+                words = ["parka", "anorak", "down"] if idx % 2 else VOCABULARY["tops"]
+                writer.writerow([label, " ".join(rand.sample(words + COMMON, 3))])
+
+        for revision in (1, 2):
+            builder = ClassifierBuilder(
+                updates, parent=parent.model_path, outpath=self.tmpdir, folds=3,
+                featurizer=make_featurizer(), cache=None,
+            )
+            builder.build()
+            self.assertTrue(builder.model_path.endswith("-r%i.pickle" % revision))
+
+        with open(builder.info_path, 'r') as f:
+            details = json.load(f)
+
+        self.assertEqual(details['parent']['model'], parent.model_path)
+        self.assertEqual(details['parent']['info'], parent.info_path)
+        self.assertEqual(details['parent']['rows'], 30)
+        self.assertEqual(details['parent']['new_labels'], ["outerwear"])
+        self.assertGreater(details['parent']['new_features'], 0)
+        self.assertIsNotNone(details['accuracy'])
+
+        classifier = ApparelClassifier(builder.model_path, make_featurizer())
+        self.assertEqual(classifier.classify("Navy Down Parka")[0][0], "outerwear")
+        self.assertEqual(classifier.classify("Navy Denim Jean")[0][0], "bottoms")
+
+    def test_update_parent_configuration(self):
+        """
+        Updates hash into the buckets of the parent and train with numpy
+        """
+        parent = self.builder(
+            algorithm='numpy', validate=False, featurizer=ProductFeatures(
+                stoplist=["a", "the"], lemmatizer=IdentityLemmatizer(), buckets=32
+            ),
+        )
+        parent.build()
+
+        self.assertRaises(
+            ValueError, self.builder, parent=parent.model_path, algorithm='megam'
+        )
+
+        # The configured buckets are ignored in favor of those of the parent
+        def loader():
+            config = ApparelConfiguration()
+            config.configure({'buckets': 64})
+            return config
+
+        settings, features = build.settings, build.ProductFeatures
+        build.settings = LazySettings(loader)
+        build.ProductFeatures = partial(
+            ProductFeatures, stoplist=["a", "the"], lemmatizer=IdentityLemmatizer()
+        )
+        try:
+            builder = self.builder(parent=parent.model_path, featurizer=None)
+            self.assertEqual(builder.algorithm, 'numpy')
+            self.assertEqual(builder.featurizer.buckets, 32)
+            self.assertRaises(
+                ValueError, self.builder, parent=parent.model_path, buckets=64,
+                featurizer=None,
+            )
+        finally:
+            build.settings, build.ProductFeatures = settings, features
+
+    def test_unknown_algorithm(self):
+        """
+        Only megam and numpy training algorithms are supported
+        """
+        self.assertRaises(ValueError, self.builder, algorithm='gis')
+
+    def test_parallel_featureset(self):
+        """
+        Parallel featurization is identical to the serial featureset
+        """
+        serial   = self.builder().featureset()
+        parallel = self.builder(workers=3, chunksize=7)
+        self.assertEqual(list(parallel.featureset()), list(serial))
+        self.assertIsNotNone(parallel.feattime)
+
+    def test_sharded_corpus(self):
+        """
+        Compressed shards of a corpus have the same featureset and info
+        """
+        with open(self.corpus, 'rb') as f:
+            rows = list(csv.DictReader(f))
+
+        shards = os.path.join(self.tmpdir, "shards")
+        os.mkdir(shards)
+        with gzip.open(os.path.join(shards, "part-1.csv.gz"), 'wb') as f:
+            writer = csv.DictWriter(f, ["category", "name", "description", "keywords"])
+            writer.writeheader()
+            writer.writerows(rows[:50])
+        with open(os.path.join(shards, "part-2.jsonl"), 'wb') as f:
+            for row in rows[50:]:
+                f.write(json.dumps(row) + "\n")
+
+        serial  = self.builder().featureset()
+        builder = ClassifierBuilder(
+            os.path.join(shards, "part-*"), outpath=self.tmpdir,
+            featurizer=make_featurizer(), cache=None, algorithm='numpy',
+            validate=False, workers=2, chunksize=16,
+        )
+        self.assertEqual(list(builder.featureset()), list(serial))
+
+        builder.build()
+        with open(builder.info_path, 'r') as f:
+            info = json.load(f)
+        self.assertEqual(info['reader']['files'], 2)
+        self.assertEqual(info['reader']['rows'], 120)
+        self.assertGreater(info['timer']['rows_per_sec'], 0)
+        self.assertGreater(info['timer']['bytes_per_sec'], 0)
+
+    def test_defers_settings(self):
+        """
+        Builders passed a cache and buckets never load the settings
+        """
+        def loader():
+            raise AssertionError("The settings were loaded")
+
+        settings, build.settings = build.settings, LazySettings(loader)
+        try:
+            builder = self.builder(buckets=None)
+            self.assertIsNone(builder.cache)
+            self.assertRaises(AssertionError, ClassifierBuilder, self.corpus)
+        finally:
+            build.settings = settings
+
+    def test_featureset_cache(self):
+        """
+        An unchanged corpus reads its features from the disk cache
+        """
+        cache   = os.path.join(self.tmpdir, "cache")
+        builder = self.builder(cache=cache)
+        featureset = builder.featureset()
+        self.assertFalse(builder.cached)
+        self.assertEqual(len(os.listdir(cache)), 1)
+
+        builder = self.builder(cache=cache)
+        self.assertEqual(list(builder.featureset()), list(featureset))
+        self.assertTrue(builder.cached)
+
+    def test_featureset_cache_fields(self):
+        """
+        Builds of different fields keep their own cached features
+        """
+        cache = os.path.join(self.tmpdir, "cache")
+        names = self.builder(cache=cache, fields=('name',)).featureset()
+        full  = self.builder().featureset()
+
+        builder = self.builder(cache=cache)
+        self.assertEqual(list(builder.featureset()), list(full))
+        self.assertFalse(builder.cached)
+        self.assertGreater(len(full.vocabulary), len(names.vocabulary))
+
+        builder = self.builder(cache=cache, fields=('name',))
+        self.assertEqual(list(builder.featureset()), list(names))
+        self.assertTrue(builder.cached)
+
+        builder = self.builder(cache=cache)
+        self.assertEqual(list(builder.featureset()), list(full))
+        self.assertTrue(builder.cached)
+        self.assertEqual(len(os.listdir(cache)), 2)
+
+    def test_featureset_cache_invalidation(self):
+        """
+        Changing the corpus or the featurizer invalidates the cache
+        """
+        cache   = os.path.join(self.tmpdir, "cache")
+        self.builder(cache=cache).featureset()
+
+        featurizer = make_featurizer()
+        featurizer.stopwords = ["a", "the", "navy"]
+        builder = self.builder(cache=cache, featurizer=featurizer)
+        builder.featureset()
+        self.assertFalse(builder.cached)
+
+        make_corpus(self.corpus, rows=60)
+        builder = self.builder(cache=cache)
+        self.assertEqual(len(builder.featureset()), 60)
+        self.assertFalse(builder.cached)
+        self.assertEqual(len(os.listdir(cache)), 1)
+
+    def test_lemma_table(self):
+        """
+        The lemma table covers every word in the corpus text fields
+        """
+        featurizer = make_featurizer()
+        table = lemma_table(self.corpus, featurizer)
+        words = set(sum(VOCABULARY.values(), COMMON))
+        self.assertEqual(set(table) - set(["the", ","]), words)
+        self.assertTrue(all(table[word] == word for word in words))
+
+    def test_extracted_lemma_table(self):
+        """
+        The lemma table is recorded during extraction and cached with it
+        """
+        expected = lemma_table(self.corpus, make_featurizer())
+        cache    = os.path.join(self.tmpdir, "cache")
+
+        for workers in (1, 2):
+            builder = self.builder(cache=None, workers=workers, chunksize=16)
+            builder.featureset()
+            self.assertEqual(builder.lemma_table(), expected)
+            self.assertIsNone(builder.lemmatime)
+            self.assertIsNone(builder.featurizer.lemmatized)
+
+        self.builder(cache=cache).featureset()
+        builder = self.builder(cache=cache)
+        builder.featureset()
+        self.assertTrue(builder.cached)
+        self.assertIsNone(builder.reader)
+        self.assertEqual(builder.lemma_table(), expected)
+        self.assertIsNone(builder.lemmatime)
+
+##########################################################################
+## Cross Validation Test Case
+##########################################################################
+
+class CrossValidationTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        corpus = os.path.join(self.tmpdir, "corpus.csv")
+        make_corpus(corpus, rows=90)
+
+        builder = ClassifierBuilder(
+            corpus, outpath=self.tmpdir, featurizer=make_featurizer(), cache=None
+        )
+        self.featureset = builder.featureset()
+        self.labels = [label for _, label in self.featureset]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_kfolds_partition(self):
+        """
+        The folds partition the indices and are reproducible with a seed
+        """
+        folds = kfolds(self.labels, 4, seed=42)
+        self.assertEqual(len(folds), 4)
+        self.assertEqual(sorted(sum(folds, [])), range(90))
+        self.assertTrue(all(len(fold) in (22, 23) for fold in folds))
+        self.assertEqual(folds, kfolds(self.labels, 4, seed=42))
+        self.assertNotEqual(folds, kfolds(self.labels, 4, seed=7))
+
+    def test_kfolds_stratified(self):
+        """
+        Stratified folds have the same class balance as the corpus
+        """
+        for fold in kfolds(self.labels, 5, stratified=True, seed=42):
+            counts = Counter(self.labels[idx] for idx in fold)
+            self.assertEqual(set(counts.values()), set([6]))
+
+    def test_kfolds_bad_k(self):
+        """
+        Cannot split into fewer than two folds or more than instances
+        """
+        self.assertRaises(ValueError, kfolds, self.labels, 1)
+        self.assertRaises(ValueError, kfolds, self.labels, 91)
+
+    def test_parallel_validation(self):
+        """
+        Folds validated in a pool match folds validated serially
+        """
+        folds = kfolds(self.labels, 3, seed=42)
+        featureset = list(self.featureset)
+
+        serial = FoldValidation(featureset, NaiveBayesClassifier.train, folds)
+        pooled = FoldValidation(featureset, NaiveBayesClassifier.train, folds, 3)
+
+        expected, results = serial.get(), pooled.get()
+        self.assertEqual(featureset, list(self.featureset))
+        self.assertEqual(
+            [fold['accuracy'] for fold in results],
+            [fold['accuracy'] for fold in expected],
+        )
+        for fold in results:
+            self.assertEqual(fold['train_size'] + fold['test_size'], 90)
+        self.assertIsNotNone(pooled.elapsed)
@@ -0,0 +1,152 @@
+# tests.test_classify
+# Tests for the apparel classifier
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 15:31:08 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: test_classify.py [] benjamin@bengfort.com $
+
+"""
+Tests for the apparel classifier
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import unittest
+
+from apparel.classify import ApparelClassifier
+from apparel.features import ProductFeatures
+from apparel.parallel import ClassifierPool
+
+##########################################################################
+## Fixtures
+##########################################################################
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "fixtures")
+MODEL    = os.path.join(FIXTURES, "model-2015-05-02.pickle")
+
+PRODUCTS = [
+    "North Face Fleece Jacket",
+    {"name": "GUESS Handbag, Isla Large Satchel"},
+    {"name": "Obey Anchors Shawl Cardigan Burgundy X-Large",
+     "description": "A knit cardigan with a shawl collar",
+     "keywords": "Men, Sweaters"},
+    {"name": "Nike Free Run running shoes", "description": None},
+]
+
+class IdentityLemmatizer(object):
+    """
+    Stands in for the WordNet lemmatizer so tests need no corpus data.
+    """
+
+    def lemmatize(self, word):
+        return word
+
+##########################################################################
+## Classifier Test Case
+##########################################################################
+
+class ApparelClassifierTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        featurizer = ProductFeatures(
+            stoplist=["a", "the", "with"], lemmatizer=IdentityLemmatizer()
+        )
+        cls.classifier = ApparelClassifier(MODEL, featurizer=featurizer)
+
+    def classify(self, record):
+        if isinstance(record, basestring):
+            return self.classifier.classify(record)
+        return self.classifier.classify(**record)
+
+    def test_classify_distribution(self):
+        """
+        Classify returns labels sorted by probability above the cutoff
+        """
+        labels = self.classifier.classify("North Face Fleece Jacket")
+        probs  = [prob for _, prob in labels]
+        self.assertEqual(probs, sorted(probs, reverse=True))
+        self.assertTrue(all(prob > 0.01 for prob in probs))
+        self.assertEqual(labels[0][0], "outerwear")
+
+    def test_classify_many(self):
+        """
+        Batch classification matches classifying products one at a time
+        """
+        results = self.classifier.classify_many(PRODUCTS)
+        self.assertEqual(len(results), len(PRODUCTS))
+        for record, labels in zip(PRODUCTS, results):
+            expected = self.classify(record)
+            self.assertEqual([l for l, _ in labels], [l for l, _ in expected])
+            for (_, prob), (_, other) in zip(labels, expected):
+                self.assertAlmostEqual(prob, other, places=12)
+
+    def test_classify_stream(self):
+        """
+        Streaming classification yields records in order across chunks
+        """
+        results = list(self.classifier.classify_stream(iter(PRODUCTS), 3))
+        self.assertEqual([record for record, _ in results], PRODUCTS)
+        self.assertEqual(
+            [labels for _, labels in results],
+            self.classifier.classify_many(PRODUCTS)
+        )
+
+    def test_classify_stream_invalid(self):
+        """
+        Streaming fails on a record without a name unless skipping it
+        """
+        records = PRODUCTS[:2] + [{"description": "Leather"}] + PRODUCTS[2:]
+        with self.assertRaisesRegexp(ValueError, "Record 3 of the input"):
+            list(self.classifier.classify_stream(iter(records), 2))
+
+        results = list(self.classifier.classify_stream(iter(records), 2, skip_invalid=True))
+        self.assertEqual([record for record, _ in results], PRODUCTS)
+        self.assertEqual(self.classifier.validated['skipped'], 1)
+
+    def test_result_cache(self):
+        """
+        Cached results match uncached ones and repeats are not rescored
+        """
+        featurizer = ProductFeatures(
+            stoplist=["a", "the", "with"], lemmatizer=IdentityLemmatizer()
+        )
+        classifier = ApparelClassifier(MODEL, featurizer, cache_size=100)
+        expected   = self.classifier.classify_many(PRODUCTS)
+
+        self.assertEqual(classifier.classify_many(PRODUCTS + PRODUCTS), expected + expected)
+        self.assertEqual(classifier.classify("the North Face, Fleece Jacket"), expected[0])
+
+        stats = classifier.cache.stats()
+        self.assertEqual(stats['size'], len(PRODUCTS))
+        self.assertEqual(stats['misses'], len(PRODUCTS))
+        self.assertEqual(stats['hits'], 1)
+
+##########################################################################
+## Classifier Pool Test Case
+##########################################################################
+
+class ClassifierPoolTests(unittest.TestCase):
+
+    def test_pool_preserves_order(self):
+        """
+        Parallel classification matches serial classification in order
+        """
+        featurizer = ProductFeatures(
+            stoplist=["a", "the", "with"], lemmatizer=IdentityLemmatizer()
+        )
+        records  = PRODUCTS * 5
+        expected = ApparelClassifier(MODEL, featurizer).classify_many(records)
+
+        with ClassifierPool(MODEL, processes=2, featurizer=featurizer) as pool:
+            results = list(pool.classify_stream(iter(records), chunksize=3))
+
+        self.assertEqual([record for record, _ in results], records)
+        self.assertEqual([labels for _, labels in results], expected)
@@ -0,0 +1,94 @@
+# tests.test_config
+# Tests for the lazily loaded configuration and import time
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 20:40:19 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: test_config.py [] benjamin@bengfort.com $
+
+"""
+Tests for the lazily loaded configuration and import time
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import sys
+import unittest
+import subprocess
+
+from apparel.config import LazySettings
+from apparel.configuration import ApparelConfiguration
+from apparel.benchmark import CLI_IMPORTS, COMMAND_IMPORTS, time_imports
+
+##########################################################################
+## Fixtures
+##########################################################################
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "..", "bin", "apparel-classify.py")
+
+##########################################################################
+## Lazy Settings Test Case
+##########################################################################
+
+class LazySettingsTests(unittest.TestCase):
+
+    def test_loaded_on_access(self):
+        """
+        Settings are only loaded the first time they're accessed
+        """
+        loads = []
+
+        def loader():
+            loads.append(True)
+            return ApparelConfiguration()
+
+        settings = LazySettings(loader)
+        self.assertEqual(loads, [])
+        self.assertIsNone(settings.get('model'))
+        self.assertEqual(settings.debug, True)
+        self.assertEqual(len(loads), 1)
+
+##########################################################################
+## Startup Test Case
+##########################################################################
+
+class StartupTests(unittest.TestCase):
+
+    def test_no_eager_nltk(self):
+        """
+        Importing the modules of the classify command doesn't import NLTK
+        """
+        result = time_imports(CLI_IMPORTS + COMMAND_IMPORTS['classify'], repeat=1)
+        self.assertNotIn('nltk', result['heavy'])
+        self.assertGreater(result['best'], 0)
+
+    def test_cli_imports_light(self):
+        """
+        The modules every command imports pull in no heavy third party module
+        """
+        result = time_imports(CLI_IMPORTS, repeat=1)
+        for module in ('nltk', 'numpy', 'confire', 'yaml'):
+            self.assertNotIn(module, result['heavy'])
+
+    def test_cli_defers_settings(self):
+        """
+        Building the command line parser doesn't load the settings
+        """
+        code = "\n".join([
+            "import sys, apparel.config",
+            "apparel.config.settings._loader = None",
+            "sys.argv = [%r, 'convert', '--help']" % SCRIPT,
+            "execfile(%r, {'__name__': '__main__', '__file__': %r})" % (SCRIPT, SCRIPT),
+        ])
+        process = subprocess.Popen(
+            [sys.executable, "-c", code], stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        stdout, stderr = process.communicate()
+        self.assertEqual(process.returncode, 0, stderr)
+        self.assertIn("usage:", stdout)
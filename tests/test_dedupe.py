@@ -0,0 +1,191 @@
+# tests.test_dedupe
+# Tests for the reuse of the results of near-duplicate products
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 02:58:40 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: test_dedupe.py [] benjamin@bengfort.com $
+
+"""
+Tests for the reuse of the results of near-duplicate products
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import pickle
+import unittest
+
+from apparel.classify import ApparelClassifier
+from apparel.features import ProductFeatures
+from apparel.instrument import Instrument
+from apparel.dedupe import MinHash, NearDuplicateIndex, bands, jaccard
+
+from tests.test_classify import MODEL, IdentityLemmatizer
+
+##########################################################################
+## Fixtures
+##########################################################################
+
+def tokens(count, prefix="token"):
+    return dict(("%s%i" % (prefix, idx), True) for idx in range(count))
+
+## Variants of a product that differ only by their color and size
+VARIANTS = [
+    {"name": "Obey Anchors Shawl Cardigan %s %s" % (color, size),
+     "description": "A soft knit cardigan with a shawl collar, anchor print and ribbed cuffs",
+     "keywords": "Men, Sweaters, Cardigans"}
+    for color, size in (("Burgundy", "X-Large"), ("Navy", "Small"), ("Heather", "Medium"))
+]
+
+##########################################################################
+## MinHash Test Case
+##########################################################################
+
+class MinHashTests(unittest.TestCase):
+
+    def test_estimates_jaccard(self):
+        """
+        The agreement of signatures estimates the Jaccard similarity
+        """
+        minhash = MinHash(permutations=256)
+        a, b    = set(tokens(100)), set(tokens(60)) | set(tokens(40, "other"))
+        agreement = (minhash.signature(a) == minhash.signature(b)).mean()
+        self.assertAlmostEqual(agreement, jaccard(a, b), delta=0.1)
+        self.assertEqual(
+            list(minhash.signature(a)), list(MinHash(permutations=256).signature(a))
+        )
+
+    def test_bands(self):
+        """
+        Bands divide the signature with a threshold no higher than given
+        """
+        self.assertEqual(bands(0.8, 64), (8, 8))
+        self.assertEqual(bands(0.95, 64), (4, 16))
+        self.assertEqual(bands(0.01, 64), (64, 1))
+
+##########################################################################
+## Near-Duplicate Index Test Case
+##########################################################################
+
+class NearDuplicateIndexTests(unittest.TestCase):
+
+    def test_near_duplicates(self):
+        """
+        Results are reused only for featuresets above the threshold
+        """
+        index = NearDuplicateIndex(threshold=0.8)
+        index.put(tokens(20), "first")
+
+        near = dict(tokens(19), other=True)     # Jaccard 19/21
+        far  = dict(tokens(10), **tokens(10, "other"))
+        self.assertEqual(index.get(tokens(20)), "first")
+        self.assertEqual(index.get(near), "first")
+        self.assertIsNone(index.get(far))
+        self.assertIsNone(index.get({}))
+
+        stats = index.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['exact']), (2, 2, 1))
+        self.assertEqual(stats['reuse_rate'], 0.5)
+        self.assertEqual((stats['bands'], stats['rows']), (8, 8))
+
+    def test_bounded(self):
+        """
+        Evicted entries are removed from the buckets of every band
+        """
+        index = NearDuplicateIndex(threshold=0.9, maxsize=3)
+        for idx in range(10):
+            index.put(tokens(10, "product%i-" % idx), idx)
+
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.stats()['evictions'], 7)
+        self.assertIsNone(index.get(tokens(10, "product0-")))
+        self.assertEqual(index.get(tokens(10, "product9-")), 9)
+        for buckets in index.buckets:
+            self.assertEqual(sum(len(bucket) for bucket in buckets.values()), 3)
+
+    def test_threshold(self):
+        """
+        Thresholds outside (0, 1] are rejected
+        """
+        with self.assertRaises(ValueError):
+            NearDuplicateIndex(threshold=0)
+
+    def test_pickle(self):
+        """
+        Only the configuration of an index is pickled
+        """
+        index = NearDuplicateIndex(threshold=0.7, maxsize=5)
+        index.put(tokens(5), "first")
+
+        index = pickle.loads(pickle.dumps(index))
+        self.assertEqual((index.threshold, index.maxsize, len(index)), (0.7, 5, 0))
+        index.put(tokens(5), "first")
+        self.assertEqual(index.get(tokens(5)), "first")
+
+##########################################################################
+## Classifier Test Case
+##########################################################################
+
+class DedupeClassifierTests(unittest.TestCase):
+
+    def setUp(self):
+        self.featurizer = ProductFeatures(
+            stoplist=["a", "the", "with"], lemmatizer=IdentityLemmatizer()
+        )
+
+    def similarity(self, a, b):
+        a, b = (set(self.featurizer.featurize(**record)) for record in (a, b))
+        return jaccard(a, b)
+
+    def test_classify(self):
+        """
+        Variants of a recently classified product reuse its result
+        """
+        instrument = Instrument()
+        threshold  = self.similarity(VARIANTS[0], VARIANTS[1])
+        classifier = ApparelClassifier(
+            MODEL, self.featurizer, dedupe=threshold, instrument=instrument
+        )
+
+        first = classifier.classify(**VARIANTS[0])
+        self.assertEqual(classifier.classify(**VARIANTS[1]), first)
+        self.assertNotEqual(classifier.classify("Nike Free Run running shoes"), first)
+
+        stats = classifier.dedupe_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertEqual(instrument.report()['timers']['classify.score']['count'], 2)
+
+    def test_classify_many(self):
+        """
+        Later batches reuse the results of near-duplicates in earlier ones
+        """
+        threshold  = min(
+            self.similarity(VARIANTS[0], variant) for variant in VARIANTS[1:]
+        )
+        plain      = ApparelClassifier(MODEL, self.featurizer)
+        classifier = ApparelClassifier(
+            MODEL, self.featurizer, cache_size=10, dedupe=threshold
+        )
+
+        first = classifier.classify_many(VARIANTS[:1])
+        self.assertEqual(first, plain.classify_many(VARIANTS[:1]))
+        self.assertEqual(classifier.classify_many(VARIANTS[1:]), first * 2)
+        self.assertEqual(classifier.dedupe_stats()['hits'], 2)
+
+        # The reused results are also cached by their exact featuresets
+        self.assertEqual(classifier.classify_many(VARIANTS[1:]), first * 2)
+        self.assertEqual(classifier.dedupe_stats()['hits'], 2)
+        self.assertEqual(classifier.cache.stats()['hits'], 2)
+
+    def test_disabled(self):
+        """
+        Classifiers do not deduplicate by default
+        """
+        classifier = ApparelClassifier(MODEL, self.featurizer)
+        self.assertIsNone(classifier.dedupe)
+        self.assertIsNone(classifier.dedupe_stats())
@@ -0,0 +1,299 @@
+# tests.test_features
+# Tests for the product featurizer and its token cache
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 19:38:40 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: test_features.py [] benjamin@bengfort.com $
+
+"""
+Tests for the product featurizer and its token cache
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import sys
+import time
+import pickle
+import string
+import unittest
+import threading
+
+from nltk import wordpunct_tokenize
+from apparel.cache import LRUCache, ResultCache
+from apparel.features import ProductFeatures, hash_feature
+
+##########################################################################
+## Fixtures
+##########################################################################
+
+STOPWORDS = ["a", "an", "the", "with", "for", "it", "be"]
+
+TEXT = (
+    "The Women's EQ Medium Travel Bag from DAKINE (black). Though it may be "
+    "small, it's a bag with 51 liter interior... Bag, BAG, bag!?"
+)
+
+class SuffixLemmatizer(object):
+    """
+    Strips a trailing s, standing in for WordNet so no corpus is needed.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def lemmatize(self, word):
+        self.calls += 1
+        return word[:-1] if word.endswith("s") and len(word) > 3 else word
+
+##########################################################################
+## Featurizer Test Case
+##########################################################################
+
+class ProductFeaturesTests(unittest.TestCase):
+
+    def featurizer(self, **kwargs):
+        return ProductFeatures(
+            stoplist=STOPWORDS, lemmatizer=SuffixLemmatizer(), **kwargs
+        )
+
+    def reference(self, text):
+        """
+        Tokenization without the cache, as it was originally implemented.
+        """
+        lemmatizer = SuffixLemmatizer()
+        for token in wordpunct_tokenize(text):
+            token = lemmatizer.lemmatize(token.lower())
+            if token in string.punctuation: continue
+            if token in STOPWORDS: continue
+            yield token
+
+    def test_tokenize_matches_reference(self):
+        """
+        Cached tokenization matches the uncached implementation
+        """
+        featurizer = self.featurizer()
+        expected   = list(self.reference(TEXT))
+        self.assertEqual(list(featurizer.tokenize(TEXT)), expected)
+        self.assertEqual(list(featurizer.tokenize(TEXT)), expected)
+
+    def test_punctuation_substrings(self):
+        """
+        Runs of punctuation are removed only if in the punctuation string
+        """
+        tokens = list(self.featurizer().tokenize("shirt () ., ... !?"))
+        self.assertEqual(tokens, list(self.reference("shirt () ., ... !?")))
+        self.assertEqual(tokens, ["shirt", ".,", "...", "!?"])
+
+    def test_memoized_lemmatization(self):
+        """
+        Each distinct token is only lemmatized once
+        """
+        featurizer = self.featurizer()
+        featurizer.featurize("bags bags bags", "bags and shoes", "bags")
+        self.assertEqual(featurizer.lemmatizer.calls, 3)
+
+        stats = featurizer.cache.stats()
+        self.assertEqual(stats['misses'], 3)
+        self.assertEqual(stats['hits'], 4)
+        self.assertEqual(stats['size'], 3)
+
+    def test_warm(self):
+        """
+        Warming the cache means the tokens are never lemmatized again
+        """
+        featurizer = self.featurizer()
+        featurizer.warm(["Bags", "the", "shoes"])
+        calls = featurizer.lemmatizer.calls
+
+        self.assertEqual(list(featurizer.tokenize("Bags the shoes")), ["bag", "shoe"])
+        self.assertEqual(featurizer.lemmatizer.calls, calls)
+        self.assertEqual(featurizer.cache.hits, 3)
+
+    def test_bounded_cache(self):
+        """
+        The token cache never holds more than its maximum size
+        """
+        featurizer = self.featurizer(cache_size=4)
+        tokens = list(featurizer.tokenize(TEXT))
+        self.assertEqual(tokens, list(self.reference(TEXT)))
+        self.assertEqual(len(featurizer.cache), 4)
+        self.assertGreater(featurizer.cache.evictions, 0)
+
+    def test_pickle(self):
+        """
+        A featurizer with a warm cache can be sent to worker processes
+        """
+        featurizer = self.featurizer()
+        featurizer.featurize(TEXT)
+        clone = pickle.loads(pickle.dumps(featurizer, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(clone.cache.items(), featurizer.cache.items())
+        self.assertEqual(clone.featurize(TEXT), featurizer.featurize(TEXT))
+
+    def test_hashing(self):
+        """
+        Hashed features are the stable buckets of the exact features
+        """
+        exact  = self.featurizer().featurize(TEXT, keywords="travel, bags")
+        hashed = self.featurizer(buckets=64).featurize(TEXT, keywords="travel, bags")
+
+        self.assertEqual(
+            set(hashed), set(ProductFeatures.BUCKET % hash_feature(fname, 64) for fname in exact)
+        )
+        self.assertLessEqual(len(hashed), 64)
+        self.assertEqual(hash_feature(u"KEYWORD(bag)", 64), hash_feature("KEYWORD(bag)", 64))
+        self.assertEqual(hash_feature("bag", 1 << 20), 157761)
+
+        self.assertNotEqual(
+            self.featurizer().config(), self.featurizer(buckets=64).config()
+        )
+
+    def test_lemma_table(self):
+        """
+        Words in the lemma table are not passed to the lemmatizer
+        """
+        featurizer = self.featurizer(lemmas={"bags": "bag", "shoes": "shoe"})
+        tokens = list(featurizer.tokenize("Bags shoes Boots"))
+        self.assertEqual(tokens, ["bag", "shoe", "boot"])
+        self.assertEqual(featurizer.lemmatizer.calls, 1)
+
+    def test_lemma_table_no_fallback(self):
+        """
+        Without fallback, WordNet is never loaded for unknown words
+        """
+        featurizer = ProductFeatures(
+            stoplist=STOPWORDS, lemmas={"bags": "bag"}, fallback=False
+        )
+        tokens = list(featurizer.tokenize("Bags boots"))
+        self.assertEqual(tokens, ["bag", "boots"])
+        self.assertIsNone(featurizer._lemmatizer)
+
+    def test_threads(self):
+        """
+        Threads featurizing concurrently share a consistent token cache
+        """
+        featurizer = self.featurizer(cache_size=50)
+        texts      = ["%s bags%i shoes%i" % (TEXT, idx, idx % 7) for idx in range(200)]
+        reference  = self.featurizer()
+        expected   = [reference.featurize(text) for text in texts]
+        results    = [None] * 8
+        errors     = []
+
+        def worker(idx):
+            try:
+                results[idx] = [featurizer.featurize(text) for text in texts]
+            except Exception as e:
+                errors.append(e)
+
+        interval = sys.getcheckinterval()
+        sys.setcheckinterval(1)
+        try:
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+            for thread in threads: thread.start()
+            for thread in threads: thread.join()
+        finally:
+            sys.setcheckinterval(interval)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [expected] * 8)
+        self.assertEqual(len(featurizer.cache), 50)
+        self.assertEqual(len(featurizer.cache.items()), 50)
+
+##########################################################################
+## LRU Cache Test Case
+##########################################################################
+
+class LRUCacheTests(unittest.TestCase):
+
+    def test_eviction_order(self):
+        """
+        The least recently used key is evicted first
+        """
+        cache = LRUCache(3)
+        for key in "abc":
+            cache.put(key, key.upper())
+
+        self.assertEqual(cache.get("a"), "A")
+        cache.put("d", "D")
+        self.assertNotIn("b", cache)
+        self.assertEqual([k for k, _ in cache.items()], ["c", "a", "d"])
+        self.assertEqual(cache.evictions, 1)
+
+    def test_counters(self):
+        """
+        Hits and misses are counted
+        """
+        cache = LRUCache(3)
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("b", 2), 2)
+
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertAlmostEqual(stats['hit_rate'], 1.0 / 3)
+
+    def test_disabled(self):
+        """
+        A cache of size zero stores nothing
+        """
+        cache = LRUCache(0)
+        cache.put("a", 1)
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(cache.get("a"))
+
+##########################################################################
+## Result Cache Test Case
+##########################################################################
+
+class ResultCacheTests(unittest.TestCase):
+
+    def test_expiration(self):
+        """
+        Entries older than the ttl are expired and counted as misses
+        """
+        cache = ResultCache(3, ttl=0.05)
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        time.sleep(0.06)
+        self.assertIsNone(cache.get("a"))
+        self.assertNotIn("a", cache)
+
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['expirations'], 1)
+
+    def test_threads(self):
+        """
+        Concurrent puts and gets keep the cache consistent
+        """
+        cache = ResultCache(50)
+
+        def worker(offset):
+            for idx in range(1000):
+                key = (offset + idx) % 100
+                if cache.get(key) is None:
+                    cache.put(key, key)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+
+        self.assertEqual(len(cache), 50)
+        self.assertEqual(len(cache.items()), 50)
+        self.assertEqual(cache.hits + cache.misses, 4000)
+
+    def test_pickle(self):
+        """
+        A result cache can be pickled (e.g. sent to a worker process)
+        """
+        cache = ResultCache(3, ttl=60)
+        cache.put("a", 1)
+        other = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(other.get("a"), 1)
+        self.assertEqual(other.ttl, 60)
@@ -0,0 +1,132 @@
+# tests.test_instrument
+# Tests for the instrumentation of featurization and classification
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 21:52:30 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: test_instrument.py [] benjamin@bengfort.com $
+
+"""
+Tests for the instrumentation of featurization and classification
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import pickle
+import unittest
+
+from collections import Counter
+from apparel.classify import ApparelClassifier
+from apparel.features import ProductFeatures
+from apparel.instrument import Histogram, Instrument
+
+from tests.test_classify import MODEL, PRODUCTS, IdentityLemmatizer
+
+##########################################################################
+## Histogram Test Case
+##########################################################################
+
+class HistogramTests(unittest.TestCase):
+
+    def test_percentiles(self):
+        """
+        Percentiles are estimated by the upper bound of their bucket
+        """
+        histogram = Histogram(buckets=(1, 2, 4, 8))
+        for value in [0.5] * 50 + [3] * 40 + [6] * 9 + [20]:
+            histogram.observe(value)
+
+        report = histogram.report()
+        self.assertEqual(report['count'], 100)
+        self.assertEqual((report['min'], report['max']), (0.5, 20))
+        self.assertEqual(report['p50'], 1)
+        self.assertEqual(report['p90'], 4)
+        self.assertEqual(report['p99'], 8)
+        self.assertEqual(histogram.percentile(100), 20)
+
+    def test_empty(self):
+        """
+        An empty histogram has no percentiles
+        """
+        self.assertIsNone(Histogram().report()['p50'])
+
+##########################################################################
+## Instrument Test Case
+##########################################################################
+
+class InstrumentTests(unittest.TestCase):
+
+    def setUp(self):
+        self.featurizer = ProductFeatures(
+            stoplist=["a", "the", "with"], lemmatizer=IdentityLemmatizer()
+        )
+
+    def test_classify_stages(self):
+        """
+        Instrumented classification is unchanged and times every stage
+        """
+        exported   = Counter()
+        instrument = Instrument([lambda kind, name, value: exported.update([(kind, name)])])
+        plain      = ApparelClassifier(MODEL, self.featurizer)
+        expected   = plain.classify_many(PRODUCTS)
+
+        classifier = ApparelClassifier(
+            MODEL, ProductFeatures(stoplist=["a", "the", "with"], lemmatizer=IdentityLemmatizer()),
+            instrument=instrument,
+        )
+        self.assertIs(classifier.featurizer.instrument, instrument)
+        self.assertEqual(classifier.classify_many(PRODUCTS), expected)
+        self.assertEqual(classifier.classify("North Face Fleece Jacket"), expected[0])
+
+        report = instrument.report()
+        for stage in ('featurize', 'featurize.tokenize', 'featurize.lemmatize',
+                      'featurize.features', 'classify', 'classify.featurize',
+                      'classify.score', 'classify.distribution', 'classify_many',
+                      'classify_many.featurize', 'classify_many.score'):
+            self.assertIn(stage, report['timers'])
+
+        self.assertEqual(report['timers']['featurize']['count'], len(PRODUCTS) + 1)
+        self.assertEqual(report['timers']['classify']['count'], 1)
+        self.assertEqual(report['counters']['classify_many.records'], len(PRODUCTS))
+        self.assertEqual(exported[('timer', 'featurize')], len(PRODUCTS) + 1)
+        self.assertEqual(exported[('counter', 'classify_many.records')], 1)
+
+    def test_cached_stages(self):
+        """
+        Cached results are timed by the cache stage and not scored
+        """
+        instrument = Instrument()
+        classifier = ApparelClassifier(
+            MODEL, self.featurizer, cache_size=10, instrument=instrument
+        )
+        for _ in range(3):
+            classifier.classify("North Face Fleece Jacket")
+
+        timers = instrument.report()['timers']
+        self.assertEqual(timers['classify.cache']['count'], 3)
+        self.assertEqual(timers['classify.score']['count'], 1)
+
+    def test_disabled(self):
+        """
+        Featurizers and classifiers are not instrumented by default
+        """
+        classifier = ApparelClassifier(MODEL, self.featurizer)
+        self.assertIsNone(classifier.instrument)
+        self.assertIsNone(classifier.featurizer.instrument)
+
+    def test_pickle(self):
+        """
+        An instrumented featurizer can be sent to another process
+        """
+        self.featurizer.instrument = Instrument()
+        self.featurizer.featurize("North Face Fleece Jacket")
+
+        featurizer = pickle.loads(pickle.dumps(self.featurizer))
+        self.assertEqual(featurizer.instrument.report()['timers'], {})
+        featurizer.featurize("North Face Fleece Jacket")
+        self.assertIn('featurize', featurizer.instrument.report()['timers'])
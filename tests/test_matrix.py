@@ -0,0 +1,154 @@
+# tests.test_matrix
+# Tests for the compact, integer indexed featureset representation
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 23:31:02 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: test_matrix.py [] benjamin@bengfort.com $
+
+"""
+Tests for the compact, integer indexed featureset representation
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import pickle
+import unittest
+import numpy as np
+
+from apparel.matrix import FeatureMatrix
+
+##########################################################################
+## Fixtures
+##########################################################################
+
+FEATURESET = [
+    ({"jacket": True, "fleece": True}, "outerwear"),
+    ({"shirt": True, "cotton": True}, "tops"),
+    ({"jean": True}, "bottoms"),
+    ({"jacket": True, "denim": True}, "outerwear"),
+    ({"tee": True, "cotton": True, "shirt": True}, "tops"),
+    ({}, "bottoms"),
+]
+
+##########################################################################
+## Feature Matrix Test Case
+##########################################################################
+
+class FeatureMatrixTests(unittest.TestCase):
+
+    def setUp(self):
+        self.matrix = FeatureMatrix.from_featureset(iter(FEATURESET))
+
+    def test_round_trip(self):
+        """
+        Iterating over the matrix yields the encoded featureset
+        """
+        self.assertEqual(len(self.matrix), len(FEATURESET))
+        self.assertEqual(list(self.matrix), FEATURESET)
+        self.assertEqual(self.matrix[3], FEATURESET[3])
+        self.assertEqual(self.matrix.labels, ["bottoms", "outerwear", "tops"])
+        self.assertEqual(len(self.matrix.vocabulary), 7)
+
+    def test_split(self):
+        """
+        Splitting a fold returns views of the train and test rows
+        """
+        train, test = self.matrix.split([1, 4])
+        self.assertEqual(list(test), [FEATURESET[1], FEATURESET[4]])
+        self.assertEqual(list(train), [FEATURESET[idx] for idx in (0, 2, 3, 5)])
+        self.assertIs(train.indices, self.matrix.indices)
+
+        nested = train.view([1, 3])
+        self.assertEqual(list(nested), [FEATURESET[2], FEATURESET[5]])
+
+    def test_csr(self):
+        """
+        The CSR arrays of a view match those of encoding its rows
+        """
+        for rows in ([1, 2, 3], [0, 4, 5], []):
+            indptr, indices, targets = self.matrix.view(rows).csr()
+            expected = FeatureMatrix.from_featureset(
+                [FEATURESET[idx] for idx in rows],
+                self.matrix.vocabulary, self.matrix.labels
+            )
+            self.assertTrue(np.array_equal(indptr, expected.indptr))
+            self.assertTrue(np.array_equal(indices, expected.indices))
+            self.assertTrue(np.array_equal(targets, expected.targets))
+
+        # Contiguous rows share the indices of the matrix
+        _, indices, _ = self.matrix.view([1, 2, 3]).csr()
+        self.assertTrue(np.may_share_memory(indices, self.matrix.indices))
+
+    def test_extend(self):
+        """
+        Extending keeps the indices of the given vocabulary and labels
+        """
+        extended = self.matrix.extend({"parka": 0, "jacket": 1}, ["outerwear", "shoes"])
+        self.assertEqual(extended.vocabulary["parka"], 0)
+        self.assertEqual(extended.vocabulary["jacket"], 1)
+        self.assertEqual(extended.labels, ["outerwear", "shoes", "bottoms", "tops"])
+        self.assertEqual(list(extended), FEATURESET)
+
+    def test_select(self):
+        """
+        Features are selected by document frequency overall and per label
+        """
+        names = lambda keep: set(name for name in self.matrix.names if keep[self.matrix.vocabulary[name]])
+        self.assertEqual(names(self.matrix.select(min_df=2)), set(["jacket", "shirt", "cotton"]))
+        # Ties (shirt and cotton) are broken by the order of the vocabulary
+        self.assertEqual(
+            names(self.matrix.select(top_n=1)), set(["jean", "jacket", "shirt"])
+        )
+        self.assertEqual(len(names(self.matrix.select())), 7)
+
+    def test_prune(self):
+        """
+        Pruning drops the features from every row and renumbers the rest
+        """
+        train, _ = self.matrix.split([0])
+        pruned   = train.prune(self.matrix.select(min_df=2))
+
+        self.assertEqual(sorted(pruned.vocabulary.values()), [0, 1, 2])
+        self.assertEqual(list(pruned), [
+            ({"shirt": True, "cotton": True}, "tops"),
+            ({}, "bottoms"),
+            ({"jacket": True}, "outerwear"),
+            ({"cotton": True, "shirt": True}, "tops"),
+            ({}, "bottoms"),
+        ])
+
+    def test_fields_union(self):
+        """
+        Fields share a vocabulary and their union is the whole featureset
+        """
+        pairs  = [
+            ((dict(features.items()[:1]), dict(features.items()[1:])), label)
+            for features, label in FEATURESET
+        ]
+        fields = FeatureMatrix.from_fields(iter(pairs), 2)
+
+        self.assertIs(fields[0].vocabulary, fields[1].vocabulary)
+        self.assertEqual(list(fields[0]), [(first, label) for (first, _), label in pairs])
+        self.assertEqual(list(FeatureMatrix.union(fields)), FEATURESET)
+
+    def test_pickle(self):
+        """
+        A matrix (or a view of it) can be sent to another process
+        """
+        view  = self.matrix.view([0, 5])
+        other = pickle.loads(pickle.dumps(view, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(list(other), list(view))
+
+    def test_boolean_features(self):
+        """
+        Only boolean features can be encoded
+        """
+        self.assertRaises(
+            ValueError, FeatureMatrix.from_featureset, [({"size": 3}, "tops")]
+        )
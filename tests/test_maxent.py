@@ -0,0 +1,151 @@
+# tests.test_maxent
+# Tests for the native NumPy maximum entropy trainer
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 22:41:17 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: test_maxent.py [] benjamin@bengfort.com $
+
+"""
+Tests for the native NumPy maximum entropy trainer
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import unittest
+import numpy as np
+
+from apparel.benchmark import synthetic_products
+from apparel.model import CompiledModel
+from apparel.maxent import MaxentTrainer, joint_features, objective
+from apparel.matrix import FeatureMatrix
+from apparel.features import ProductFeatures
+
+from tests.test_classify import IdentityLemmatizer
+
+##########################################################################
+## Fixtures
+##########################################################################
+
+def make_featureset(count, seed=42):
+    featurizer = ProductFeatures(stoplist=["the"], lemmatizer=IdentityLemmatizer())
+    return [
+        (featurizer.featurize(row['name'], row['description'], row['keywords']), row['category'])
+        for row in synthetic_products(count, seed)
+    ]
+
+##########################################################################
+## Maxent Trainer Test Case
+##########################################################################
+
+class MaxentTrainerTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.featureset = make_featureset(400)
+
+    def test_gradient(self):
+        """
+        The analytic gradient matches a finite difference estimate
+        """
+        matrix = FeatureMatrix.from_featureset(self.featureset[:30])
+        indptr, indices, targets = matrix.csr()
+        shape = (len(matrix.vocabulary), len(matrix.labels))
+        labels = matrix.labels
+        joint = joint_features(indptr, indices, targets, shape)
+        theta = np.random.RandomState(42).randn(len(joint) + len(labels)) * 0.1
+
+        _, gradient = objective((indptr, indices, targets), joint, shape, theta)
+        for idx in list(range(10)) + list(range(len(theta) - 3, len(theta))):
+            step = np.zeros_like(theta)
+            step[idx] = 1e-6
+            upper, _ = objective((indptr, indices, targets), joint, shape, theta + step)
+            lower, _ = objective((indptr, indices, targets), joint, shape, theta - step)
+            self.assertAlmostEqual((upper - lower) / 2e-6, gradient[idx], places=5)
+
+    def test_train(self):
+        """
+        The trained model classifies held out products and reports progress
+        """
+        trainer = MaxentTrainer(sigma=1.0)
+        model   = trainer.train(self.featureset[:300])
+        test    = self.featureset[300:]
+
+        predicted = model.classify_many([features for features, _ in test])
+        accuracy  = np.mean([guess == label for guess, (_, label) in zip(predicted, test)])
+        self.assertGreater(accuracy, 0.9)
+
+        losses = [item['loss'] for item in trainer.history]
+        self.assertEqual(losses, sorted(losses, reverse=True))
+        self.assertEqual(
+            [item['iteration'] for item in trainer.history],
+            list(range(1, len(losses) + 1))
+        )
+
+    def test_joint_features(self):
+        """
+        Only (feature, label) pairs seen in training are given weights
+        """
+        model = MaxentTrainer().train([
+            ({"jacket": True}, "outerwear"), ({"shirt": True}, "tops"),
+        ])
+        columns = dict((label, idx) for idx, label in enumerate(model.labels))
+        self.assertEqual(model.weights[model.vocabulary["jacket"], columns["tops"]], 0)
+        self.assertGreater(model.weights[model.vocabulary["jacket"], columns["outerwear"]], 0)
+
+    def test_workers(self):
+        """
+        Training with sharded workers matches training serially
+        """
+        serial = MaxentTrainer().train(self.featureset)
+        pooled = MaxentTrainer(workers=2).train(self.featureset)
+        self.assertTrue(np.allclose(serial.weights, pooled.weights))
+        self.assertTrue(np.allclose(serial.bias, pooled.bias))
+
+    def test_prior(self):
+        """
+        A narrower Gaussian prior shrinks the weights
+        """
+        wide   = MaxentTrainer(sigma=10.0).train(self.featureset)
+        narrow = MaxentTrainer(sigma=0.1).train(self.featureset)
+        self.assertLess(np.abs(narrow.weights).sum(), np.abs(wide.weights).sum())
+
+    def test_to_classifier(self):
+        """
+        The model converts into an NLTK classifier with the same output
+        """
+        model = MaxentTrainer().train(self.featureset[:200])
+        classifier = model.to_classifier()
+        features   = self.featureset[250][0]
+
+        probdist = classifier.prob_classify(features)
+        probs    = model.prob_classify(features)
+        for label, prob in zip(model.labels, probs):
+            self.assertAlmostEqual(probdist.prob(label), prob, places=10)
+
+        other = CompiledModel.from_classifier(classifier)
+        self.assertEqual(len(other), len(model))
+
+    def test_boolean_features(self):
+        """
+        Only boolean features can be trained
+        """
+        self.assertRaises(ValueError, MaxentTrainer().train, [({"size": 3}, "tops")])
+
+    def test_views(self):
+        """
+        Training on a view of a matrix matches training on its rows
+        """
+        matrix = FeatureMatrix.from_featureset(self.featureset)
+        train, _ = matrix.split(range(300, 400))
+        viewed = MaxentTrainer().train(train)
+        listed = MaxentTrainer().train(self.featureset[:300])
+
+        self.assertEqual(viewed.labels, listed.labels)
+        features = self.featureset[350][0]
+        self.assertTrue(np.allclose(viewed.prob_classify(features), listed.prob_classify(features)))
@@ -0,0 +1,340 @@
+# tests.test_model
+# Tests for the compiled Maximum Entropy model
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 15:04:32 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: test_model.py [] benjamin@bengfort.com $
+
+"""
+Tests for the compiled Maximum Entropy model
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import re
+import sys
+import json
+import pickle
+import random
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+from StringIO import StringIO
+from apparel.model import CompiledModel, SortedTable, artifact_path, load_model, load_pickle
+from apparel.parallel import worker_memory
+
+##########################################################################
+## Fixtures
+##########################################################################
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "fixtures")
+MODEL    = os.path.join(FIXTURES, "model-2015-05-02.pickle")
+SCRIPT   = os.path.join(os.path.dirname(__file__), "..", "bin", "apparel-classify.py")
+
+##########################################################################
+## Compiled Model Test Case
+##########################################################################
+
+class CompiledModelTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(MODEL, 'rb') as pkl:
+            cls.classifier = pickle.load(pkl)
+        cls.model = CompiledModel.from_classifier(cls.classifier)
+
+    def featuresets(self, count=50, size=12):
+        """
+        Generates random featuresets drawn from the model vocabulary along
+        with a handful of features the model has never seen.
+        """
+        rand  = random.Random(42)
+        vocab = sorted(self.model.vocabulary)
+        for idx in xrange(count):
+            feats = dict((fname, True) for fname in rand.sample(vocab, size))
+            feats["UNSEEN-%i" % idx] = True
+            yield feats
+
+    def test_compiled_shape(self):
+        """
+        The compiled weights cover every (feature, label) pair
+        """
+        encoding = self.classifier._encoding
+        self.assertEqual(self.model.labels, list(encoding.labels()))
+        self.assertEqual(
+            self.model.weights.shape,
+            (len(self.model.vocabulary), len(self.model.labels))
+        )
+        self.assertEqual(
+            (self.model.weights != 0).sum() + (self.model.bias != 0).sum(),
+            (self.classifier._weights != 0).sum()
+        )
+
+    def test_matches_nltk(self):
+        """
+        Compiled probabilities match the NLTK prob_classify path
+        """
+        for feats in self.featuresets():
+            probdist = self.classifier.prob_classify(feats)
+            probs    = self.model.prob_classify(feats)
+            for label, prob in zip(self.model.labels, probs):
+                self.assertAlmostEqual(prob, probdist.prob(label), places=9)
+
+    def test_empty_featureset(self):
+        """
+        An empty featureset is scored by the always on weights alone
+        """
+        probdist = self.classifier.prob_classify({})
+        probs    = self.model.prob_classify({})
+        for label, prob in zip(self.model.labels, probs):
+            self.assertAlmostEqual(prob, probdist.prob(label), places=9)
+
+    def test_batch_matches_single(self):
+        """
+        Batch scoring matches scoring each featureset one at a time
+        """
+        featuresets = list(self.featuresets(count=20))
+        featuresets.insert(0, {})
+        featuresets.insert(7, {})
+        featuresets.append({})
+
+        probdists = self.model.prob_classify_many(featuresets)
+        self.assertEqual(probdists.shape, (23, len(self.model.labels)))
+        for feats, probs in zip(featuresets, probdists):
+            expected = self.model.prob_classify(feats)
+            for prob, other in zip(probs, expected):
+                self.assertAlmostEqual(prob, other, places=12)
+
+    def test_empty_batch(self):
+        """
+        An empty batch returns an empty matrix of probabilities
+        """
+        probdists = self.model.prob_classify_many([])
+        self.assertEqual(probdists.shape, (0, len(self.model.labels)))
+
+    def test_explain(self):
+        """
+        Explain prints the feature weights and label probabilities
+        """
+        feats = next(self.featuresets(count=1))
+        stdout, sys.stdout = sys.stdout, StringIO()
+        try:
+            self.model.explain(feats)
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+
+        lines = output.splitlines()
+        self.assertTrue(lines[0].strip().startswith("Feature"))
+        self.assertTrue(lines[-1].strip().startswith("PROBS:"))
+
+##########################################################################
+## Compact Artifact Test Case
+##########################################################################
+
+class CompactArtifactTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.model = CompiledModel.from_pickle(MODEL)
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_artifact_path(self):
+        """
+        The artifact of a pickle is stored alongside it
+        """
+        self.assertEqual(artifact_path("fixtures/model-2015-05-02.pickle"),
+                         "fixtures/model-2015-05-02")
+        self.assertEqual(artifact_path("fixtures/model"), "fixtures/model")
+
+    def test_save_load(self):
+        """
+        A model saved as an artifact loads back identically
+        """
+        path  = self.model.save(os.path.join(self.tmpdir, "model"))
+        model = CompiledModel.load(path)
+        self.assertEqual(model.vocabulary, self.model.vocabulary)
+        self.assertEqual(model.labels, self.model.labels)
+        self.assertTrue((model.weights == self.model.weights).all())
+        self.assertTrue((model.bias == self.model.bias).all())
+
+    def test_save_load_lemmas(self):
+        """
+        The lemma table is stored in the artifact if the model has one
+        """
+        path  = self.model.save(os.path.join(self.tmpdir, "plain"))
+        self.assertIsNone(CompiledModel.load(path).lemmas)
+
+        lemmas = {u"jackets": u"jacket", u"shoes": u"shoe"}
+        model  = CompiledModel(
+            self.model.vocabulary, self.model.labels, self.model.weights,
+            self.model.bias, lemmas,
+        )
+        path = model.save(os.path.join(self.tmpdir, "lemmas"))
+        self.assertEqual(CompiledModel.load(path).lemmas, lemmas)
+
+    def test_no_overwrite(self):
+        """
+        Saving an artifact will not overwrite an existing one
+        """
+        path = self.model.save(os.path.join(self.tmpdir, "model"))
+        self.assertRaises(Exception, self.model.save, path)
+
+    def test_load_model_prefers_artifact(self):
+        """
+        Loading a pickle loads the artifact alongside it if it exists
+        """
+        pkl = os.path.join(self.tmpdir, "model.pickle")
+        shutil.copy(MODEL, pkl)
+        self.assertEqual(len(load_model(pkl)), len(self.model))
+
+        # Save a truncated model as the artifact to tell them apart
+        truncated = CompiledModel({}, self.model.labels, self.model.weights[:0])
+        truncated.save(artifact_path(pkl))
+        self.assertEqual(len(load_model(pkl)), 0)
+        self.assertEqual(len(load_model(artifact_path(pkl))), 0)
+        self.assertEqual(len(load_pickle(pkl)), len(self.model))
+
+    def test_convert_report(self):
+        """
+        Convert reports the load of the pickle itself, not of its artifact
+        """
+        pkl = os.path.join(self.tmpdir, "model.pickle")
+        shutil.copy(MODEL, pkl)
+
+        process = subprocess.Popen(
+            [sys.executable, SCRIPT, "convert", pkl],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        stdout, stderr = process.communicate()
+        self.assertEqual(process.returncode, 0, stderr)
+        self.assertTrue(os.path.isdir(artifact_path(pkl)))
+
+        # The command line utility writes its report to stderr on exit
+        rows = dict(
+            (name, (float(seconds), float(rss)))
+            for name, seconds, rss in re.findall(r"(\w+) +loaded in ([\d.]+) seconds using ([\d.]+) MB", stderr)
+        )
+        self.assertEqual(sorted(rows), ['artifact', 'pickle'])
+        self.assertNotEqual(rows['pickle'], rows['artifact'])
+        self.assertGreater(rows['pickle'][0], rows['artifact'][0])
+
+    def test_load_mmap(self):
+        """
+        Memory mapped weights score identically to loaded weights
+        """
+        path  = self.model.save(os.path.join(self.tmpdir, "model"))
+        model = load_model(path, mmap=True)
+        self.assertTrue(hasattr(model.weights, 'filename'))
+
+        feats = dict((fname, True) for fname in sorted(model.vocabulary)[:20])
+        self.assertEqual(
+            list(model.prob_classify(feats)), list(self.model.prob_classify(feats))
+        )
+
+    def test_load_mmap_tables(self):
+        """
+        The vocabulary and lemma table are memory mapped sorted tables
+        """
+        lemmas = {u"jackets": u"jacket", u"caf\xe9s": u"caf\xe9"}
+        model  = CompiledModel(
+            self.model.vocabulary, self.model.labels, self.model.weights,
+            self.model.bias, lemmas,
+        )
+        path   = model.save(os.path.join(self.tmpdir, "model"))
+        mapped = load_model(path, mmap=True)
+
+        for table in (mapped.vocabulary, mapped.lemmas):
+            self.assertIsInstance(table, SortedTable)
+            self.assertTrue(hasattr(table.index, 'filename'))
+        self.assertEqual(mapped.lemmas.get(u"caf\xe9s"), u"caf\xe9")
+        self.assertEqual(load_model(path).lemmas, lemmas)
+        self.assertIsInstance(load_model(path).vocabulary, dict)
+
+        vocab = sorted(self.model.vocabulary)
+        featuresets = [
+            dict((fname, True) for fname in vocab[idx:idx+10] + ["UNSEEN", u"caf\xe9"])
+            for idx in range(0, 200, 20)
+        ] + [{}]
+        self.assertTrue(
+            (mapped.prob_classify_many(featuresets) == self.model.prob_classify_many(featuresets)).all()
+        )
+        for features in featuresets:
+            self.assertEqual(
+                list(mapped.prob_classify(features)), list(self.model.prob_classify(features))
+            )
+
+    def test_sorted_table(self):
+        """
+        Sorted tables look up keys like the dictionaries they are made from
+        """
+        mapping = {u"shoe": 3, u"boot": 1, u"caf\xe9": 0, "bag": 2}
+        table   = SortedTable.from_dict(mapping)
+        self.assertEqual(len(table), 4)
+        self.assertEqual(list(table), [u"bag", u"boot", u"caf\xe9", u"shoe"])
+        self.assertEqual(table.to_dict(), mapping)
+        self.assertEqual(table[u"caf\xe9"], 0)
+        self.assertNotIn(u"shoes", table)
+        self.assertNotIn(u"sho", table)
+        self.assertIsNone(table.get(u"sandal"))
+
+        values, found = table.find([b"shoe", b"shoelaces", b"bag", b""])
+        self.assertEqual(values.tolist(), [3, 2])
+        self.assertEqual(found.tolist(), [True, False, True, False])
+
+        empty = SortedTable.from_dict({})
+        self.assertEqual((len(empty), empty.to_dict()), (0, {}))
+        self.assertEqual(empty.lookup([b"bag"]).tolist(), [])
+
+    def test_load_version_1(self):
+        """
+        Artifacts that store the vocabulary and lemmas as JSON still load
+        """
+        path = self.model.save(os.path.join(self.tmpdir, "model"))
+        for name in ("vocabulary.npy", "rows.npy"):
+            os.remove(os.path.join(path, name))
+
+        vocabulary = sorted(self.model.vocabulary, key=self.model.vocabulary.get)
+        with open(os.path.join(path, "vocabulary.json"), 'w') as f:
+            json.dump(vocabulary, f)
+        with open(os.path.join(path, "lemmas.json"), 'w') as f:
+            json.dump({u"bags": u"bag"}, f)
+        with open(os.path.join(path, "manifest.json"), 'r') as f:
+            manifest = json.load(f)
+        manifest['version'] = 1
+        with open(os.path.join(path, "manifest.json"), 'w') as f:
+            json.dump(manifest, f)
+
+        model = load_model(path, mmap=True)
+        self.assertEqual(model.vocabulary, self.model.vocabulary)
+        self.assertEqual(model.lemmas, {u"bags": u"bag"})
+
+    def test_mmap_requires_artifact(self):
+        """
+        A pickle without an artifact cannot be memory mapped
+        """
+        self.assertRaises(ValueError, load_model, MODEL, mmap=True)
+
+    def test_worker_memory(self):
+        """
+        Memory is reported for every worker that maps the model
+        """
+        path  = self.model.save(os.path.join(self.tmpdir, "model"))
+        stats = worker_memory(path, processes=2, mmap=True)
+        self.assertEqual(len(stats), 2)
+        for worker in stats:
+            self.assertGreater(worker['rss'], 0)
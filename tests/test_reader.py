@@ -0,0 +1,203 @@
+# tests.test_reader
+# Tests for the streaming record readers
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 16:02:17 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: test_reader.py [] benjamin@bengfort.com $
+
+"""
+Tests for the streaming record readers
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import bz2
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+import threading
+
+from collections import Counter
+from apparel.reader import chunked, detect_format, read_records, validate_records
+from apparel.reader import corpus_paths, prefetch, lzma, CorpusReader
+
+##########################################################################
+## Fixtures
+##########################################################################
+
+RECORDS = [
+    {"name": u"North Face Fleece Jacket", "description": u"Warm", "keywords": u"Men"},
+    {"name": u"GUESS Handbag, Isla Large Satchel", "description": u"", "keywords": u""},
+    {"name": u"Caf\xe9 Racer Boots", "description": u"Leather", "keywords": u"Shoes"},
+]
+
+##########################################################################
+## Reader Test Case
+##########################################################################
+
+class ReaderTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, data, opener=open):
+        path = os.path.join(self.tmpdir, name)
+        f = opener(path, 'wb')
+        try:
+            f.write(data.encode('utf-8'))
+        finally:
+            f.close()
+        return path
+
+    def jsonl(self, records):
+        return u"\n".join(json.dumps(r) for r in records) + u"\n"
+
+    def test_detect_format(self):
+        """
+        Formats are detected from the file extension
+        """
+        self.assertEqual(detect_format("products.csv"), "csv")
+        self.assertEqual(detect_format("products.JSONL"), "jsonl")
+        self.assertEqual(detect_format("products.json"), "jsonl")
+        self.assertEqual(detect_format("products"), "csv")
+        self.assertEqual(detect_format("part-0001.jsonl.gz"), "jsonl")
+        self.assertEqual(detect_format("products.csv.bz2"), "csv")
+
+    def test_read_csv(self):
+        """
+        Records are read from a CSV file with a header row
+        """
+        lines = [u"name,description,keywords"]
+        lines.extend(u'"%(name)s",%(description)s,%(keywords)s' % r for r in RECORDS)
+        path  = self.write("products.csv", u"\n".join(lines) + u"\n")
+        self.assertEqual(list(read_records(path)), RECORDS)
+
+    def test_read_jsonl(self):
+        """
+        Records are read from a JSON lines file, skipping blank lines
+        """
+        lines = [json.dumps(r) for r in RECORDS]
+        lines.insert(1, u"")
+        path  = self.write("products.txt", u"\n".join(lines))
+        self.assertEqual(list(read_records(path, 'jsonl')), RECORDS)
+
+    def test_unknown_format(self):
+        """
+        An unknown format raises a ValueError
+        """
+        with self.assertRaises(ValueError):
+            list(read_records("products.csv", "xml"))
+
+    def test_chunked(self):
+        """
+        Iterables are broken into bounded chunks
+        """
+        chunks = list(chunked(iter(xrange(10)), 4))
+        self.assertEqual(chunks, [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]])
+        self.assertEqual(list(chunked([], 4)), [])
+
+    def test_validate_records(self):
+        """
+        Records without a product name are rejected by number or skipped
+        """
+        records = [
+            "Fleece Jacket", {"name": "Sandals"}, {"description": "Leather"},
+            {"name": None}, 42, {"name": u"Parka"},
+        ]
+
+        with self.assertRaisesRegexp(ValueError, "Record 3 "):
+            list(validate_records(iter(records)))
+
+        counts = Counter()
+        valid  = list(validate_records(iter(records), skip=True, counts=counts))
+        self.assertEqual(valid, [records[0], records[1], records[5]])
+        self.assertEqual(counts, {'records': 6, 'skipped': 3})
+
+    def test_read_compressed(self):
+        """
+        Compressed files are decompressed by their extension
+        """
+        gz  = self.write("products.jsonl.gz", self.jsonl(RECORDS), gzip.open)
+        bz  = self.write("products.jsonl.bz2", self.jsonl(RECORDS), bz2.BZ2File)
+        self.assertEqual(list(read_records(gz)), RECORDS)
+        self.assertEqual(list(read_records(bz)), RECORDS)
+
+    @unittest.skipIf(lzma is not None, "the lzma module is installed")
+    def test_read_xz_without_lzma(self):
+        """
+        Reading an xz file without the lzma module raises a ValueError
+        """
+        path = self.write("products.jsonl.xz", u"")
+        with self.assertRaises(ValueError):
+            list(read_records(path))
+
+    def test_read_shards(self):
+        """
+        Directories and globs of shards are read in sorted order
+        """
+        self.write("part-2.jsonl.gz", self.jsonl(RECORDS[2:]), gzip.open)
+        self.write("part-1.jsonl", self.jsonl(RECORDS[:2]))
+        self.write(".part-3.jsonl", self.jsonl(RECORDS))
+
+        self.assertEqual(list(read_records(self.tmpdir)), RECORDS)
+        self.assertEqual(list(read_records(os.path.join(self.tmpdir, "part-*"))), RECORDS)
+        self.assertEqual(len(corpus_paths(self.tmpdir)), 2)
+
+        with self.assertRaises(ValueError):
+            corpus_paths(os.path.join(self.tmpdir, "*.csv"))
+
+    def test_prefetch(self):
+        """
+        Prefetching yields every item in order and raises errors in order
+        """
+        self.assertEqual(list(prefetch(iter(xrange(100)), 3)), range(100))
+
+        def failing():
+            yield 1
+            raise IOError("truncated")
+
+        items = prefetch(failing(), 3)
+        self.assertEqual(next(items), 1)
+        with self.assertRaises(IOError):
+            next(items)
+
+    def test_prefetch_stops(self):
+        """
+        The prefetch thread stops when the consumer stops early
+        """
+        items = prefetch(iter(xrange(1000)), 2)
+        self.assertEqual(next(items), 0)
+        items.close()
+        self.assertEqual(
+            [thread.name for thread in threading.enumerate() if thread.name == "prefetch"], []
+        )
+
+    def test_corpus_reader(self):
+        """
+        The corpus reader streams every shard and reports its throughput
+        """
+        self.write("part-1.jsonl.bz2", self.jsonl(RECORDS[:1]), bz2.BZ2File)
+        self.write("part-2.jsonl.gz", self.jsonl(RECORDS[1:]), gzip.open)
+
+        for ahead in (0, 2):
+            reader = CorpusReader(self.tmpdir, prefetch=ahead, chunksize=2)
+            self.assertEqual(list(reader), RECORDS)
+
+            stats = reader.stats()
+            self.assertEqual((stats['files'], stats['rows']), (2, 3))
+            self.assertEqual(stats['bytes'], sum(
+                os.path.getsize(path) for path in corpus_paths(self.tmpdir)
+            ))
+            self.assertGreater(stats['rows_per_sec'], 0)
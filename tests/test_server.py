@@ -0,0 +1,186 @@
+# tests.test_server
+# Tests for the micro-batching classification service
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 17 19:06:12 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: test_server.py [] benjamin@bengfort.com $
+
+"""
+Tests for the micro-batching classification service
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import json
+import threading
+import unittest
+
+from six.moves.urllib.request import urlopen, Request
+from six.moves.urllib.error import HTTPError
+
+from apparel.server import create_server, MicroBatcher
+from apparel.classify import ApparelClassifier
+from apparel.features import ProductFeatures
+from tests.test_classify import MODEL, PRODUCTS, IdentityLemmatizer
+
+##########################################################################
+## Server Test Case
+##########################################################################
+
+class ClassifierServerTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        featurizer = ProductFeatures(
+            stoplist=["a", "the", "with"], lemmatizer=IdentityLemmatizer()
+        )
+        cls.classifier = ApparelClassifier(MODEL, featurizer=featurizer)
+        cls.server = create_server(cls.classifier, port=0, window=0.05)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+        cls.url = "http://127.0.0.1:%i" % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.server.get_app().batcher.stop()
+
+    def post(self, data):
+        request = Request(
+            self.url + "/classify", json.dumps(data).encode('utf-8'),
+            {'Content-Type': 'application/json'},
+        )
+        return json.loads(urlopen(request).read().decode('utf-8'))
+
+    def get(self, path):
+        return json.loads(urlopen(self.url + path).read().decode('utf-8'))
+
+    def expected(self, record):
+        if isinstance(record, dict):
+            return self.classifier.classify(**record)
+        return self.classifier.classify(record)
+
+    def assertLabels(self, labels, expected):
+        self.assertEqual([l for l, _ in labels], [l for l, _ in expected])
+        for (_, prob), (_, other) in zip(labels, expected):
+            self.assertAlmostEqual(prob, other, places=9)
+
+    def test_classify(self):
+        """
+        A single product is classified like the classifier would
+        """
+        record = PRODUCTS[2]
+        result = self.post(record)
+        self.assertLabels(result['labels'], self.expected(record))
+
+    def test_classify_list(self):
+        """
+        A list of products is classified in order
+        """
+        records = [record for record in PRODUCTS if isinstance(record, dict)]
+        results = self.post(records)
+        self.assertEqual(len(results), len(records))
+        for record, result in zip(records, results):
+            self.assertLabels(result['labels'], self.expected(record))
+
+    def test_concurrent_batching(self):
+        """
+        Concurrent requests are coalesced into micro-batches
+        """
+        before  = self.get("/metrics")['batches']
+        results = [None] * 8
+
+        def request(idx):
+            results[idx] = self.post({"name": "North Face Fleece Jacket %i" % idx})
+
+        threads = [threading.Thread(target=request, args=(idx,)) for idx in range(8)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+
+        after = self.get("/metrics")
+        self.assertTrue(all(result['labels'] for result in results))
+        self.assertEqual(after['batches']['items'] - before['items'], 8)
+        self.assertLess(after['batches']['count'] - before['count'], 8)
+        self.assertIsNotNone(after['latency']['p99'])
+
+    def test_bad_request(self):
+        """
+        Products without a name are rejected
+        """
+        with self.assertRaises(HTTPError) as cm:
+            self.post({"description": "no name"})
+        self.assertEqual(cm.exception.code, 400)
+
+    def test_bad_fields(self):
+        """
+        Products with fields that are not strings are rejected
+        """
+        for record in ({"name": 123}, {"name": "Jean", "keywords": ["Men"]}):
+            with self.assertRaises(HTTPError) as cm:
+                self.post(record)
+            self.assertEqual(cm.exception.code, 400)
+
+    def test_concurrent_bad_request(self):
+        """
+        A bad request does not fail the requests batched with it
+        """
+        results = [None, None]
+
+        def request(idx, record):
+            try:
+                results[idx] = self.post(record)
+            except HTTPError as e:
+                results[idx] = e.code
+
+        threads = [
+            threading.Thread(target=request, args=(0, {"name": 123})),
+            threading.Thread(target=request, args=(1, {"name": "Navy Denim Jean"})),
+        ]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+
+        self.assertEqual(results[0], 400)
+        self.assertLabels(results[1]['labels'], self.expected("Navy Denim Jean"))
+
+    def test_failed_batch(self):
+        """
+        Records of a failed batch are rescored so only bad records fail
+        """
+        batcher = MicroBatcher(self.classifier, window=0.5, max_batch=2)
+        errors  = [None, None]
+        results = [None, None]
+
+        def submit(idx, record):
+            try:
+                results[idx] = batcher.submit([record])
+            except Exception as e:
+                errors[idx] = e
+
+        threads = [
+            threading.Thread(target=submit, args=(0, {"name": 123})),
+            threading.Thread(target=submit, args=(1, "Navy Denim Jean")),
+        ]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        batcher.stop()
+
+        self.assertIsNotNone(errors[0])
+        self.assertIsNone(errors[1])
+        self.assertLabels(results[1][0], self.expected("Navy Denim Jean"))
+        self.assertEqual(batcher.metrics.report()['batches']['count'], 1)
+
+    def test_not_found(self):
+        """
+        Unknown paths are not found
+        """
+        with self.assertRaises(HTTPError) as cm:
+            self.get("/nothing")
+        self.assertEqual(cm.exception.code, 404)
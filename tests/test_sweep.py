@@ -0,0 +1,123 @@
+# tests.test_sweep
+# Tests for the hyperparameter sweep of builds
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 18 00:41:09 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: test_sweep.py [] benjamin@bengfort.com $
+
+"""
+Tests for the hyperparameter sweep of builds
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from apparel.build import ClassifierBuilder
+from apparel.model import load_model
+from apparel.matrix import FeatureMatrix
+from apparel.sweep import Sweep, candidates
+
+from tests.test_build import make_corpus, make_featurizer
+
+##########################################################################
+## Sweep Test Case
+##########################################################################
+
+class SweepTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.corpus = os.path.join(self.tmpdir, "corpus.csv")
+        make_corpus(self.corpus)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def builder(self, **kwargs):
+        kwargs.setdefault('cache', None)
+        return ClassifierBuilder(
+            self.corpus, outpath=self.tmpdir, featurizer=make_featurizer(),
+            algorithm='numpy', folds=3, seed=42, **kwargs
+        )
+
+    def test_candidates(self):
+        """
+        Candidates are every combination of the grid
+        """
+        grid = candidates({'sigma': (1, 2), 'min_df': (1,), 'fields': [('name',)]})
+        self.assertEqual(len(grid), 2)
+        self.assertEqual(grid[0], {'sigma': 1, 'min_df': 1, 'top_n': None, 'fields': ('name',)})
+        self.assertRaises(ValueError, candidates, {'fields': [('description',)]})
+
+    def test_fields(self):
+        """
+        The union of the fields is the featureset of the whole product
+        """
+        fields = Sweep(self.builder()).extract()
+        self.assertEqual([len(matrix) for matrix in fields], [120] * 3)
+        self.assertEqual(
+            list(FeatureMatrix.union(fields)), list(self.builder().featureset())
+        )
+
+    def test_fields_cache(self):
+        """
+        The features of each field are cached apart from those of builds
+        """
+        cache  = os.path.join(self.tmpdir, "cache")
+        sweep  = Sweep(self.builder(cache=cache))
+        fields = sweep.extract()
+        self.builder(cache=cache).featureset()
+        self.assertEqual(len(os.listdir(cache)), 2)
+
+        cached = Sweep(self.builder(cache=cache))
+        cached.builder.featurizer.featurize = None    # Fails if extracting
+        self.assertEqual(
+            [list(matrix) for matrix in cached.extract()],
+            [list(matrix) for matrix in fields]
+        )
+        self.assertEqual(cached.lemmas, sweep.lemmas)
+
+    def test_run_and_promote(self):
+        """
+        Candidates are ranked by accuracy and the best can be promoted
+        """
+        sweep   = Sweep(self.builder(), {
+            'sigma': (0.01, 1.0), 'min_df': (1, 30),
+            'fields': (('name',), ('name', 'description', 'keywords')),
+        })
+        results = sweep.run()
+
+        self.assertEqual(len(results), 8)
+        self.assertEqual([result['rank'] for result in results], list(range(1, 9)))
+        accuracy = [result['accuracy'] for result in results]
+        self.assertEqual(accuracy, sorted(accuracy, reverse=True))
+        for result in results:
+            self.assertGreater(result['inference'], 0)
+            self.assertEqual(result['weights'], result['features'] * 3 * 8)
+
+        report = json.loads(json.dumps(sweep.report()))
+        self.assertEqual(report['candidates'], 8)
+
+        best    = dict(results[0], fields=['name'], min_df=30)
+        builder = sweep.promote(best)
+        model   = load_model(builder.model_path)
+        self.assertEqual(model.fields, ['name'])
+        self.assertTrue(model.lemmas)
+        self.assertIsNone(builder.lemmatime)
+        self.assertEqual(builder.pruning['after'], len(model))
+
+        with open(builder.info_path, 'r') as f:
+            details = json.load(f)
+        self.assertEqual(details['features']['fields'], ['name'])
+        self.assertEqual(details['training']['sigma'], best['sigma'])